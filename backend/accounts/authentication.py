@@ -0,0 +1,88 @@
+"""JWT authentication that trusts the token's claims on reads instead of loading the user."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+
+class ClaimsUser(SimpleLazyObject):
+    """A user known only by the identifier in a validated access token.
+
+    ``pk``, the ``USER_ID_FIELD`` attribute (``email``) and the
+    ``is_authenticated``/``is_anonymous`` flags are answered from the token.
+    Anything else, including ``isinstance`` checks such as assigning the user
+    to a foreign key, loads the ``User`` row once through ``load`` and proxies
+    to it from then on.
+    """
+
+    def __init__(self, user_id: Any, load):
+        self.__dict__["_user_id"] = user_id
+        super().__init__(load)
+
+    @property
+    def pk(self) -> Any:
+        return self.__dict__["_user_id"]
+
+    @property
+    def is_authenticated(self) -> bool:
+        return True
+
+    @property
+    def is_anonymous(self) -> bool:
+        return False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._wrapped is not empty
+
+    def __bool__(self) -> bool:
+        # ``request.user and request.user.is_authenticated`` must not load the row.
+        return True
+
+    def __getattr__(self, name: str) -> Any:
+        if name == api_settings.USER_ID_FIELD:
+            return self.__dict__["_user_id"]
+        return super().__getattr__(name)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that skips the per-request user lookup on safe methods.
+
+    ``GET``, ``HEAD`` and ``OPTIONS`` requests get a ``ClaimsUser`` built from
+    the token, so a read that only needs the caller's identity (the vote
+    overlay on summaries, random titles and recap pages) costs no query for
+    the user. The row is loaded, and checked to exist and be active, only when
+    a view reads other user attributes. Writes authenticate exactly as
+    ``JWTAuthentication`` does.
+
+    Until the row is loaded, a deleted or deactivated user's unexpired access
+    token still identifies them on reads, for at most ``ACCESS_TOKEN_LIFETIME``.
+    """
+
+    def authenticate(self, request: Request) -> tuple[Any, Token] | None:
+        if request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_claims_user(validated_token), validated_token
+
+    def get_claims_user(self, validated_token: Token) -> ClaimsUser:
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        return ClaimsUser(user_id, lambda: self.get_user(validated_token))
@@ -1,23 +1,72 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
 
 from .models import Recap, Title, Vote
+from .services.catalog import estimated_count
+from .services.recap_search import RecapSearch
+from .services.title_search import TitleSearch
+
+# Tables at least this large page by the planner's row estimate when unfiltered.
+ESTIMATED_COUNT_MIN_ROWS = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Count unfiltered changelists of large tables from planner statistics instead of ``COUNT(*)``.
+
+    The estimate may be off by the writes since the last ``ANALYZE``; the last
+    pages of a list may then come up short or empty. Filtered and small lists
+    are counted exactly.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_count(queryset.model)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_MIN_ROWS:
+                return estimate
+        return super().count
 
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
     list_display = ("name", "category", "author", "created_at")
     list_filter = ("category",)
     search_fields = ("name", "author")
 
+    def get_search_results(self, request, queryset, search_term):
+        # Answered by the trigram index instead of a LIKE '%term%' scan per field.
+        if not search_term.strip():
+            return queryset, False
+        return TitleSearch.filter(queryset, search_term.strip()), False
+
 
 @admin.register(Recap)
 class RecapAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("title", "user", "score", "created_at")
     list_filter = ("title__category",)
     search_fields = ("text", "title__name", "user__username")
 
+    def get_search_results(self, request, queryset, search_term):
+        # Text and title names through their search indexes; usernames are short enough to scan.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        titles = TitleSearch.filter(Title.objects.all(), term).values("pk")
+        matches = RecapSearch.filter(Recap.objects.all(), term).values("pk")
+        return queryset.filter(Q(pk__in=matches) | Q(title__in=titles) | Q(user__username__icontains=term)), False
+
 
 @admin.register(Vote)
 class VoteAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("recap", "user", "value", "created_at")
     list_filter = ("value",)
@@ -0,0 +1,30 @@
+"""Benchmark suites runnable via ``manage.py benchmark <suite>``.
+
+Each suite module exposes ``add_arguments(parser)`` and ``run(command, **options)``.
+Suites that need data seed it inside a transaction that is rolled back at the end,
+so they can be pointed at a development database without leaving rows behind.
+"""
+
+from . import (
+    authentication,
+    compression,
+    json_codecs,
+    refresh,
+    sampler,
+    search,
+    serializers,
+    summaries,
+    votes,
+)
+
+SUITES = {
+    "authentication": authentication,
+    "compression": compression,
+    "json": json_codecs,
+    "refresh": refresh,
+    "sampler": sampler,
+    "search": search,
+    "serializers": serializers,
+    "summaries": summaries,
+    "votes": votes,
+}
@@ -0,0 +1,58 @@
+"""JWT authentication on read endpoints: user lookups per request, loaded from the database or taken from the token."""
+
+from __future__ import annotations
+
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.authentication import ClaimsJWTAuthentication
+
+from ..models import Recap, Title
+from ..services.sampler import TitleSampler
+from .utils import (
+    api_client,
+    count_queries,
+    describe,
+    scratch_data,
+    seed_catalog,
+    time_calls,
+)
+
+AUTHENTICATORS = {"database user": JWTAuthentication, "token claims": ClaimsJWTAuthentication}
+
+
+def add_arguments(parser):
+    parser.add_argument("--titles", type=int, default=1000, help="Titles to seed.")
+    parser.add_argument("--recaps-per-title", type=int, default=20, help="Recaps seeded per title.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests timed per scenario.")
+
+
+def run(command, titles, recaps_per_title, requests, **options):
+    with scratch_data():
+        users = seed_catalog(titles, recaps_per_title, voters=5)
+        TitleSampler.rebuild()
+        title_ids = list(Title.objects.order_by("pk").values_list("pk", flat=True)[:10])
+        recap_ids = ",".join(str(pk) for pk in Recap.objects.filter(title_id=title_ids[0]).values_list("pk", flat=True))
+
+        # Real bearer tokens, since force_authenticate would bypass authentication altogether.
+        client = api_client()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(users[0])}")
+        batch = {"ids": ",".join(str(pk) for pk in title_ids)}
+        scenarios = [
+            ("summary", lambda: client.get(reverse("titles-summary", args=[title_ids[0]]))),
+            ("summaries x10", lambda: client.get(reverse("titles-summaries"), batch)),
+            ("random", lambda: client.get(reverse("titles-random"))),
+            ("recap page", lambda: client.get(reverse("titles-recaps", args=[title_ids[0]]))),
+            ("my-votes", lambda: client.get(reverse("recaps-my-votes"), {"ids": recap_ids})),
+        ]
+        command.stdout.write(f"{titles:,} titles x {recaps_per_title} recaps")
+        for name, authenticator in AUTHENTICATORS.items():
+            with mock.patch.object(APIView, "get_authenticators", lambda self, cls=authenticator: [cls()]):
+                for label, call in scenarios:
+                    call()  # Cached bundles are warm for both authenticators.
+                    queries = count_queries(call)
+                    command.stdout.write(f"  {name:<14} {label:<14} {queries:2d} queries  {describe(time_calls(call, requests))}")
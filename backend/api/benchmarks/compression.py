@@ -0,0 +1,44 @@
+"""API response compression: bytes saved and time per response, compressed or served from the cache."""
+
+from __future__ import annotations
+
+import statistics
+
+from django.core.cache import caches
+
+from ..middleware import CACHE_ALIAS
+from ..models import Title
+from .utils import api_client, scratch_data, seed_catalog, time_calls
+
+
+def add_arguments(parser):
+    parser.add_argument("--titles", type=int, default=200, help="Titles to seed.")
+    parser.add_argument("--recaps-per-title", type=int, default=10, help="Recaps seeded per title.")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed requests per case.")
+
+
+def run(command, titles, recaps_per_title, repeat, **options):
+    with scratch_data():
+        seed_catalog(titles, recaps_per_title)
+        title_ids = list(Title.objects.order_by("pk").values_list("pk", flat=True))
+        client = api_client()
+        requests = {
+            "summaries x10": ("/api/titles/summaries/", {"ids": ",".join(map(str, title_ids[:10]))}),
+            "recap page x50": (f"/api/titles/{title_ids[0]}/recaps/", {"page_size": 50}),
+            "title page x50": ("/api/titles/", {"page_size": 50}),
+        }
+        command.stdout.write(f"{'request':<16} {'bytes':>7} {'gzip':>7}  {'identity':>10} {'gzip':>10} {'gzip cached':>12}")
+        for label, (url, params) in requests.items():
+            plain = client.get(url, params)
+            compressed = client.get(url, params, HTTP_ACCEPT_ENCODING="gzip")
+            timings = [time_calls(lambda: client.get(url, params), repeat)]
+            caches[CACHE_ALIAS].clear()
+            # Only shared (Cache-Control: public) responses reuse cached bytes.
+            shared = "public" in compressed.get("Cache-Control", "")
+            timings.append(time_calls(lambda: (caches[CACHE_ALIAS].clear(), client.get(url, params, HTTP_ACCEPT_ENCODING="gzip")), repeat))
+            if shared:
+                timings.append(time_calls(lambda: client.get(url, params, HTTP_ACCEPT_ENCODING="gzip"), repeat))
+            medians = [f"{statistics.median(times):.2f} ms" for times in timings] + (["-"] if not shared else [])
+            command.stdout.write(
+                f"{label:<16} {len(plain.content):>7} {len(compressed.content):>7}  {medians[0]:>10} {medians[1]:>10} {medians[2]:>12}"
+            )
@@ -0,0 +1,55 @@
+"""JSON rendering and parsing: DRF's stdlib renderer and parser versus the orjson-backed ones."""
+
+from __future__ import annotations
+
+import statistics
+from io import BytesIO
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ..models import Recap, Title
+from ..parsers import FastJSONParser
+from ..renderers import FastJSONRenderer, orjson
+from ..serializers import RecapSerializer, TitleSerializer
+from ..services.catalog import CategoryCounts
+from ..services.summaries import SummaryService
+from .utils import scratch_data, seed_catalog, time_calls
+
+
+def add_arguments(parser):
+    parser.add_argument("--titles", type=int, default=200, help="Titles to seed.")
+    parser.add_argument("--recaps-per-title", type=int, default=10, help="Recaps seeded per title.")
+    parser.add_argument("--repeat", type=int, default=500, help="Timed calls per payload.")
+
+
+def run(command, titles, recaps_per_title, repeat, **options):
+    if orjson is None:
+        command.stdout.write("orjson is not installed; both columns would use the stdlib renderer.")
+        return
+    with scratch_data():
+        seed_catalog(titles, recaps_per_title)
+        title_ids = list(Title.objects.order_by("pk").values_list("pk", flat=True)[:10])
+        recaps = Recap.objects.select_related("title", "user").order_by("-score", "-pk")[:50]
+        payloads = {
+            "summaries x10": {"results": SummaryService.build(title_ids)},
+            "recap page x50": {"next": None, "results": RecapSerializer(recaps, many=True).data},
+            "title page x50": {
+                "next": None,
+                "results": TitleSerializer(Title.objects.order_by("name", "pk")[:50], many=True).data,
+                "facets": CategoryCounts.facets(),
+            },
+        }
+
+    command.stdout.write(f"{'payload':<16} {'bytes':>7}  {'render stdlib':>14} {'orjson':>10}  {'parse stdlib':>13} {'orjson':>10}")
+    for label, payload in payloads.items():
+        body = JSONRenderer().render(payload)
+        assert FastJSONRenderer().render(payload) == body
+        columns = [
+            time_calls(lambda: JSONRenderer().render(payload), repeat),
+            time_calls(lambda: FastJSONRenderer().render(payload), repeat),
+            time_calls(lambda: JSONParser().parse(BytesIO(body)), repeat),
+            time_calls(lambda: FastJSONParser().parse(BytesIO(body)), repeat),
+        ]
+        medians = [f"{statistics.median(timings) * 1000:.1f} µs" for timings in columns]
+        command.stdout.write(f"{label:<16} {len(body):>7}  {medians[0]:>14} {medians[1]:>10}  {medians[2]:>13} {medians[3]:>10}")
@@ -0,0 +1,36 @@
+"""Full recomputation of recap vote counters: statements and wall time per chunk size."""
+
+from __future__ import annotations
+
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Recap
+from ..services.votes import VoteService
+from .utils import scratch_data, seed_catalog
+
+
+def add_arguments(parser):
+    parser.add_argument("--titles", type=int, default=5000, help="Titles to seed.")
+    parser.add_argument("--recaps-per-title", type=int, default=20, help="Recaps seeded per title.")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Chunk sizes to time.")
+
+
+def run(command, titles, recaps_per_title, chunk_sizes, **options):
+    with scratch_data():
+        # Seeded recaps carry non-zero scores without votes, so most rows start out drifted.
+        seed_catalog(titles, recaps_per_title, voters=5)
+        recaps = Recap.objects.count()
+        command.stdout.write(f"{recaps:,} recaps")
+        for chunk_size in chunk_sizes:
+            Recap.objects.update(score=1)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                totals = VoteService.refresh_vote_metrics(chunk_size=chunk_size)
+                elapsed = time.perf_counter() - started
+            command.stdout.write(
+                f"  chunk {chunk_size:>5}  {len(captured.captured_queries):5d} statements  "
+                f"{elapsed * 1000:9.1f} ms  corrected {totals.corrected:,}"
+            )
@@ -0,0 +1,57 @@
+"""Random title selection: ``TitleSampler`` and ``EngagementSampler`` versus ``ORDER BY RANDOM()``."""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import override_settings
+
+from ..models import Title, TitleCategory
+from ..services.engagement import EngagementSampler
+from ..services.sampler import TitleSampler
+from .utils import describe, scratch_data, seed_titles, time_calls
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 1_000_000, 10_000_000],
+        help="Catalog sizes to benchmark (default: 10k, 1M and 10M titles).",
+    )
+    parser.add_argument("--draws", type=int, default=200, help="Sampler draws per catalog size.")
+    parser.add_argument(
+        "--baseline-draws",
+        type=int,
+        default=5,
+        help="ORDER BY RANDOM() draws per catalog size (0 to skip the baseline).",
+    )
+
+
+def run(command, sizes, draws, baseline_draws, **options):
+    with scratch_data(), tempfile.TemporaryDirectory() as tmp, override_settings(
+        ENGAGEMENT_TABLE_PATH=Path(tmp) / "engagement.table"
+    ):
+        seeded = Title.objects.count()
+        for size in sorted(sizes):
+            if size > seeded:
+                command.stdout.write(f"Seeding {size - seeded} titles...")
+                seed_titles(size - seeded, start=seeded)
+                seeded = size
+                TitleSampler.rebuild()
+            started = time.perf_counter()
+            EngagementSampler.rebuild()
+            rebuild_ms = (time.perf_counter() - started) * 1000
+            command.stdout.write(f"\n{size:,} titles (engagement table rebuilt in {rebuild_ms:.0f} ms)")
+            for label, category in (("all", None), ("category", TitleCategory.BOOK)):
+                timings = time_calls(lambda: TitleSampler.sample(category), draws)
+                command.stdout.write(f"  sampler   {label:<9} {describe(timings)}")
+                timings = time_calls(lambda: EngagementSampler.sample(category), draws)
+                command.stdout.write(f"  weighted  {label:<9} {describe(timings)}")
+                if baseline_draws:
+                    queryset = Title.objects.filter(category=category) if category else Title.objects.all()
+                    timings = time_calls(lambda: queryset.order_by("?").values_list("pk", flat=True).first(), baseline_draws)
+                    command.stdout.write(f"  random()  {label:<9} {describe(timings)}")
@@ -0,0 +1,124 @@
+"""Title search: ``TitleSearch`` tiers versus ``LIKE '%q%'`` scans."""
+
+from __future__ import annotations
+
+import itertools
+import random
+
+from django.db.models import Q
+
+from ..models import Title, TitleCategory
+from ..services.title_search import TitleSearch
+from .utils import SEED_BATCH_SIZE, describe, scratch_data, time_calls
+
+# Rough English letter frequencies, so names share trigrams the way real titles do.
+CONSONANTS = "tnshrdlcmwfgypbvkjxqz"
+CONSONANT_WEIGHTS = list(
+    itertools.accumulate([9.1, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.4, 2.4, 2.2, 2.0, 2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1])
+)
+VOWELS = "eaoiuy"
+VOWEL_WEIGHTS = list(itertools.accumulate([12.7, 8.2, 7.5, 7.0, 2.8, 0.5]))
+VOCABULARY_SIZE = 30_000
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100_000, 1_000_000],
+        help="Catalog sizes to benchmark (default: 100k and 1M titles).",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Searches per query shape and catalog size.")
+    parser.add_argument(
+        "--baseline-queries",
+        type=int,
+        default=5,
+        help="LIKE '%%q%%' scans per catalog size (0 to skip the baseline).",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for names and queries.")
+
+
+def run(command, sizes, queries, baseline_queries, seed, **options):
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    with scratch_data():
+        seeded = Title.objects.count()
+        for size in sorted(sizes):
+            if size > seeded:
+                command.stdout.write(f"Seeding {size - seeded} titles...")
+                _seed_titles(size - seeded, vocabulary, rng)
+                seeded = size
+                # Bulk loads leave many small index segments; merge them as a deployment would.
+                TitleSearch.optimize()
+            names = _sample_names(rng, queries)
+            command.stdout.write(f"\n{size:,} titles")
+            shapes = {
+                "keystroke": [name[: rng.randint(1, min(len(name), 10))] for name in names],
+                "substring": [_fragment(rng, name) for name in names],
+                "full name": names,
+                "typo": [_typo(rng, name) for name in names],
+            }
+            for label, batch in shapes.items():
+                pending = iter(batch)
+                timings = time_calls(lambda: TitleSearch.search(next(pending)), len(batch))
+                command.stdout.write(f"  search    {label:<10} {describe(timings)}")
+            found = sum(
+                name in {title.name.lower() for title in TitleSearch.search(typo)} for name, typo in zip(names, shapes["typo"])
+            )
+            command.stdout.write(f"  typo recall: {found}/{len(names)} misspelt names found")
+            if baseline_queries:
+                pending = iter(names[:baseline_queries])
+                timings = time_calls(
+                    lambda: list(Title.objects.filter(_contains(next(pending)))[:8]), min(baseline_queries, len(names))
+                )
+                command.stdout.write(f"  like scan {'full name':<10} {describe(timings)}")
+
+
+def _vocabulary(rng: random.Random) -> list[str]:
+    def word() -> str:
+        letters = []
+        for _ in range(rng.randint(2, 5)):
+            letters += [rng.choices(CONSONANTS, cum_weights=CONSONANT_WEIGHTS)[0], rng.choices(VOWELS, cum_weights=VOWEL_WEIGHTS)[0]]
+        if rng.random() < 0.5:
+            letters.append(rng.choices(CONSONANTS, cum_weights=CONSONANT_WEIGHTS)[0])
+        return "".join(letters)
+
+    return list(dict.fromkeys(word() for _ in range(VOCABULARY_SIZE)))
+
+
+def _seed_titles(count: int, vocabulary: list[str], rng: random.Random) -> None:
+    """Bulk insert titles of one to four Zipf-distributed words, with two-word authors."""
+
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    categories = TitleCategory.values
+
+    def words(count: int) -> str:
+        return " ".join(rng.choices(vocabulary, cum_weights=weights, k=count)).title()
+
+    for offset in range(0, count, SEED_BATCH_SIZE):
+        Title.objects.bulk_create(
+            Title(name=words(rng.randint(1, 4)), author=words(2), category=categories[idx % len(categories)])
+            for idx in range(offset, min(offset + SEED_BATCH_SIZE, count))
+        )
+
+
+def _sample_names(rng: random.Random, count: int) -> list[str]:
+    top = Title.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    ids = rng.sample(range(1, top + 1), min(count, top))
+    return [name.lower() for name in Title.objects.filter(pk__in=ids).values_list("name", flat=True)]
+
+
+def _fragment(rng: random.Random, name: str) -> str:
+    length = min(len(name), rng.randint(4, 8))
+    start = rng.randint(0, len(name) - length)
+    return name[start : start + length]
+
+
+def _typo(rng: random.Random, name: str) -> str:
+    index = rng.randrange(len(name))
+    return name[:index] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[index + 1 :]
+
+
+def _contains(query: str) -> Q:
+    return Q(name__icontains=query) | Q(author__icontains=query)
@@ -0,0 +1,46 @@
+"""Serialization throughput: DRF serializers versus the compiled row serializers."""
+
+from __future__ import annotations
+
+import statistics
+
+from ..models import Recap, Title
+from ..row_serializers import RECAP_ROWS, TITLE_SUMMARY_ROWS
+from ..serializers import RecapSerializer, TitleSummarySerializer
+from .utils import scratch_data, seed_catalog, time_calls
+
+
+def add_arguments(parser):
+    parser.add_argument("--titles", type=int, default=500, help="Titles to seed.")
+    parser.add_argument("--recaps-per-title", type=int, default=4, help="Recaps seeded per title.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over all objects.")
+
+
+def run(command, titles, recaps_per_title, repeat, **options):
+    with scratch_data():
+        seed_catalog(titles, recaps_per_title)
+        recaps = list(Recap.objects.select_related("title", "user").order_by("title_id", "pk"))
+        rows = list(Recap.objects.order_by("title_id", "pk").values(*RECAP_ROWS.fields))
+        by_title: dict[int, list] = {}
+        for recap, row in zip(recaps, rows):
+            by_title.setdefault(recap.title_id, []).append((recap, row))
+        title_rows = {row["id"]: row for row in Title.objects.filter(pk__in=by_title).values("id", "name", "category", "author", "created_at")}
+        bundles = [
+            {"title": pairs[0][0].title, "top_recap": pairs[0][0], "other_recaps": [recap for recap, _ in pairs[1:]]}
+            for pairs in by_title.values()
+        ]
+        bundle_rows = [
+            {"title": title_rows[pk], "top_recap": pairs[0][1], "other_recaps": [row for _, row in pairs[1:]]}
+            for pk, pairs in by_title.items()
+        ]
+
+    command.stdout.write(f"{len(recaps)} recaps, {len(bundles)} bundles; objects per second (median of {repeat} passes)")
+    cases = (
+        ("recaps    DRF", len(recaps), lambda: RecapSerializer(recaps, many=True).data),
+        ("recaps    rows", len(recaps), lambda: RECAP_ROWS.many(rows)),
+        ("bundles   DRF", len(bundles), lambda: TitleSummarySerializer(bundles, many=True).data),
+        ("bundles   rows", len(bundles), lambda: TITLE_SUMMARY_ROWS.many(bundle_rows)),
+    )
+    for label, objects, func in cases:
+        seconds = statistics.median(time_calls(func, repeat)) / 1000
+        command.stdout.write(f"  {label:<15} {objects / seconds:>12,.0f}/s  ({seconds * 1000:.2f} ms per pass)")
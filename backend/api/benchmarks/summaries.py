@@ -0,0 +1,44 @@
+"""Title bundle endpoints: queries and latency per request through the full DRF stack."""
+
+from __future__ import annotations
+
+from django.urls import reverse
+
+from ..models import Title
+from ..services.sampler import TitleSampler
+from .utils import (
+    api_client,
+    count_queries,
+    describe,
+    scratch_data,
+    seed_catalog,
+    time_calls,
+)
+
+
+def add_arguments(parser):
+    parser.add_argument("--titles", type=int, default=1000, help="Titles to seed.")
+    parser.add_argument("--recaps-per-title", type=int, default=20, help="Recaps seeded per title.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests timed per scenario.")
+
+
+def run(command, titles, recaps_per_title, requests, **options):
+    with scratch_data():
+        users = seed_catalog(titles, recaps_per_title, voters=5)
+        TitleSampler.rebuild()
+        title_ids = list(Title.objects.order_by("pk").values_list("pk", flat=True)[:10])
+
+        anonymous = api_client()
+        authenticated = api_client(users[0])
+        summary_url = reverse("titles-summary", args=[title_ids[0]])
+        batch = {"ids": ",".join(str(pk) for pk in title_ids)}
+        scenarios = [
+            ("summary (anonymous)", lambda: anonymous.get(summary_url)),
+            ("summary (authenticated)", lambda: authenticated.get(summary_url)),
+            ("random (anonymous)", lambda: anonymous.get(reverse("titles-random"))),
+            ("summaries x10 (authenticated)", lambda: authenticated.get(reverse("titles-summaries"), batch)),
+        ]
+        command.stdout.write(f"{titles:,} titles x {recaps_per_title} recaps")
+        for label, call in scenarios:
+            queries = count_queries(call)
+            command.stdout.write(f"  {label:<30} {queries:2d} queries  {describe(time_calls(call, requests))}")
@@ -0,0 +1,97 @@
+"""Shared helpers for benchmark suites."""
+
+from __future__ import annotations
+
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import Recap, Title, TitleCategory, Vote
+
+SEED_BATCH_SIZE = 10000
+
+
+@contextmanager
+def scratch_data() -> Iterator[None]:
+    """Run the enclosed block in a transaction that is always rolled back."""
+
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def seed_titles(count: int, start: int = 0) -> None:
+    """Bulk insert ``count`` synthetic titles spread evenly across categories."""
+
+    categories = TitleCategory.values
+    for offset in range(start, start + count, SEED_BATCH_SIZE):
+        stop = min(offset + SEED_BATCH_SIZE, start + count)
+        Title.objects.bulk_create(
+            Title(name=f"Bench title {idx}", category=categories[idx % len(categories)], author=f"Author {idx % 997}")
+            for idx in range(offset, stop)
+        )
+
+
+def seed_catalog(titles: int, recaps_per_title: int, voters: int = 0) -> list:
+    """Seed titles with recaps and votes; return the created users (authors first)."""
+
+    user_model = get_user_model()
+    user_count = max(recaps_per_title, voters, 1)
+    user_model.objects.bulk_create(
+        user_model(email=f"bench{idx}@bench.invalid", username=f"Bench {idx}", password="!") for idx in range(user_count)
+    )
+    users = list(user_model.objects.filter(email__endswith="@bench.invalid").order_by("date_joined", "email"))
+    start = Title.objects.count()
+    seed_titles(titles, start=start)
+    title_ids = list(Title.objects.order_by("pk").values_list("pk", flat=True)[start:])
+    for offset in range(0, len(title_ids), SEED_BATCH_SIZE // max(recaps_per_title, 1)):
+        chunk = title_ids[offset : offset + SEED_BATCH_SIZE // max(recaps_per_title, 1)]
+        Recap.objects.bulk_create(
+            Recap(title_id=title_id, user=users[idx], text=f"Recap {idx} of title {title_id}", score=idx % 7)
+            for title_id in chunk
+            for idx in range(recaps_per_title)
+        )
+    if voters:
+        recap_ids = list(Recap.objects.filter(title_id__in=title_ids[:100]).values_list("pk", flat=True))
+        Vote.objects.bulk_create(
+            Vote(recap_id=recap_id, user=user, value=Vote.UPVOTE) for recap_id in recap_ids for user in users[:voters]
+        )
+    return users
+
+
+def api_client(user=None) -> APIClient:
+    """Return an API client that passes ``ALLOWED_HOSTS`` outside the test runner."""
+
+    client = APIClient(SERVER_NAME="localhost")
+    if user is not None:
+        client.force_authenticate(user=user)
+    return client
+
+
+def count_queries(func: Callable[[], object]) -> int:
+    with CaptureQueriesContext(connection) as captured:
+        func()
+    return len(captured.captured_queries)
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> list[float]:
+    """Return per-call wall times in milliseconds."""
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def describe(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"mean {statistics.fmean(ordered):8.3f} ms  p50 {statistics.median(ordered):8.3f} ms  p95 {p95:8.3f} ms"
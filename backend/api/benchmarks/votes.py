@@ -0,0 +1,94 @@
+"""Concurrent votes on one hot recap: throughput and latency per counter mode.
+
+Writer threads use their own database connections, so this suite commits its
+seed data and deletes it afterwards instead of rolling back.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import override_settings
+
+from ..models import Recap, Title, TitleCategory, Vote
+from ..services.counter_shards import ShardedVoteCounters
+from ..services.vote_buffer import VoteCounterBuffer
+from ..services.votes import COUNTER_MODES, VoteService
+from .utils import describe
+
+BENCH_DOMAIN = "@votes.bench.invalid"
+
+
+def add_arguments(parser):
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 64], help="Parallel writer counts.")
+    parser.add_argument("--votes-per-writer", type=int, default=50, help="Votes cast by each writer.")
+    parser.add_argument("--modes", nargs="+", choices=COUNTER_MODES, default=list(COUNTER_MODES))
+    parser.add_argument("--flush-interval", type=float, default=0.05, help="Buffer flush interval in seconds.")
+
+
+def run(command, writers, votes_per_writer, modes, flush_interval, **options):
+    user_model = get_user_model()
+    users = user_model.objects.bulk_create(
+        user_model(email=f"writer{idx}{BENCH_DOMAIN}", username=f"Writer {idx}", password="!") for idx in range(max(writers))
+    )
+    title = Title.objects.create(name="Vote benchmark", category=TitleCategory.OTHER)
+    recap = Recap.objects.create(title=title, user=users[0], text="Hot recap")
+    try:
+        for mode in modes:
+            with override_settings(VOTE_COUNTER_MODE=mode, VOTE_BUFFER_FLUSH_INTERVAL=flush_interval):
+                for count in writers:
+                    Vote.objects.filter(recap=recap).delete()
+                    Recap.objects.filter(pk=recap.pk).update(score=0, upvotes=0, downvotes=0)
+                    result = _hammer(recap.pk, users[:count], votes_per_writer)
+                    VoteCounterBuffer.flush()
+                    ShardedVoteCounters.rollup()
+                    stored = Recap.objects.values_list("score", flat=True).get(pk=recap.pk)
+                    VoteService.refresh_vote_metrics([recap.pk])
+                    expected = Recap.objects.values_list("score", flat=True).get(pk=recap.pk)
+                    command.stdout.write(
+                        f"{mode:<9} {count:3d} writers  {result['rate']:8.1f} votes/s  "
+                        f"{describe(result['timings'])}  errors {result['errors']}  "
+                        f"drift {stored - expected}"
+                    )
+    finally:
+        title.delete()
+        user_model.objects.filter(email__endswith=BENCH_DOMAIN).delete()
+
+
+def _hammer(recap_id: int, users: list, votes_per_writer: int) -> dict:
+    timings: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(users))
+
+    def writer(user):
+        nonlocal errors
+        local_timings = []
+        local_errors = 0
+        try:
+            recap = Recap.objects.get(pk=recap_id)
+            barrier.wait()
+            for idx in range(votes_per_writer):
+                started = time.perf_counter()
+                try:
+                    VoteService.apply_vote(recap, user, 1 if idx % 2 == 0 else -1)
+                except Exception:
+                    local_errors += 1
+                local_timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+            with lock:
+                timings.extend(local_timings)
+                errors += local_errors
+
+    threads = [threading.Thread(target=writer, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {"rate": len(timings) / elapsed, "timings": timings, "errors": errors}
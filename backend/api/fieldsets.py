@@ -0,0 +1,117 @@
+"""Sparse fieldsets: ``?fields=`` and ``?omit=`` selections of output fields, and compact bundles."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from rest_framework.exceptions import ValidationError
+
+Path = tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Which output fields a request asked for.
+
+    Paths are dotted field names relative to each serialized object, e.g.
+    ``fields=id,text,user.username`` or ``omit=top_recap.title``. ``fields``
+    keeps the listed fields (a nested object keeps only its listed subfields,
+    or all of them when listed whole) and ``omit`` then drops fields with
+    everything below them. Unknown names are ignored.
+    """
+
+    fields: frozenset[Path] | None = None
+    omit: frozenset[Path] = frozenset()
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, str]) -> Fieldset | None:
+        """Parse the ``fields`` and ``omit`` query parameters; ``None`` when neither is given."""
+
+        fields = _parse_paths(params, "fields")
+        omit = _parse_paths(params, "omit")
+        if fields is None and omit is None:
+            return None
+        return cls(fields=fields, omit=omit or frozenset())
+
+    def wants(self, path: Path) -> bool:
+        """Return whether the field at ``path`` appears in the output."""
+
+        if any(path[:depth] in self.omit for depth in range(1, len(path) + 1)):
+            return False
+        if self.fields is None:
+            return True
+        return any(path[: len(field)] == field or field[: len(path)] == path for field in self.fields)
+
+    def wants_any(self, *paths: Path) -> bool:
+        return any(self.wants(path) for path in paths)
+
+    def prune(self, data: Any, path: Path = ()) -> Any:
+        """Return a copy of serialized ``data`` without the fields this fieldset leaves out.
+
+        Lists are transparent: their items are pruned at the list's own path.
+        """
+
+        if isinstance(data, dict):
+            return {key: self.prune(value, (*path, key)) for key, value in data.items() if self.wants((*path, key))}
+        if isinstance(data, list):
+            return [self.prune(item, path) for item in data]
+        return data
+
+
+def wants(fieldset: Fieldset | None, *paths: Path) -> bool:
+    """Return whether any of ``paths`` is requested; everything is without a fieldset."""
+
+    return fieldset is None or fieldset.wants_any(*paths)
+
+
+def compact_bundle(bundle: dict[str, Any]) -> dict[str, Any]:
+    """Replace each recap's nested title and user by references.
+
+    A recap's ``title`` becomes the title ID, which the bundle already holds
+    at the top level, and ``user`` becomes the user's email, with each distinct
+    user listed once under ``users``. Objects without their key field (pruned
+    by a fieldset) are left nested.
+    """
+
+    users: dict[str, Any] = {}
+
+    def reference(recap: dict[str, Any] | None) -> dict[str, Any] | None:
+        if recap is None:
+            return None
+        recap = dict(recap)
+        title = recap.get("title")
+        if isinstance(title, dict) and "id" in title:
+            recap["title"] = title["id"]
+        user = recap.get("user")
+        if isinstance(user, dict) and "email" in user:
+            users[user["email"]] = user
+            recap["user"] = user["email"]
+        return recap
+
+    compact = dict(bundle)
+    if "top_recap" in bundle:
+        compact["top_recap"] = reference(bundle["top_recap"])
+    if "other_recaps" in bundle:
+        compact["other_recaps"] = [reference(recap) for recap in bundle["other_recaps"]]
+    if users:
+        compact["users"] = users
+    return compact
+
+
+def _parse_paths(params: Mapping[str, str], name: str) -> frozenset[Path] | None:
+    # An empty value selects nothing, the same as leaving the parameter out.
+    value = params.get(name)
+    if value is None:
+        return None
+    paths = set()
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        path = tuple(part.strip() for part in item.split("."))
+        if not all(path):
+            raise ValidationError({name: f"Invalid field path {item!r}."})
+        paths.add(path)
+    return frozenset(paths) or None
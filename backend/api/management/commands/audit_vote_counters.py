@@ -0,0 +1,37 @@
+from api.management.periodic import PeriodicCommand
+from api.services.vote_audit import BATCH_SIZE, SETTLE_SECONDS, VoteCounterAuditor
+
+# Drifted recaps listed individually per run; the rest are only counted.
+MAX_LISTED = 20
+
+
+class Command(PeriodicCommand):
+    help = "Check recaps whose votes changed since the last run and repair counter drift."
+    every_action = "auditing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Journal rows per transaction.")
+        parser.add_argument(
+            "--settle", type=float, default=SETTLE_SECONDS, help="Skip changes younger than N seconds."
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it.")
+        super().add_arguments(parser)
+
+    def run_once(self, **options):
+        report = VoteCounterAuditor.run(
+            batch_size=options["batch_size"], settle=options["settle"], repair=not options["dry_run"]
+        )
+        for drift in report.drifted[:MAX_LISTED]:
+            self.stdout.write(
+                f"  recap {drift.recap_id}: stored {drift.stored} != votes {drift.actual}"
+                " (score, upvotes, downvotes)"
+            )
+        if len(report.drifted) > MAX_LISTED:
+            self.stdout.write(f"  … and {len(report.drifted) - MAX_LISTED} more")
+        verb = "found" if options["dry_run"] else "repaired"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {report.checked} recaps up to change {report.watermark}; "
+                f"{verb} {len(report.drifted)} drifted."
+            )
+        )
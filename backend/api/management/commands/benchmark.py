@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import SUITES
+
+
+class Command(BaseCommand):
+    help = "Run an API performance benchmark suite against the configured database."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest="suite", required=True, title="suites")
+        for name, suite in SUITES.items():
+            subparser = subparsers.add_parser(name, help=(suite.__doc__ or "").strip())
+            suite.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        suite = SUITES[options.pop("suite")]
+        suite.run(self, **options)
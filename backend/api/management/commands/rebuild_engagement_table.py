@@ -0,0 +1,16 @@
+from api.management.periodic import PeriodicCommand
+from api.services.engagement import EngagementSampler
+
+
+class Command(PeriodicCommand):
+    help = "Rebuild the alias table used for engagement-weighted random titles."
+    every_action = "rebuilding"
+
+    def run_once(self, **options):
+        report = EngagementSampler.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Weighted {report.titles} titles; rebuilt {len(report.rebuilt)} buckets, "
+                f"kept {len(report.reused)} unchanged."
+            )
+        )
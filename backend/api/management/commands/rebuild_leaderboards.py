@@ -0,0 +1,11 @@
+from api.management.periodic import PeriodicCommand
+from api.services.leaderboards import Leaderboards
+
+
+class Command(PeriodicCommand):
+    help = "Recompute the per-category top recap leaderboards from recap scores."
+    every_action = "rebuilding"
+
+    def run_once(self, **options):
+        entries = Leaderboards.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt leaderboards with {entries} entries."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services.sampler import TitleSampler
+
+
+class Command(BaseCommand):
+    help = "Rebuild the title slot index used by the random title sampler, dropping tombstones (open decks end)."
+
+    def handle(self, *args, **options):
+        created = TitleSampler.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt title index with {created} slots."))
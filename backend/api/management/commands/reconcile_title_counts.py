@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.services.catalog import CategoryCounts
+
+
+class Command(BaseCommand):
+    help = "Recount titles per category and repair the maintained counters if they drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it.")
+
+    def handle(self, *args, **options):
+        drifted = CategoryCounts.reconcile(repair=not options["dry_run"])
+        for category, (stored, actual) in drifted.items():
+            self.stdout.write(f"  {category}: stored {stored} != titles {actual}")
+        verb = "found" if options["dry_run"] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Recounted titles per category; {verb} {len(drifted)} drifted."))
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api.services.vote_metrics import CHUNK_SIZE
+from api.services.votes import VoteService
+
+# Seconds between progress lines.
+PROGRESS_INTERVAL = 2.0
+
+
+class Command(BaseCommand):
+    help = "Recompute recap score/upvote/downvote counters from votes."
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument("--ids", type=int, nargs="+", help="Only refresh these recap IDs.")
+        target.add_argument(
+            "--since",
+            help="Only refresh recaps created, or whose votes changed, since this ISO date or datetime.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Recaps per statement.")
+        parser.add_argument("--workers", type=int, default=1, help="Key ranges refreshed in parallel.")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue the last interrupted run with the same --since filter.",
+        )
+
+    def handle(self, *args, **options):
+        if options["ids"] and options["resume"]:
+            raise CommandError("--ids runs keep no checkpoints, so there is nothing to --resume.")
+        recaps = options["ids"] or None
+        since = self._parse_since(options["since"]) if options["since"] else None
+
+        started = time.monotonic()
+        last_report = started
+
+        def progress(totals):
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                self.stdout.write(f"{totals.processed} recaps checked, {totals.corrected} corrected…")
+
+        totals = VoteService.refresh_vote_metrics(
+            recaps,
+            since=since,
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            resume=options["resume"],
+            progress=progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {totals.processed} recaps and corrected {totals.corrected} "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
+
+    def _parse_since(self, value):
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"--since must be an ISO date or datetime, got {value!r}.")
+            moment = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
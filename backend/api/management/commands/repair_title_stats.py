@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.services.title_stats import BATCH_SIZE, TitleStats
+
+# Drifted titles listed individually; the rest are only counted.
+MAX_LISTED = 20
+
+
+class Command(BaseCommand):
+    help = "Check every title's recap count and top recap against its recaps and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Titles per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it.")
+
+    def handle(self, *args, **options):
+        report = TitleStats.repair(batch_size=options["batch_size"], dry_run=options["dry_run"])
+        for drift in report.drifted[:MAX_LISTED]:
+            self.stdout.write(
+                f"  title {drift.title_id}: stored {drift.stored} != recaps {drift.actual} (recap count, top recap)"
+            )
+        if len(report.drifted) > MAX_LISTED:
+            self.stdout.write(f"  … and {len(report.drifted) - MAX_LISTED} more")
+        verb = "found" if options["dry_run"] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Checked {report.checked} titles; {verb} {len(report.drifted)} drifted."))
@@ -0,0 +1,15 @@
+from api.management.periodic import PeriodicCommand
+from api.services.counter_shards import ROLLUP_BATCH_SIZE, ShardedVoteCounters
+
+
+class Command(PeriodicCommand):
+    help = "Fold sharded vote counters into recap scores (used with VOTE_COUNTER_MODE=sharded)."
+    every_action = "rolling up"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=ROLLUP_BATCH_SIZE, help="Recaps per transaction.")
+        super().add_arguments(parser)
+
+    def run_once(self, **options):
+        folded = ShardedVoteCounters.rollup(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up counters for {folded} recaps."))
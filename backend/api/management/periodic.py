@@ -0,0 +1,31 @@
+"""Base class for maintenance commands that can keep running on an interval."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class PeriodicCommand(BaseCommand):
+    """Run ``run_once`` a single time, or every N seconds with ``--every N``.
+
+    Subclasses implement ``run_once`` and set ``every_action`` to the verb used
+    in the ``--every`` help text. Subclasses with arguments of their own call
+    ``super().add_arguments(parser)``.
+    """
+
+    every_action = "running"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every", type=float, default=0, help=f"Keep running, {self.every_action} every N seconds (0 runs once)."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(**options)
+            if options["every"] <= 0:
+                return
+            time.sleep(options["every"])
+
+    def run_once(self, **options):
+        raise NotImplementedError("Subclasses of PeriodicCommand must provide a run_once() method.")
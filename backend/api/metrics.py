@@ -0,0 +1,42 @@
+"""Lightweight operational counters stored in the default cache.
+
+Counters live in Django's cache so that workers sharing a cache backend also
+share totals; with the local-memory backend each process counts on its own.
+"""
+
+from __future__ import annotations
+
+from django.core.cache import caches
+
+METRICS_CACHE_ALIAS = "default"
+KEY_PREFIX = "metrics:"
+
+COUNTERS: list[str] = []
+
+
+def register(*names: str) -> None:
+    """Declare counters so they appear in ``snapshot()`` even before first use."""
+
+    for name in names:
+        if name not in COUNTERS:
+            COUNTERS.append(name)
+
+
+def incr(name: str, delta: int = 1) -> None:
+    cache = caches[METRICS_CACHE_ALIAS]
+    key = KEY_PREFIX + name
+    # add() is a no-op when the key exists, so concurrent first increments are safe.
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:  # pragma: no cover - evicted between add() and incr()
+        cache.set(key, delta, timeout=None)
+
+
+def snapshot() -> dict[str, int]:
+    values = caches[METRICS_CACHE_ALIAS].get_many([KEY_PREFIX + name for name in COUNTERS])
+    return {name: values.get(KEY_PREFIX + name, 0) for name in COUNTERS}
+
+
+def reset() -> None:
+    caches[METRICS_CACHE_ALIAS].delete_many([KEY_PREFIX + name for name in COUNTERS])
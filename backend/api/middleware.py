@@ -0,0 +1,128 @@
+"""Compression of API JSON responses."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+API_PREFIX = "/api/"
+CACHE_ALIAS = "compressed"
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Preferred first when the client accepts several equally.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+ACCEPT_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*")
+
+metrics.register(
+    "compression.responses",
+    "compression.bytes_in",
+    "compression.bytes_out",
+    "compression.cpu_us",
+    "compression.cache_hits",
+    "compression.below_threshold",
+)
+
+
+class CompressionMiddleware:
+    """Compress ``/api/`` JSON responses for clients that accept gzip (or Brotli, when installed).
+
+    Bodies shorter than ``API_COMPRESSION_MIN_SIZE`` bytes are sent as they
+    are, since compression would cost more than it saves. Responses marked
+    ``Cache-Control: public`` are the same for every caller (shared summary
+    bundles), so their compressed bytes are cached under a digest of the body
+    and a repeated payload is compressed once. Bytes in and out, CPU time
+    spent compressing and cache hits are counted in ``metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not request.path.startswith(API_PREFIX)
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith("application/json")
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+        content = response.content
+        if len(content) < settings.API_COMPRESSION_MIN_SIZE:
+            metrics.incr("compression.below_threshold")
+            return response
+
+        compressed = self._compressed(content, encoding, shared="public" in response.get("Cache-Control", ""))
+        if len(compressed) >= len(content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The body changed, so a strong validator no longer matches it byte for byte.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        metrics.incr("compression.responses")
+        metrics.incr("compression.bytes_in", len(content))
+        metrics.incr("compression.bytes_out", len(compressed))
+        return response
+
+    @staticmethod
+    def _compressed(content: bytes, encoding: str, shared: bool) -> bytes:
+        cache = caches[CACHE_ALIAS]
+        key = f"compressed:{encoding}:{hashlib.blake2b(content, digest_size=20).hexdigest()}" if shared else None
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                metrics.incr("compression.cache_hits")
+                return cached
+        started = time.thread_time_ns()
+        compressed = compress(content, encoding)
+        metrics.incr("compression.cpu_us", (time.thread_time_ns() - started) // 1000)
+        if key is not None:
+            cache.set(key, compressed)
+        return compressed
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Return the supported encoding ``accept_encoding`` ranks highest, or ``None`` for identity."""
+
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        match = ACCEPT_ENCODING_RE.fullmatch(part)
+        if not match:
+            continue
+        try:
+            weights[match.group(1).lower()] = float(match.group(2) or 1)
+        except ValueError:
+            continue
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    # A fixed mtime keeps the output identical for identical bodies.
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_slots(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    TitleSlot = apps.get_model('api', 'TitleSlot')
+    positions = {'': 0}
+    slots = []
+    for title_id, category in Title.objects.order_by('pk').values_list('pk', 'category'):
+        for bucket in ('', category):
+            position = positions.get(bucket, 0)
+            positions[bucket] = position + 1
+            slots.append(TitleSlot(bucket=bucket, position=position, title_id=title_id))
+    TitleSlot.objects.bulk_create(slots, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_alter_recap_title_alter_recap_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(blank=True, max_length=20)),
+                ('position', models.PositiveIntegerField()),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='api.title')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'position'), name='unique_title_slot_position'), models.UniqueConstraint(fields=('bucket', 'title'), name='unique_title_slot_title')],
+            },
+        ),
+        migrations.RunPython(populate_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_titleslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecapCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('score', models.IntegerField(default=0)),
+                ('upvotes', models.IntegerField(default=0)),
+                ('downvotes', models.IntegerField(default=0)),
+                ('recap', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='api.recap')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('recap', 'slot'), name='unique_recap_counter_shard')],
+            },
+        ),
+    ]
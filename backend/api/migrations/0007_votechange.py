@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Journal every vote change in the statement that makes it, including raw SQL
+# and bulk writes, so the vote path pays no extra round trip. SQLite drops
+# triggers when Django rebuilds a table, so a later migration that alters
+# api_vote that way must create them again.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER api_vote_journal_insert AFTER INSERT ON api_vote
+    BEGIN
+        INSERT INTO api_votechange (recap_id, changed_at)
+        VALUES (NEW.recap_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+    """
+    CREATE TRIGGER api_vote_journal_update AFTER UPDATE OF value ON api_vote
+    WHEN OLD.value <> NEW.value
+    BEGIN
+        INSERT INTO api_votechange (recap_id, changed_at)
+        VALUES (NEW.recap_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+    """
+    CREATE TRIGGER api_vote_journal_delete AFTER DELETE ON api_vote
+    BEGIN
+        INSERT INTO api_votechange (recap_id, changed_at)
+        VALUES (OLD.recap_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_vote_journal_insert",
+    "DROP TRIGGER IF EXISTS api_vote_journal_update",
+    "DROP TRIGGER IF EXISTS api_vote_journal_delete",
+]
+
+POSTGRES_TRIGGERS = [
+    """
+    CREATE FUNCTION api_journal_vote_change() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO api_votechange (recap_id, changed_at)
+        VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.recap_id ELSE NEW.recap_id END, now());
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_vote_journal_write AFTER INSERT OR DELETE ON api_vote
+    FOR EACH ROW EXECUTE FUNCTION api_journal_vote_change()
+    """,
+    """
+    CREATE TRIGGER api_vote_journal_update AFTER UPDATE OF value ON api_vote
+    FOR EACH ROW WHEN (OLD.value IS DISTINCT FROM NEW.value) EXECUTE FUNCTION api_journal_vote_change()
+    """,
+]
+POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS api_vote_journal_write ON api_vote",
+    "DROP TRIGGER IF EXISTS api_vote_journal_update ON api_vote",
+    "DROP FUNCTION IF EXISTS api_journal_vote_change()",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        # No params, so the ``%`` in strftime() formats is passed through untouched.
+        schema_editor.execute(statement, params=None)
+
+
+def create_triggers(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_TRIGGERS, 'postgresql': POSTGRES_TRIGGERS})
+
+
+def drop_triggers(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recap_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_votechange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recap',
+            index=models.Index(fields=['title', '-score', '-created_at'], name='recap_title_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['user', 'recap', 'value'], name='vote_user_recap_value_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='recap',
+            name='recap_title_rank_idx',
+        ),
+        migrations.AddIndex(
+            model_name='recap',
+            index=models.Index(fields=['title', '-score', '-created_at', '-id'], name='recap_title_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recap',
+            index=models.Index(fields=['title', '-created_at', '-id'], name='recap_title_new_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_category_counts(apps, schema_editor):
+    Title = apps.get_model('api', 'Title')
+    TitleCategoryCount = apps.get_model('api', 'TitleCategoryCount')
+    counts = {category: 0 for category in ('book', 'movie', 'tvseries', 'tvshow', 'podcast', 'speech', 'other')}
+    for row in Title.objects.order_by().values('category').annotate(total=models.Count('id')):
+        counts[row['category']] = row['total']
+    TitleCategoryCount.objects.bulk_create(
+        TitleCategoryCount(category=category, count=count) for category, count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_recap_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleCategoryCount',
+            fields=[
+                ('category', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_category_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name', 'id'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name', 'id'], name='title_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='title_category_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-created_at', '-id'], name='title_new_idx'),
+        ),
+        migrations.RunPython(populate_category_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_title_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(blank=True, max_length=20)),
+                ('window', models.CharField(choices=[('week', 'This week'), ('all', 'All time')], max_length=10)),
+                ('score', models.IntegerField()),
+                ('recap_created_at', models.DateTimeField()),
+                ('recap', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='api.recap')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'window', '-score', '-recap_created_at', '-recap'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('board', 'window', 'recap'), name='unique_leaderboard_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:43
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+# Substring and fuzzy title search. SQLite gets an FTS5 trigram index over
+# api_title (external content, so titles are not stored twice) kept in step by
+# triggers; SQLite drops those when Django rebuilds api_title, so a later
+# migration that alters the table that way must create them again. Postgres
+# gets pg_trgm GIN indexes, which serve ILIKE '%...%' and similarity operators.
+SQLITE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE api_title_search USING fts5(
+        name, author, content='api_title', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER api_title_search_insert AFTER INSERT ON api_title
+    BEGIN
+        INSERT INTO api_title_search (rowid, name, author) VALUES (NEW.id, NEW.name, NEW.author);
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_search_delete AFTER DELETE ON api_title
+    BEGIN
+        INSERT INTO api_title_search (api_title_search, rowid, name, author)
+        VALUES ('delete', OLD.id, OLD.name, OLD.author);
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_search_update AFTER UPDATE OF name, author ON api_title
+    BEGIN
+        INSERT INTO api_title_search (api_title_search, rowid, name, author)
+        VALUES ('delete', OLD.id, OLD.name, OLD.author);
+        INSERT INTO api_title_search (rowid, name, author) VALUES (NEW.id, NEW.name, NEW.author);
+    END
+    """,
+    "INSERT INTO api_title_search (api_title_search) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_title_search_insert",
+    "DROP TRIGGER IF EXISTS api_title_search_delete",
+    "DROP TRIGGER IF EXISTS api_title_search_update",
+    "DROP TABLE IF EXISTS api_title_search",
+]
+
+POSTGRES_SEARCH = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX title_name_trgm_idx ON api_title USING gin (name gin_trgm_ops)",
+    "CREATE INDEX title_author_trgm_idx ON api_title USING gin (author gin_trgm_ops)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS title_name_trgm_idx",
+    "DROP INDEX IF EXISTS title_author_trgm_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_SEARCH, 'postgresql': POSTGRES_SEARCH})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='title_name_lower_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
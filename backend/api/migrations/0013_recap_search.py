@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations
+
+# Full-text search over recap text. SQLite gets an external-content FTS5 index
+# with Porter stemming, kept in step by triggers that fire only when the text
+# changes (vote counter updates leave it alone); SQLite drops those triggers
+# when Django rebuilds api_recap, so a later migration that alters the table
+# that way must create them again. Postgres gets a stored tsvector column,
+# which the database recomputes on every write, and a GIN index over it. The
+# column is not on the model: only the search service's raw SQL reads it.
+SQLITE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE api_recap_search USING fts5(
+        text, content='api_recap', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER api_recap_search_insert AFTER INSERT ON api_recap
+    BEGIN
+        INSERT INTO api_recap_search (rowid, text) VALUES (NEW.id, NEW.text);
+    END
+    """,
+    """
+    CREATE TRIGGER api_recap_search_delete AFTER DELETE ON api_recap
+    BEGIN
+        INSERT INTO api_recap_search (api_recap_search, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+    END
+    """,
+    """
+    CREATE TRIGGER api_recap_search_update AFTER UPDATE OF text ON api_recap
+    BEGIN
+        INSERT INTO api_recap_search (api_recap_search, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+        INSERT INTO api_recap_search (rowid, text) VALUES (NEW.id, NEW.text);
+    END
+    """,
+    "INSERT INTO api_recap_search (api_recap_search) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_recap_search_insert",
+    "DROP TRIGGER IF EXISTS api_recap_search_delete",
+    "DROP TRIGGER IF EXISTS api_recap_search_update",
+    "DROP TABLE IF EXISTS api_recap_search",
+]
+
+POSTGRES_SEARCH = [
+    """
+    ALTER TABLE api_recap ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', text)) STORED
+    """,
+    "CREATE INDEX recap_search_vector_idx ON api_recap USING gin (search_vector)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS recap_search_vector_idx",
+    "ALTER TABLE api_recap DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_SEARCH, 'postgresql': POSTGRES_SEARCH})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
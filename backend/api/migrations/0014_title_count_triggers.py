@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+# Keep api_titlecategorycount in step with api_title in the statement that
+# writes the title, so the count commits or rolls back with it and bulk or raw
+# writes are counted too. SQLite drops triggers when Django rebuilds a table,
+# so a later migration that alters api_title that way must create these (and
+# the api_title_search triggers) again.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER api_title_count_insert AFTER INSERT ON api_title
+    BEGIN
+        INSERT INTO api_titlecategorycount (category, count) VALUES (NEW.category, 1)
+        ON CONFLICT (category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_count_delete AFTER DELETE ON api_title
+    BEGIN
+        INSERT INTO api_titlecategorycount (category, count) VALUES (OLD.category, -1)
+        ON CONFLICT (category) DO UPDATE SET count = count - 1;
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_count_update AFTER UPDATE OF category ON api_title
+    WHEN OLD.category <> NEW.category
+    BEGIN
+        INSERT INTO api_titlecategorycount (category, count) VALUES (OLD.category, -1)
+        ON CONFLICT (category) DO UPDATE SET count = count - 1;
+        INSERT INTO api_titlecategorycount (category, count) VALUES (NEW.category, 1)
+        ON CONFLICT (category) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_title_count_insert",
+    "DROP TRIGGER IF EXISTS api_title_count_delete",
+    "DROP TRIGGER IF EXISTS api_title_count_update",
+]
+
+POSTGRES_TRIGGERS = [
+    """
+    CREATE FUNCTION api_count_title_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            INSERT INTO api_titlecategorycount (category, count) VALUES (OLD.category, -1)
+            ON CONFLICT (category) DO UPDATE SET count = api_titlecategorycount.count - 1;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO api_titlecategorycount (category, count) VALUES (NEW.category, 1)
+            ON CONFLICT (category) DO UPDATE SET count = api_titlecategorycount.count + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_title_count_write AFTER INSERT OR DELETE ON api_title
+    FOR EACH ROW EXECUTE FUNCTION api_count_title_change()
+    """,
+    """
+    CREATE TRIGGER api_title_count_update AFTER UPDATE OF category ON api_title
+    FOR EACH ROW WHEN (OLD.category IS DISTINCT FROM NEW.category) EXECUTE FUNCTION api_count_title_change()
+    """,
+]
+POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS api_title_count_write ON api_title",
+    "DROP TRIGGER IF EXISTS api_title_count_update ON api_title",
+    "DROP FUNCTION IF EXISTS api_count_title_change()",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def recount(apps, schema_editor):
+    # Counts kept by the former signal handlers missed bulk writes; start exact.
+    Title = apps.get_model('api', 'Title')
+    TitleCategoryCount = apps.get_model('api', 'TitleCategoryCount')
+    counts = dict.fromkeys(TitleCategoryCount.objects.values_list('category', flat=True), 0)
+    for row in Title.objects.order_by().values('category').annotate(total=models.Count('id')):
+        counts[row['category']] = row['total']
+    TitleCategoryCount.objects.all().delete()
+    TitleCategoryCount.objects.bulk_create(
+        TitleCategoryCount(category=category, count=count) for category, count in counts.items()
+    )
+
+
+def create_triggers(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_TRIGGERS, 'postgresql': POSTGRES_TRIGGERS})
+    recount(apps, schema_editor)
+
+
+def drop_triggers(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_recap_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,209 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A title's top recap, straight off recap_title_rank_idx.
+TOP_RECAP = """
+    (SELECT r.id FROM api_recap r WHERE r.title_id = {title}
+     ORDER BY r.score DESC, r.created_at DESC, r.id DESC LIMIT 1)
+"""
+
+# Keep api_title.recap_count and top_recap_id in step with api_recap in the
+# statement that writes the recap: creates, deletes, score changes from any
+# counter mode, bulk writes and repairs alike. A score change rewrites the
+# title row only when its top recap actually changes.
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER api_recap_title_stats_insert AFTER INSERT ON api_recap
+    BEGIN
+        UPDATE api_title SET recap_count = recap_count + 1, top_recap_id = {TOP_RECAP.format(title='NEW.title_id')}
+        WHERE id = NEW.title_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_recap_title_stats_delete AFTER DELETE ON api_recap
+    BEGIN
+        UPDATE api_title SET recap_count = recap_count - 1, top_recap_id = {TOP_RECAP.format(title='OLD.title_id')}
+        WHERE id = OLD.title_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_recap_title_stats_move AFTER UPDATE OF title_id ON api_recap
+    WHEN OLD.title_id <> NEW.title_id
+    BEGIN
+        UPDATE api_title SET recap_count = recap_count - 1, top_recap_id = {TOP_RECAP.format(title='OLD.title_id')}
+        WHERE id = OLD.title_id;
+        UPDATE api_title SET recap_count = recap_count + 1, top_recap_id = {TOP_RECAP.format(title='NEW.title_id')}
+        WHERE id = NEW.title_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER api_recap_title_stats_score AFTER UPDATE OF score ON api_recap
+    WHEN OLD.score <> NEW.score AND OLD.title_id = NEW.title_id
+    BEGIN
+        UPDATE api_title SET top_recap_id = {TOP_RECAP.format(title='NEW.title_id')}
+        WHERE id = NEW.title_id AND top_recap_id IS NOT {TOP_RECAP.format(title='NEW.title_id')};
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS api_recap_title_stats_insert",
+    "DROP TRIGGER IF EXISTS api_recap_title_stats_delete",
+    "DROP TRIGGER IF EXISTS api_recap_title_stats_move",
+    "DROP TRIGGER IF EXISTS api_recap_title_stats_score",
+]
+
+# Adding recap_count makes SQLite rebuild api_title, which drops its triggers
+# from migrations 0012 and 0014; create them again as they were.
+SQLITE_TITLE_TRIGGERS = [
+    """
+    CREATE TRIGGER api_title_search_insert AFTER INSERT ON api_title
+    BEGIN
+        INSERT INTO api_title_search (rowid, name, author) VALUES (NEW.id, NEW.name, NEW.author);
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_search_delete AFTER DELETE ON api_title
+    BEGIN
+        INSERT INTO api_title_search (api_title_search, rowid, name, author)
+        VALUES ('delete', OLD.id, OLD.name, OLD.author);
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_search_update AFTER UPDATE OF name, author ON api_title
+    BEGIN
+        INSERT INTO api_title_search (api_title_search, rowid, name, author)
+        VALUES ('delete', OLD.id, OLD.name, OLD.author);
+        INSERT INTO api_title_search (rowid, name, author) VALUES (NEW.id, NEW.name, NEW.author);
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_count_insert AFTER INSERT ON api_title
+    BEGIN
+        INSERT INTO api_titlecategorycount (category, count) VALUES (NEW.category, 1)
+        ON CONFLICT (category) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_count_delete AFTER DELETE ON api_title
+    BEGIN
+        INSERT INTO api_titlecategorycount (category, count) VALUES (OLD.category, -1)
+        ON CONFLICT (category) DO UPDATE SET count = count - 1;
+    END
+    """,
+    """
+    CREATE TRIGGER api_title_count_update AFTER UPDATE OF category ON api_title
+    WHEN OLD.category <> NEW.category
+    BEGIN
+        INSERT INTO api_titlecategorycount (category, count) VALUES (OLD.category, -1)
+        ON CONFLICT (category) DO UPDATE SET count = count - 1;
+        INSERT INTO api_titlecategorycount (category, count) VALUES (NEW.category, 1)
+        ON CONFLICT (category) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
+
+POSTGRES_TRIGGERS = [
+    f"""
+    CREATE FUNCTION api_top_recap(title bigint) RETURNS bigint AS $$
+        SELECT {TOP_RECAP.format(title='title')}
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE FUNCTION api_track_title_recaps() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.title_id IS DISTINCT FROM NEW.title_id) THEN
+            UPDATE api_title SET recap_count = recap_count - 1, top_recap_id = api_top_recap(OLD.title_id)
+            WHERE id = OLD.title_id;
+        END IF;
+        IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND OLD.title_id IS DISTINCT FROM NEW.title_id) THEN
+            UPDATE api_title SET recap_count = recap_count + 1, top_recap_id = api_top_recap(NEW.title_id)
+            WHERE id = NEW.title_id;
+        ELSIF TG_OP = 'UPDATE' THEN
+            UPDATE api_title SET top_recap_id = api_top_recap(NEW.title_id)
+            WHERE id = NEW.title_id AND top_recap_id IS DISTINCT FROM api_top_recap(NEW.title_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER api_recap_title_stats_write AFTER INSERT OR DELETE ON api_recap
+    FOR EACH ROW EXECUTE FUNCTION api_track_title_recaps()
+    """,
+    """
+    CREATE TRIGGER api_recap_title_stats_update AFTER UPDATE OF score, title_id ON api_recap
+    FOR EACH ROW WHEN (OLD.score IS DISTINCT FROM NEW.score OR OLD.title_id IS DISTINCT FROM NEW.title_id)
+    EXECUTE FUNCTION api_track_title_recaps()
+    """,
+]
+POSTGRES_DROP = [
+    "DROP TRIGGER IF EXISTS api_recap_title_stats_write ON api_recap",
+    "DROP TRIGGER IF EXISTS api_recap_title_stats_update ON api_recap",
+    "DROP FUNCTION IF EXISTS api_track_title_recaps()",
+    "DROP FUNCTION IF EXISTS api_top_recap(bigint)",
+]
+
+BACKFILL = [
+    f"""
+    UPDATE api_title SET
+        recap_count = (SELECT COUNT(*) FROM api_recap r WHERE r.title_id = api_title.id),
+        top_recap_id = {TOP_RECAP.format(title='api_title.id')}
+    """,
+    # Random picks among titles with recaps: their slots in the '+'-prefixed buckets.
+    """
+    INSERT INTO api_titleslot (bucket, position, title_id)
+    SELECT '+', ROW_NUMBER() OVER (ORDER BY id) - 1, id FROM api_title WHERE recap_count > 0
+    """,
+    """
+    INSERT INTO api_titleslot (bucket, position, title_id)
+    SELECT '+' || category, ROW_NUMBER() OVER (PARTITION BY category ORDER BY id) - 1, id
+    FROM api_title WHERE recap_count > 0
+    """,
+]
+UNFILL = ["DELETE FROM api_titleslot WHERE bucket LIKE '+%'"]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def create_triggers(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_TITLE_TRIGGERS + SQLITE_TRIGGERS, 'postgresql': POSTGRES_TRIGGERS})
+    for statement in BACKFILL:
+        schema_editor.execute(statement, params=None)
+
+
+def restore_title_triggers(apps, schema_editor):
+    # Reversing the AddFields rebuilds api_title on SQLite once more.
+    _run(schema_editor, {'sqlite': SQLITE_TITLE_TRIGGERS})
+
+
+def drop_triggers(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP})
+    for statement in UNFILL:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_title_count_triggers'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_title_triggers),
+        migrations.AddField(
+            model_name='title',
+            name='recap_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='top_recap',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.recap'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_title_recap_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='titleslot',
+            name='title',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='slots', to='api.title'),
+        ),
+    ]
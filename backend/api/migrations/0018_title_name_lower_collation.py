@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:12
+
+from django.db import migrations
+
+# Name-prefix search scans lower(name) from the prefix up to the prefix plus
+# U+10FFFF, which only brackets every name starting with the prefix in code
+# point order. SQLite compares text that way already. Postgres compares with
+# the database collation, under which that range can drop matches and an
+# index in that collation cannot serve the scan, so title_name_lower_idx is
+# rebuilt there in the "C" collation that TitleSearch compares in. The name
+# stays the same, so later migrations of the model index still find it.
+POSTGRES_C_COLLATION = [
+    "DROP INDEX IF EXISTS title_name_lower_idx",
+    'CREATE INDEX title_name_lower_idx ON api_title ((lower(name)) COLLATE "C", id)',
+]
+POSTGRES_DEFAULT_COLLATION = [
+    "DROP INDEX IF EXISTS title_name_lower_idx",
+    "CREATE INDEX title_name_lower_idx ON api_title ((lower(name)), id)",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def use_c_collation(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_C_COLLATION})
+
+
+def use_default_collation(apps, schema_editor):
+    _run(schema_editor, {'postgresql': POSTGRES_DEFAULT_COLLATION})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_checkpoint_params'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_c_collation, use_default_collation),
+    ]
@@ -1,5 +1,8 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
 
 
 class TitleCategory(models.TextChoices):
@@ -13,6 +16,9 @@ class TitleCategory(models.TextChoices):
 
 
 class Title(models.Model):
+    # Written only by the database; saving a title must not put back a stale copy.
+    MAINTAINED_FIELDS = ("recap_count", "top_recap")
+
     name = models.CharField(max_length=255)
     category = models.CharField(max_length=20, choices=TitleCategory.choices)
     author = models.CharField(max_length=255, blank=True)
@@ -24,13 +30,38 @@ class Title(models.Model):
         blank=True,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by triggers on ``api_recap`` (migration 0015); ``repair_title_stats`` fixes drift.
+    recap_count = models.PositiveIntegerField(default=0, editable=False)
+    top_recap = models.ForeignKey(
+        "Recap", on_delete=models.SET_NULL, related_name="+", null=True, blank=True, editable=False
+    )
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Category filters and catalog pages in ``Meta.ordering`` order; ``id`` breaks
+            # ties so keyset pages can seek straight to their first row.
+            models.Index(fields=["category", "name", "id"], name="title_category_name_idx"),
+            models.Index(fields=["name", "id"], name="title_name_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="title_category_new_idx"),
+            models.Index(fields=["-created_at", "-id"], name="title_new_idx"),
+            # Case-insensitive name prefixes for search; substrings use the trigram index.
+            # Postgres builds it in the "C" collation (migration 0018) to match the range scan.
+            models.Index(Lower("name"), F("id"), name="title_name_lower_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Recap(models.Model):
     title = models.ForeignKey(Title, related_name="recaps", on_delete=models.CASCADE)
@@ -47,6 +78,12 @@ class Recap(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["title", "user"], name="unique_title_user_recap"),
         ]
+        indexes = [
+            # Recaps of a title in ranking order: top-recap selection and per-title listings.
+            # ``id`` breaks ties so keyset pages can seek straight to their first row.
+            models.Index(fields=["title", "-score", "-created_at", "-id"], name="recap_title_rank_idx"),
+            models.Index(fields=["title", "-created_at", "-id"], name="recap_title_new_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"{self.user}: {self.text[:50]}"
@@ -63,6 +100,142 @@ class Vote(models.Model):
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=["recap", "user"], name="unique_recap_vote")]
+        indexes = [
+            # A user's votes on a batch of recaps, answered from the index alone.
+            models.Index(fields=["user", "recap", "value"], name="vote_user_recap_value_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"{self.user} -> {self.recap_id} ({self.value})"
+
+
+class TitleSlot(models.Model):
+    """Dense position index of titles per category, used for constant-time random picks.
+
+    Each title owns one slot in its category bucket and one in the ``ALL`` bucket,
+    and, while it has recaps, one in each of their ``RECAPPED``-prefixed twins.
+    New slots are appended at the tail. A removal leaves a tombstone (a slot
+    without a title) rather than moving another title into the hole, so a
+    position never changes hands and open decks deal each title at most once.
+    ``TitleSampler.rebuild`` compacts the tombstones away.
+    """
+
+    ALL = ""
+    RECAPPED = "+"
+
+    bucket = models.CharField(max_length=20, blank=True)
+    position = models.PositiveIntegerField()
+    title = models.ForeignKey(Title, null=True, related_name="slots", on_delete=models.SET_NULL)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["bucket", "position"], name="unique_title_slot_position"),
+            models.UniqueConstraint(fields=["bucket", "title"], name="unique_title_slot_title"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.bucket or '*'}[{self.position}] -> {self.title_id}"
+
+
+class RecapCounterShard(models.Model):
+    """Pending counter deltas for a recap, spread over a few slot rows.
+
+    In ``sharded`` counter mode each vote increments a random slot instead of the
+    recap row, so concurrent voters rarely wait on the same row lock. The roll-up
+    folds the slots back into ``Recap`` and deletes them; a slot can therefore be
+    negative, e.g. after an upvote is withdrawn.
+    """
+
+    recap = models.ForeignKey(Recap, related_name="counter_shards", on_delete=models.CASCADE)
+    slot = models.PositiveSmallIntegerField()
+    score = models.IntegerField(default=0)
+    upvotes = models.IntegerField(default=0)
+    downvotes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["recap", "slot"], name="unique_recap_counter_shard")]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.recap_id}#{self.slot} ({self.score:+d})"
+
+
+class Checkpoint(models.Model):
+    """Named resume position of a long-running maintenance job.
+
+    ``params`` records what the job was asked to do (such as the filter of a
+    partial run), so a resumed job only picks up work for the same request.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    params = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.name} @ {self.position}"
+
+
+class VoteChange(models.Model):
+    """Append-only journal of recaps whose votes or counters changed.
+
+    Rows are written by database triggers on the vote table (see migration
+    ``0007_votechange``) and by the ``Recap`` save signal when a save changes
+    the counters, and consumed by the counter auditor, which deletes each row
+    it has checked. Nothing else prunes the table, so deployments should run
+    ``audit_vote_counters --every N``. ``recap_id`` is a plain column rather
+    than a foreign key so the journal can outlive deleted recaps.
+    """
+
+    recap_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.recap_id} @ {self.changed_at:%Y-%m-%d %H:%M:%S}"
+
+
+class TitleCategoryCount(models.Model):
+    """Maintained number of titles per category, read instead of ``COUNT(*)``.
+
+    Kept in step by database triggers on ``api_title`` (migration 0014), in the
+    statement that writes the title, so bulk and raw writes are counted too.
+    ``manage.py reconcile_title_counts`` repairs any drift.
+    """
+
+    category = models.CharField(max_length=20, primary_key=True)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.category}: {self.count}"
+
+
+class LeaderboardEntry(models.Model):
+    """One recap on a precomputed top-recaps board for a category and time window.
+
+    Boards hold ``LEADERBOARD_SIZE`` recaps plus as many again in reserve, so a
+    recap that loses votes can be overtaken by one that was just off the board.
+    Votes keep entries current; ``rebuild_leaderboards`` recomputes them exactly.
+    """
+
+    ALL = ""
+    WEEK = "week"
+    ALL_TIME = "all"
+    WINDOWS = ((WEEK, "This week"), (ALL_TIME, "All time"))
+
+    board = models.CharField(max_length=20, blank=True)
+    window = models.CharField(max_length=10, choices=WINDOWS)
+    recap = models.ForeignKey(Recap, related_name="leaderboard_entries", on_delete=models.CASCADE)
+    score = models.IntegerField()
+    recap_created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["board", "window", "recap"], name="unique_leaderboard_entry"),
+        ]
+        indexes = [
+            models.Index(
+                fields=["board", "window", "-score", "-recap_created_at", "-recap"], name="leaderboard_rank_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.board or '*'}/{self.window}: {self.recap_id} ({self.score})"
@@ -0,0 +1,141 @@
+"""Keyset (seek) pagination for catalog and recap listings."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core import signing
+from django.db import connection
+from django.db.models import BooleanField, DateTimeField, IntegerField, Model, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .models import Recap, Title
+
+
+class KeysetPagination(BasePagination):
+    """Paginate by seeking past the last row of the previous page.
+
+    Pages cost the same however deep they are: the next page starts with an
+    index range seek on a row-value comparison instead of skipping an OFFSET.
+    The cursor is a signed copy of the last row's ordering values.
+
+    Subclasses name their ``orderings``; each one sorts every column in the same
+    direction (``-`` prefix for descending) and ends with the primary key, so
+    ``(columns) < (last row)`` (or ``>``) selects exactly the rows after it.
+    """
+
+    model: type[Model]
+    orderings: dict[str, tuple[str, ...]]
+    default_ordering: str
+    cursor_salt: str
+
+    page_size = 20
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    page_size_query_param = "page_size"
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list[Model]:
+        self.request = request
+        self.ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if self.ordering not in self.orderings:
+            raise ValidationError({"ordering": f"Must be one of: {', '.join(self.orderings)}."})
+        order_by = self.orderings[self.ordering]
+        size = self._page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(order_by, self._decode(cursor, order_by)))
+        rows = list(queryset.order_by(*order_by)[: size + 1])
+        page = rows[:size]
+        self.next_cursor = self._encode(page[-1], order_by) if len(rows) > size else None
+        return page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self) -> str | None:
+        if self.next_cursor is None:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+        if self.ordering == self.default_ordering:
+            return remove_query_param(url, self.ordering_query_param)
+        return replace_query_param(url, self.ordering_query_param, self.ordering)
+
+    def _page_size(self, request) -> int:
+        value = request.query_params.get(self.page_size_query_param)
+        if value in (None, ""):
+            return self.page_size
+        try:
+            size = int(value)
+        except (TypeError, ValueError) as exc:
+            raise ValidationError({self.page_size_query_param: "Must be an integer."}) from exc
+        if not 1 <= size <= self.max_page_size:
+            raise ValidationError({self.page_size_query_param: f"Must be between 1 and {self.max_page_size}."})
+        return size
+
+    def _fields(self, order_by: tuple[str, ...]) -> list:
+        return [self.model._meta.get_field(name.lstrip("-")) for name in order_by]
+
+    def _encode(self, row: Model, order_by: tuple[str, ...]) -> str:
+        values = []
+        for field in self._fields(order_by):
+            value = getattr(row, field.attname)
+            values.append(value.isoformat() if isinstance(field, DateTimeField) else value)
+        return signing.dumps([self.ordering, *values], salt=self.cursor_salt, compress=True)
+
+    def _decode(self, cursor: str, order_by: tuple[str, ...]) -> list[Any]:
+        try:
+            ordering, *values = signing.loads(cursor, salt=self.cursor_salt)
+            if ordering != self.ordering or len(values) != len(order_by):
+                raise ValueError("Cursor belongs to another ordering.")
+            decoded = []
+            for field, value in zip(self._fields(order_by), values):
+                if isinstance(field, DateTimeField):
+                    moment = parse_datetime(value)
+                    if moment is None:
+                        raise ValueError("Malformed timestamp.")
+                    value = connection.ops.adapt_datetimefield_value(moment)
+                elif isinstance(field, IntegerField):
+                    value = int(value)
+                else:
+                    value = str(value)
+                decoded.append(value)
+            return decoded
+        except (signing.BadSignature, TypeError, ValueError) as exc:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."}) from exc
+
+    def _after(self, order_by: tuple[str, ...], values: list[Any]) -> RawSQL:
+        # Row values (SQLite >= 3.15, Postgres) become a single index range condition,
+        # unlike the equivalent chain of ORs.
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        columns = ", ".join(f"{table}.{quote(field.column)}" for field in self._fields(order_by))
+        operator = "<" if order_by[0].startswith("-") else ">"
+        placeholders = ", ".join(["%s"] * len(values))
+        return RawSQL(f"({columns}) {operator} ({placeholders})", values, output_field=BooleanField())
+
+
+class RecapKeysetPagination(KeysetPagination):
+    model = Recap
+    orderings = {
+        "top": ("-score", "-created_at", "-id"),
+        "new": ("-created_at", "-id"),
+    }
+    default_ordering = "top"
+    cursor_salt = "api.recap_pages"
+
+
+class TitleKeysetPagination(KeysetPagination):
+    model = Title
+    orderings = {
+        "name": ("name", "id"),
+        "new": ("-created_at", "-id"),
+    }
+    default_ordering = "name"
+    cursor_salt = "api.title_pages"
@@ -0,0 +1,37 @@
+"""JSON parser backed by orjson when it is installed, with DRF's parser as the fallback."""
+
+from __future__ import annotations
+
+import codecs
+from typing import Any
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+
+from .renderers import FastJSONRenderer, orjson, use_orjson
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` that decodes UTF-8 bodies with orjson in one call.
+
+    orjson rejects ``NaN`` and ``Infinity`` like the stock parser does with
+    ``STRICT_JSON``. Other charsets, and everything when orjson is
+    unavailable, use the stock parser.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type: str | None = None, parser_context: dict | None = None) -> Any:
+        if not use_orjson() or not self.strict or not _is_utf8(get_encoding(parser_context or {})):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
+
+
+def _is_utf8(encoding: str) -> bool:
+    try:
+        return codecs.lookup(encoding).name == "utf-8"
+    except LookupError:
+        return False
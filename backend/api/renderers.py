@@ -0,0 +1,70 @@
+"""JSON renderer backed by orjson, with DRF's renderer as the fallback when it cannot be imported."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSON_BACKENDS = ("auto", "orjson", "stdlib")
+
+# DRF escapes these so the output is also valid JavaScript; orjson does not.
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+def use_orjson() -> bool:
+    """Return whether the ``JSON_BACKEND`` setting selects orjson (``auto`` does when it is installed)."""
+
+    backend = getattr(settings, "JSON_BACKEND", "auto")
+    if backend not in JSON_BACKENDS:
+        raise ImproperlyConfigured(f"JSON_BACKEND must be one of {', '.join(JSON_BACKENDS)}, not {backend!r}.")
+    if backend == "orjson" and orjson is None:
+        raise ImproperlyConfigured("JSON_BACKEND is 'orjson' but orjson is not installed.")
+    return orjson is not None and backend != "stdlib"
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson, producing JSON equivalent to the stock renderer's.
+
+    orjson walks ``ReturnDict``/``ReturnList`` and other ``dict`` and ``list``
+    subclasses directly and encodes datetimes, dates, UUIDs and non-string keys
+    itself. Anything else (Decimals, lazy strings, querysets, ...) goes through
+    DRF's ``JSONEncoder.default``. The result decodes to the same values as the
+    stock renderer's output, and is the same bytes except for floats: orjson
+    spells some differently (``0.000012`` for ``1.2e-05``, ``1e16`` for
+    ``1e+16``) and encodes NaN and infinities as ``null`` where ``STRICT_JSON``
+    raises ``ValueError``. Indented output and non-default
+    ``UNICODE_JSON``/``COMPACT_JSON`` settings use the stock renderer, as does
+    everything when orjson is unavailable.
+    """
+
+    def render(self, data: Any, accepted_media_type: str | None = None, renderer_context: dict | None = None) -> bytes:
+        if data is None:
+            return b""
+        if (
+            not use_orjson()
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        output = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in output:
+                output = output.replace(raw, escaped)
+        return output
+
+
+_encoder = JSONEncoder()
+
+
+def _default(value: Any) -> Any:
+    return _encoder.default(value)
@@ -0,0 +1,155 @@
+"""Fast serialization of ``.values()`` rows into the JSON shapes of the DRF serializers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from datetime import datetime, tzinfo
+from itertools import count
+from types import SimpleNamespace
+from typing import Any
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import RecapSerializer, TitleSerializer, TitleSummarySerializer
+
+# Fields whose ``to_representation`` returns database values unchanged.
+PASSTHROUGH_FIELDS = (serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.IntegerField)
+
+
+class RowSerializer:
+    """Serialize plain rows into exactly what ``serializer_class(...).data`` would return.
+
+    The serializer's fields are introspected once and compiled into a single
+    function that builds the output dict from a row, so serializing costs a
+    dict lookup per field instead of DRF's per-field attribute and
+    ``to_representation`` calls. Rows come from ``.values()``:
+
+    - Nested serializers inside a ``ModelSerializer`` read the flattened
+      ``"<field>__<subfield>"`` keys that ``.values()`` produces for joins.
+    - Nested serializers inside a plain ``Serializer`` read a sub-row (a dict,
+      or a list of dicts for ``many=True``) under the field's key.
+    - ``SerializerMethodField`` methods receive an object carrying only the
+      row's value under the field name (``None`` if the row lacks it).
+
+    ISO 8601 datetimes are converted to the current time zone, looked up once
+    per call rather than once per value; other fields that are not plain
+    database values go through the field's own ``to_representation``, so the
+    output matches DRF's.
+    """
+
+    def __init__(self, serializer_class: type[serializers.BaseSerializer]):
+        self.serializer_class = serializer_class
+        self._helpers: dict[str, Any] = {"_Row": SimpleNamespace}
+        self._names = count()
+        functions: list[str] = []
+        serializer = serializer_class()
+        self._compile(serializer, "serialize", functions)
+        # ``.values()`` lookups a row needs; method fields are read only if present.
+        self.fields = _lookups(serializer, "") if isinstance(serializer, serializers.ModelSerializer) else []
+        self.source = "\n".join(functions)
+        namespace = dict(self._helpers)
+        exec(compile(self.source, f"<{serializer_class.__name__} rows>", "exec"), namespace)
+        self.serialize: Callable[[dict[str, Any], tzinfo | None], dict[str, Any]] = namespace["serialize"]
+
+    def __call__(self, row: dict[str, Any]) -> dict[str, Any]:
+        return self.serialize(row, _current_timezone())
+
+    def many(self, rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        zone, serialize = _current_timezone(), self.serialize
+        return [serialize(row, zone) for row in rows]
+
+    def _compile(self, serializer: serializers.BaseSerializer, name: str, functions: list[str]) -> None:
+        body = self._expression(serializer, "", functions, flatten=isinstance(serializer, serializers.ModelSerializer))
+        functions.append(f"def {name}(row, zone):\n    return {body}\n")
+
+    def _expression(self, serializer: serializers.BaseSerializer, prefix: str, functions: list[str], flatten: bool) -> str:
+        items = []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            key = prefix + (field.field_name if field.source == "*" else field.source.replace(".", "__"))
+            items.append(f"{field.field_name!r}: {self._field(field, key, functions, flatten)}")
+        return "{" + ", ".join(items) + "}"
+
+    def _field(self, field: serializers.Field, key: str, functions: list[str], flatten: bool) -> str:
+        if isinstance(field, serializers.SerializerMethodField):
+            method = self._helper(getattr(field.parent, field.method_name))
+            return f"{method}(_Row(**{{{field.field_name!r}: row.get({key!r})}}))"
+        if isinstance(field, serializers.ListSerializer):
+            if flatten:
+                raise TypeError(f"{key!r}: .values() rows cannot hold a list; serialize it from sub-rows.")
+            child = self._function(field.child, functions)
+            return f"[{child}(item, zone) for item in row[{key!r}]]"
+        if isinstance(field, serializers.BaseSerializer):
+            if flatten:
+                nested = self._expression(field, key + "__", functions, flatten=True)
+                return f"(None if row[{key + '__id'!r}] is None else {nested})" if field.allow_null else nested
+            function = self._function(field, functions)
+            call = f"{function}(row[{key!r}], zone)"
+            return f"(None if row[{key!r}] is None else {call})" if field.allow_null else call
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return f"row[{key!r}]"
+        if _is_iso_datetime(field):
+            convert = self._helper(_datetime_converter(field))
+            return f"(None if (value := row[{key!r}]) is None else {convert}(value, zone))"
+        convert = self._helper(field.to_representation)
+        return f"(None if (value := row[{key!r}]) is None else {convert}(value))"
+
+    def _function(self, serializer: serializers.BaseSerializer, functions: list[str]) -> str:
+        name = f"_serialize_{next(self._names)}_{type(serializer).__name__}"
+        self._compile(serializer, name, functions)
+        return name
+
+    def _helper(self, value: Any) -> str:
+        name = f"_helper_{len(self._helpers)}"
+        self._helpers[name] = value
+        return name
+
+
+def _current_timezone() -> tzinfo | None:
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def _is_iso_datetime(field: serializers.Field) -> bool:
+    # An explicit ``default_timezone`` sets ``field.timezone``; only the current zone is inlined.
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    return (
+        isinstance(field, serializers.DateTimeField)
+        and isinstance(output_format, str)
+        and output_format.lower() == ISO_8601
+        and not hasattr(field, "timezone")
+    )
+
+
+def _datetime_converter(field: serializers.DateTimeField) -> Callable[[Any, tzinfo | None], Any]:
+    fallback = field.to_representation
+
+    def convert(value: Any, zone: tzinfo | None) -> Any:
+        # Aware datetimes in a time zone are the common case; DRF handles the rest.
+        if zone is None or not isinstance(value, datetime) or value.tzinfo is None:
+            return fallback(value)
+        text = value.astimezone(zone).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return convert
+
+
+def _lookups(serializer: serializers.BaseSerializer, prefix: str) -> list[str]:
+    lookups = []
+    for field in serializer.fields.values():
+        if field.write_only or isinstance(field, serializers.SerializerMethodField):
+            continue
+        key = prefix + field.source.replace(".", "__")
+        if isinstance(field, serializers.BaseSerializer):
+            lookups += _lookups(field, key + "__")
+        else:
+            lookups.append(key)
+    return lookups
+
+
+TITLE_ROWS = RowSerializer(TitleSerializer)
+RECAP_ROWS = RowSerializer(RecapSerializer)
+TITLE_SUMMARY_ROWS = RowSerializer(TitleSummarySerializer)
@@ -7,15 +7,48 @@ from accounts.serializers import UserSerializer
 from .models import Recap, Title
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Leave out output fields not selected by the ``Fieldset`` in ``context["fieldset"]``.
+
+    Fields are removed before serialization, so unselected method fields and
+    nested serializers never run. Nested serializers apply the fieldset at their
+    own path (``user.username`` inside a recap). Serializers given input data
+    keep every field, so a fieldset never changes what a write accepts.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get("fieldset")
+        if fieldset is None or hasattr(self.root, "initial_data"):
+            return fields
+        path = _path(self)
+        return {name: field for name, field in fields.items() if fieldset.wants((*path, name))}
+
+
+def _path(serializer: serializers.BaseSerializer) -> tuple[str, ...]:
+    # List children are bound with an empty field name.
+    names = []
+    node = serializer
+    while node.parent is not None:
+        if node.field_name:
+            names.append(node.field_name)
+        node = node.parent
+    return tuple(reversed(names))
+
+
+class TitleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Title
         fields = ["id", "name", "category", "author", "created_at"]
         read_only_fields = ["id", "created_at"]
 
 
-class RecapSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+class RecapUserSerializer(SparseFieldsMixin, UserSerializer):
+    """A recap's author, with sparse fieldset support."""
+
+
+class RecapSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user = RecapUserSerializer(read_only=True)
     title = TitleSerializer(read_only=True)
     current_user_vote = serializers.SerializerMethodField()
 
@@ -55,6 +88,16 @@ class RecapSerializer(serializers.ModelSerializer):
             return None
 
 
+class RecapSearchResultSerializer(RecapSerializer):
+    """A recap found by text search: a highlighted snippet in place of the full text."""
+
+    snippet = serializers.CharField(read_only=True)
+    relevance = serializers.FloatField(read_only=True)
+
+    class Meta(RecapSerializer.Meta):
+        fields = [field for field in RecapSerializer.Meta.fields if field != "text"] + ["snippet", "relevance"]
+
+
 class RecapCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recap
@@ -79,7 +122,7 @@ class VoteSerializer(serializers.Serializer):
     value = serializers.IntegerField(min_value=-1, max_value=1)
 
 
-class TitleSummarySerializer(serializers.Serializer):
+class TitleSummarySerializer(SparseFieldsMixin, serializers.Serializer):
     title = TitleSerializer()
     top_recap = RecapSerializer(allow_null=True)
     other_recaps = RecapSerializer(many=True)
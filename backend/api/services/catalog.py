@@ -0,0 +1,82 @@
+"""Maintained per-category title counts and planner row estimates."""
+
+from __future__ import annotations
+
+from django.db import connection, models, transaction
+from django.db.models import Count
+
+from ..models import Title, TitleCategory, TitleCategoryCount
+
+
+class CategoryCounts:
+    """Read ``TitleCategoryCount`` rows instead of counting titles.
+
+    The rows are written by triggers on ``api_title``; this class only reads
+    them and, when asked, recounts them from the catalog.
+    """
+
+    @staticmethod
+    def facets() -> dict[str, int]:
+        """Return ``{category: title count}`` for every category, in declaration order."""
+
+        stored = dict(TitleCategoryCount.objects.values_list("category", "count"))
+        return {category: max(stored.get(category, 0), 0) for category in TitleCategory.values}
+
+    @staticmethod
+    def rebuild() -> dict[str, int]:
+        """Recount every category from the ``Title`` table and return the new counts."""
+
+        return {category: actual for category, (_, actual) in CategoryCounts._recount(repair=True).items()}
+
+    @staticmethod
+    def reconcile(repair: bool = True) -> dict[str, tuple[int, int]]:
+        """Recount every category and return ``{category: (stored, actual)}`` for those that drifted.
+
+        With ``repair`` the stored counts are replaced by the actual ones.
+        """
+
+        recounted = CategoryCounts._recount(repair=repair)
+        return {category: counts for category, counts in recounted.items() if counts[0] != counts[1]}
+
+    @staticmethod
+    def _recount(repair: bool) -> dict[str, tuple[int, int]]:
+        with transaction.atomic():
+            if repair and connection.vendor == "postgresql":
+                # Holds off title writes (not reads) so none lands between the count and the rewrite.
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LOCK TABLE {connection.ops.quote_name(Title._meta.db_table)} IN SHARE MODE")
+            stored = dict(TitleCategoryCount.objects.values_list("category", "count"))
+            actual = dict.fromkeys(TitleCategory.values, 0)
+            totals = Title.objects.order_by().values("category").annotate(total=Count("id"))
+            actual.update(totals.values_list("category", "total"))
+            if repair:
+                TitleCategoryCount.objects.all().delete()
+                TitleCategoryCount.objects.bulk_create(
+                    TitleCategoryCount(category=category, count=count) for category, count in actual.items()
+                )
+        return {category: (stored.get(category, 0), count) for category, count in actual.items()}
+
+
+def estimated_count(model: type[models.Model]) -> int | None:
+    """Return the planner's row count estimate for ``model``'s table, or ``None`` without statistics.
+
+    Postgres keeps ``pg_class.reltuples`` current through autovacuum; SQLite
+    has ``sqlite_stat1`` only after an ``ANALYZE``. Either may lag recent writes.
+    """
+
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+            # -1 means the table was never vacuumed or analyzed.
+            return int(row[0]) if row and row[0] >= 0 else None
+        if connection.vendor == "sqlite":
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # Every index row's ``stat`` starts with the table's row count.
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
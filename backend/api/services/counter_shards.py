@@ -0,0 +1,131 @@
+"""Sharded recap vote counters and their roll-up into ``Recap`` rows."""
+
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from ..models import Recap, RecapCounterShard
+from .summary_cache import SummaryCache
+from .vote_buffer import COUNTER_FIELDS, write_counter_deltas
+
+# Postgres and SQLite >= 3.24 both accept this upsert, including the table-qualified
+# reference to the existing row.
+SHARD_UPSERT_SQL = """
+INSERT INTO {shard} (recap_id, slot, score, upvotes, downvotes) VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (recap_id, slot) DO UPDATE SET
+    score = {shard}.score + EXCLUDED.score,
+    upvotes = {shard}.upvotes + EXCLUDED.upvotes,
+    downvotes = {shard}.downvotes + EXCLUDED.downvotes
+"""
+# Raw SQL: this runs on every vote and the equivalent annotated queryset costs
+# more to compile than to execute.
+SHARD_TOTALS_SQL = """
+SELECT r.score + COALESCE(SUM(s.score), 0),
+       r.upvotes + COALESCE(SUM(s.upvotes), 0),
+       r.downvotes + COALESCE(SUM(s.downvotes), 0)
+FROM {recap} r LEFT JOIN {shard} s ON s.recap_id = r.id
+WHERE r.id = %s
+GROUP BY r.id, r.score, r.upvotes, r.downvotes
+"""
+# Take the slots of a batch of recaps in one statement: rows incremented concurrently
+# are either returned here or left for the next roll-up, never lost.
+SHARD_TAKE_SQL = "DELETE FROM {shard} WHERE recap_id IN ({recap_ids}) RETURNING recap_id, score, upvotes, downvotes"
+# Recaps folded per roll-up transaction.
+ROLLUP_BATCH_SIZE = 500
+
+
+class ShardedVoteCounters:
+    """Spread counter deltas over ``VOTE_COUNTER_SHARDS`` slot rows per recap.
+
+    Readers that need exact live counters add the slots to the ``Recap`` columns
+    with ``totals``. Everything that orders by score (``Meta.ordering``, the top
+    recap of a summary bundle) sees the ``Recap`` columns and catches up when
+    ``rollup`` folds the slots in.
+    """
+
+    @staticmethod
+    def add(recap_id: int, deltas: dict[str, int]) -> None:
+        """Add ``deltas`` to a randomly chosen slot of ``recap_id``."""
+
+        slot = random.randrange(max(1, getattr(settings, "VOTE_COUNTER_SHARDS", 16)))
+        values = [deltas.get(field, 0) for field in COUNTER_FIELDS]
+        if connection.features.supports_update_conflicts_with_target:
+            sql = SHARD_UPSERT_SQL.format(shard=connection.ops.quote_name(RecapCounterShard._meta.db_table))
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [recap_id, slot, *values])
+            return
+        increments = {field: F(field) + value for field, value in zip(COUNTER_FIELDS, values)}
+        if RecapCounterShard.objects.filter(recap_id=recap_id, slot=slot).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                RecapCounterShard.objects.create(recap_id=recap_id, slot=slot, **dict(zip(COUNTER_FIELDS, values)))
+        except IntegrityError:
+            RecapCounterShard.objects.filter(recap_id=recap_id, slot=slot).update(**increments)
+
+    @staticmethod
+    def totals(recap_id: int) -> tuple[int, int, int]:
+        """Return the live ``(score, upvotes, downvotes)`` of a recap: its columns plus its slots."""
+
+        quote = connection.ops.quote_name
+        sql = SHARD_TOTALS_SQL.format(
+            recap=quote(Recap._meta.db_table), shard=quote(RecapCounterShard._meta.db_table)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [recap_id])
+            return cursor.fetchone()
+
+    @staticmethod
+    def rollup(batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+        """Fold every slot into its recap's counters and return the number of recaps updated."""
+
+        folded = 0
+        while True:
+            with transaction.atomic():
+                recap_ids = list(
+                    RecapCounterShard.objects.order_by("recap_id")
+                    .values_list("recap_id", flat=True)
+                    .distinct()[:batch_size]
+                )
+                if not recap_ids:
+                    return folded
+                deltas = ShardedVoteCounters._take(recap_ids)
+                write_counter_deltas({pk: values for pk, values in deltas.items() if any(values)})
+                SummaryCache.invalidate(Recap.objects.filter(pk__in=deltas).values_list("title_id", flat=True))
+            folded += len(deltas)
+
+    @staticmethod
+    def discard(recap_ids: list[int]) -> None:
+        """Drop the slots of ``recap_ids``, e.g. after their counters were recomputed from votes."""
+
+        RecapCounterShard.objects.filter(recap_id__in=recap_ids).delete()
+
+    @staticmethod
+    def _take(recap_ids: list[int]) -> dict[int, list[int]]:
+        """Delete the slots of ``recap_ids`` and return their summed deltas."""
+
+        if connection.features.can_return_columns_from_insert:
+            sql = SHARD_TAKE_SQL.format(
+                shard=connection.ops.quote_name(RecapCounterShard._meta.db_table),
+                recap_ids=", ".join(["%s"] * len(recap_ids)),
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, recap_ids)
+                rows = cursor.fetchall()
+        else:
+            shards = RecapCounterShard.objects.select_for_update().filter(recap_id__in=recap_ids)
+            rows = list(shards.values_list("pk", "recap_id", *COUNTER_FIELDS))
+            RecapCounterShard.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            rows = [row[1:] for row in rows]
+
+        deltas: dict[int, list[int]] = defaultdict(lambda: [0, 0, 0])
+        for recap_id, *values in rows:
+            totals = deltas[recap_id]
+            for index, value in enumerate(values):
+                totals[index] += value
+        return dict(deltas)
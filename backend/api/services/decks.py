@@ -0,0 +1,115 @@
+"""Shuffled title decks addressed by compact, signed cursors."""
+
+from __future__ import annotations
+
+import hashlib
+import secrets
+from dataclasses import dataclass, replace
+
+from django.core import signing
+
+from ..models import TitleSlot
+from .sampler import TitleSampler
+
+CURSOR_SALT = "api.decks"
+# Cursors older than this are rejected so abandoned decks cannot be replayed forever.
+CURSOR_MAX_AGE = 60 * 60 * 24 * 30
+FEISTEL_ROUNDS = 4
+
+
+class InvalidCursorError(Exception):
+    """Raised when a deck cursor is malformed, tampered with or expired."""
+
+
+@dataclass(frozen=True)
+class Deck:
+    """A seeded permutation of a bucket's slot positions plus a read offset.
+
+    ``size`` is frozen when the deck is opened, and removals leave tombstones
+    rather than moving titles between positions, so each title is dealt at most
+    once: titles added afterwards are not dealt and removed ones are skipped.
+    ``epoch`` is the index epoch the positions belong to; a rebuild renumbers
+    them and ends the deck.
+    """
+
+    bucket: str
+    seed: int
+    size: int
+    epoch: int
+    offset: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return max(self.size - self.offset, 0)
+
+    def encode(self) -> str:
+        return signing.dumps([self.bucket, self.seed, self.size, self.epoch, self.offset], salt=CURSOR_SALT)
+
+    @classmethod
+    def decode(cls, cursor: str) -> Deck:
+        try:
+            bucket, seed, size, epoch, offset = signing.loads(cursor, salt=CURSOR_SALT, max_age=CURSOR_MAX_AGE)
+            return cls(bucket=str(bucket), seed=int(seed), size=int(size), epoch=int(epoch), offset=int(offset))
+        except (signing.BadSignature, TypeError, ValueError) as exc:
+            raise InvalidCursorError("Invalid or expired deck cursor.") from exc
+
+    def position(self, index: int) -> int:
+        """Map deal ``index`` to a slot position with a keyed Feistel permutation.
+
+        The permutation runs over the smallest even-bit power-of-two domain that
+        covers ``size`` and cycle-walks until it lands inside ``[0, size)``, so
+        every position is dealt exactly once without storing the shuffle.
+        """
+
+        half_bits = max(1, ((self.size - 1).bit_length() + 1) // 2)
+        mask = (1 << half_bits) - 1
+        value = index
+        while True:
+            left, right = value >> half_bits, value & mask
+            for round_ in range(FEISTEL_ROUNDS):
+                left, right = right, left ^ (self._round(round_, right) & mask)
+            value = (left << half_bits) | right
+            if value < self.size:
+                return value
+
+    def _round(self, round_: int, value: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(8, "little"), digest_size=8, key=self.seed.to_bytes(8, "little") + bytes([round_])
+        ).digest()
+        return int.from_bytes(digest, "little")
+
+
+class DeckService:
+    """Open decks and deal titles from them."""
+
+    @staticmethod
+    def open(category: str | None, with_recaps: bool = False) -> Deck:
+        bucket = TitleSampler.bucket_for(category, with_recaps)
+        return Deck(
+            bucket=bucket, seed=secrets.randbits(63), size=TitleSampler.bucket_size(bucket), epoch=TitleSampler.epoch()
+        )
+
+    @staticmethod
+    def deal(deck: Deck, count: int) -> tuple[list[int], Deck]:
+        """Return up to ``count`` title IDs from ``deck`` and the advanced deck.
+
+        Tombstones left since the deck was opened are skipped, so a page can hold
+        fewer than ``count`` titles only when the deck is exhausted. Raises
+        ``InvalidCursorError`` if the index was rebuilt after the deck was opened.
+        """
+
+        if deck.epoch != TitleSampler.epoch():
+            raise InvalidCursorError("The title index was rebuilt; open a new deck.")
+        title_ids: list[int] = []
+        offset = deck.offset
+        while len(title_ids) < count and offset < deck.size:
+            want = min(count - len(title_ids), deck.size - offset)
+            positions = [deck.position(index) for index in range(offset, offset + want)]
+            offset += want
+            found = dict(
+                TitleSlot.objects.filter(bucket=deck.bucket, position__in=positions, title__isnull=False).values_list(
+                    "position", "title_id"
+                )
+            )
+            title_ids.extend(found[position] for position in positions if position in found)
+        return title_ids, replace(deck, offset=offset)
@@ -0,0 +1,272 @@
+"""Engagement-weighted random title selection from a memory-mapped alias table."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+from collections.abc import Collection
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+from ..models import Title
+from .sampler import MAX_ROUNDS, TitleSampler
+
+# Weight of a title without recaps, relative to 1 for a recapped title before
+# its recap count and top score are added, so empty titles still surface.
+EMPTY_WEIGHT = 0.1
+# Seconds a worker trusts its mapping before checking whether the file was replaced.
+RELOAD_INTERVAL = 1.0
+
+# File layout: a header, one directory entry per bucket, then per bucket the
+# title IDs (int64), acceptance probabilities (float64) and alias indexes
+# (uint32), each array starting on an 8-byte boundary. Little-endian throughout.
+MAGIC = b"NSLALIA1"
+HEADER = struct.Struct("<8sI4x")
+ENTRY = struct.Struct("<32sQQ16s")
+
+
+@dataclass(frozen=True)
+class RebuildReport:
+    titles: int
+    rebuilt: list[str]
+    reused: list[str]
+
+
+@dataclass(frozen=True)
+class _Bucket:
+    ids: memoryview
+    prob: memoryview
+    alias: memoryview
+    digest: bytes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def draw(self) -> int:
+        index = random.randrange(len(self.ids))
+        return self.ids[index] if random.random() < self.prob[index] else self.ids[self.alias[index]]
+
+
+def weight(recap_count: int, top_score: int | None) -> float:
+    """Return a title's draw weight: recapped titles grow with their recap count and best score."""
+
+    if recap_count <= 0:
+        return EMPTY_WEIGHT
+    return 1.0 + math.log1p(recap_count) + math.log1p(max(top_score or 0, 0))
+
+
+def build_alias(weights: list[float]) -> tuple[list[float], list[int]]:
+    """Return Vose's alias table (acceptance probabilities, aliases) for ``weights``."""
+
+    size = len(weights)
+    total = math.fsum(weights)
+    scaled = [value * size / total for value in weights]
+    prob = [1.0] * size
+    alias = list(range(size))
+    small = [index for index, value in enumerate(scaled) if value < 1.0]
+    large = [index for index, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] += scaled[less] - 1.0
+        (small if scaled[more] < 1.0 else large).append(more)
+    # Whatever is left is 1 up to rounding error and always accepted.
+    return prob, alias
+
+
+class EngagementSampler:
+    """Draw random titles with probability proportional to their engagement weight.
+
+    ``rebuild`` (run by ``manage.py rebuild_engagement_table``) writes one alias
+    table per ``TitleSampler`` bucket to ``ENGAGEMENT_TABLE_PATH`` and swaps it
+    in atomically; every worker maps the same file read-only and remaps it when
+    it is replaced, so a draw is two array reads whatever the catalog size.
+    Titles created after the last rebuild are not drawn until the next one.
+    """
+
+    _lock = threading.Lock()
+    _buckets: dict[str, _Bucket] | None = None
+    _identity: tuple[int, int] | None = None
+    _checked_at = 0.0
+
+    @classmethod
+    def sample(
+        cls, category: str | None = None, exclude: Collection[int] = (), k: int = 1, with_recaps: bool = False
+    ) -> list[int] | None:
+        """Return up to ``k`` distinct weighted title IDs, or ``None`` when there is no table to draw from.
+
+        Draws are checked against the catalog in one query, so titles deleted
+        or re-categorised since the rebuild are skipped; a shortfall is topped
+        up uniformly by ``TitleSampler``.
+        """
+
+        bucket = (cls._load() or {}).get(TitleSampler.bucket_for(category, with_recaps))
+        if not bucket:
+            return None
+        if k <= 0:
+            return []
+
+        excluded = set(exclude)
+        picked: list[int] = []
+        tried: set[int] = set()
+        for _ in range(MAX_ROUNDS):
+            want = 2 * (k - len(picked))
+            candidates: list[int] = []
+            for _ in range(want + len(excluded)):
+                title_id = bucket.draw()
+                if title_id not in tried and title_id not in excluded:
+                    tried.add(title_id)
+                    candidates.append(title_id)
+                if len(candidates) == want:
+                    break
+            picked += cls._existing(candidates, category, with_recaps)[: k - len(picked)]
+            if len(picked) == k or len(tried) + len(excluded) >= len(bucket):
+                break
+        if len(picked) < k:
+            picked += TitleSampler.sample(category, exclude=excluded | set(picked), k=k - len(picked), with_recaps=with_recaps)
+        return picked
+
+    @classmethod
+    def rebuild(cls, path: str | os.PathLike | None = None) -> RebuildReport:
+        """Recompute every bucket's weights and write the table, reusing buckets whose weights are unchanged.
+
+        The file is left untouched when nothing changed, so workers keep their mapping.
+        """
+
+        path = Path(path or settings.ENGAGEMENT_TABLE_PATH)
+        columns: dict[str, tuple[list[int], list[float]]] = {}
+        titles = Title.objects.order_by("pk").values_list("pk", "category", "recap_count", "top_recap__score")
+        count = 0
+        for title_id, category, recap_count, top_score in titles.iterator():
+            count += 1
+            title_weight = weight(recap_count, top_score)
+            for name in TitleSampler.buckets_for(category, recap_count > 0):
+                ids, weights = columns.setdefault(name, ([], []))
+                ids.append(title_id)
+                weights.append(title_weight)
+
+        previous = _read(path) or {}
+        sections: dict[str, tuple[bytes, int, bytes]] = {}
+        rebuilt, reused = [], []
+        for name, (ids, weights) in sorted(columns.items()):
+            digest = hashlib.blake2b(struct.pack(f"<{len(ids)}q{len(weights)}d", *ids, *weights), digest_size=16).digest()
+            old = previous.get(name)
+            if old is not None and old.digest == digest:
+                sections[name] = (digest, len(old), old.ids.tobytes() + old.prob.tobytes() + _padded(old.alias.tobytes()))
+                reused.append(name)
+                continue
+            prob, alias = build_alias(weights)
+            size = len(ids)
+            data = struct.pack(f"<{size}q{size}d", *ids, *prob) + _padded(struct.pack(f"<{size}I", *alias))
+            sections[name] = (digest, size, data)
+            rebuilt.append(name)
+        if rebuilt or set(previous) != set(sections):
+            _write(path, sections)
+            cls.reset()
+        return RebuildReport(titles=count, rebuilt=rebuilt, reused=reused)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget the current mapping so the next draw reopens the file."""
+
+        with cls._lock:
+            cls._buckets = cls._identity = None
+            cls._checked_at = 0.0
+
+    @classmethod
+    def _load(cls) -> dict[str, _Bucket] | None:
+        now = time.monotonic()
+        if now - cls._checked_at < RELOAD_INTERVAL:
+            return cls._buckets
+        with cls._lock:
+            cls._checked_at = now
+            path = Path(settings.ENGAGEMENT_TABLE_PATH)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                cls._buckets = cls._identity = None
+                return None
+            identity = (stat.st_ino, stat.st_mtime_ns)
+            if identity != cls._identity:
+                # The previous mapping stays valid for draws still holding it.
+                cls._buckets = _read(path)
+                cls._identity = identity
+            return cls._buckets
+
+    @staticmethod
+    def _existing(candidates: list[int], category: str | None, with_recaps: bool) -> list[int]:
+        if not candidates:
+            return []
+        # Filtered here rather than in SQL, which could make the planner prefer
+        # the category index over primary key lookups.
+        rows = Title.objects.filter(pk__in=candidates).values_list("pk", "category", "recap_count")
+        found = {
+            pk for pk, title_category, recap_count in rows
+            if (not category or title_category == category) and (not with_recaps or recap_count > 0)
+        }
+        return [title_id for title_id in candidates if title_id in found]
+
+
+def _padded(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _read(path: Path) -> dict[str, _Bucket] | None:
+    """Map ``path`` read-only and return its buckets, or ``None`` if it is missing or not a table."""
+
+    try:
+        with open(path, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size < HEADER.size:
+                return None
+            view = memoryview(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+    except FileNotFoundError:
+        return None
+    magic, count = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        return None
+    buckets: dict[str, _Bucket] = {}
+    for index in range(count):
+        name, size, offset, digest = ENTRY.unpack_from(view, HEADER.size + index * ENTRY.size)
+        prob_at = offset + 8 * size
+        alias_at = prob_at + 8 * size
+        buckets[name.rstrip(b"\0").decode()] = _Bucket(
+            ids=view[offset:prob_at].cast("q"),
+            prob=view[prob_at:alias_at].cast("d"),
+            alias=view[alias_at : alias_at + 4 * size].cast("I"),
+            digest=digest,
+        )
+    return buckets
+
+
+def _write(path: Path, sections: dict[str, tuple[bytes, int, bytes]]) -> None:
+    """Write ``sections`` next to ``path`` and rename over it, so readers see the old or the new table."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    offset = HEADER.size + ENTRY.size * len(sections)
+    directory = []
+    for name, (digest, size, data) in sections.items():
+        directory.append(ENTRY.pack(name.encode(), size, offset, digest))
+        offset += len(data)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(HEADER.pack(MAGIC, len(sections)))
+            handle.writelines(directory)
+            for _, _, data in sections.values():
+                handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
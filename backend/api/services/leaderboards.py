@@ -0,0 +1,156 @@
+"""Precomputed top-recap boards per category and time window."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from ..models import LeaderboardEntry, Recap, TitleCategory
+
+# Time span of each window; ``None`` means all time.
+WINDOWS: dict[str, timedelta | None] = {LeaderboardEntry.WEEK: timedelta(days=7), LeaderboardEntry.ALL_TIME: None}
+# Board order, best first. Matches ``leaderboard_rank_idx``.
+RANKING = ("-score", "-recap_created_at", "-recap_id")
+REBUILD_BATCH_SIZE = 1000
+
+
+def board_size() -> int:
+    """Return how many recaps a board serves (the ``LEADERBOARD_SIZE`` setting)."""
+
+    return getattr(settings, "LEADERBOARD_SIZE", 50)
+
+
+def board_depth() -> int:
+    """Return how many recaps a board stores: its size plus an equal reserve."""
+
+    return 2 * board_size()
+
+
+class Leaderboards:
+    """Serve, maintain and rebuild ``LeaderboardEntry`` boards.
+
+    Every category has a board and so does the whole catalog (``ALL``), each in
+    a weekly and an all-time window. Reads are a bounded range of one index.
+    Votes move the voted recap on its boards; a recap that falls far enough may
+    leave the served top for a recap the boards never held, which only a
+    rebuild puts back, hence the reserve.
+    """
+
+    @staticmethod
+    def top(category: str | None, window: str, limit: int | None = None) -> list[Recap]:
+        """Return the best ``limit`` recaps of ``category`` (all when empty) in ``window``."""
+
+        board = category or LeaderboardEntry.ALL
+        limit = min(limit or board_size(), board_size())
+        entries = LeaderboardEntry.objects.filter(board=board, window=window)
+        cutoff = _cutoff(window)
+        if cutoff is not None:
+            entries = entries.filter(recap_created_at__gte=cutoff)
+        if category:
+            # A title that changed category keeps its old entries until the next
+            # rebuild; skipping them before the limit lets the reserve fill in.
+            entries = entries.filter(recap__title__category=category)
+        entries = entries.select_related("recap__title", "recap__user").order_by(*RANKING)[:limit]
+        return [entry.recap for entry in entries]
+
+    @staticmethod
+    def record(recap: Recap) -> None:
+        """Place ``recap`` on its boards after its score changed.
+
+        Costs two indexed statements when the recap is on none of its boards and
+        does not make it onto one, which is the common case.
+        """
+
+        boards = Leaderboards._boards_for(recap)
+        with transaction.atomic():
+            listed = LeaderboardEntry.objects.filter(recap_id=recap.pk).update(score=recap.score)
+            if listed >= len(boards):
+                return
+            if listed:
+                boards -= set(LeaderboardEntry.objects.filter(recap_id=recap.pk).values_list("board", "window"))
+            qualified = Leaderboards._qualified(recap, boards)
+            if not qualified:
+                return
+            LeaderboardEntry.objects.bulk_create(
+                [
+                    LeaderboardEntry(
+                        board=board, window=window, recap_id=recap.pk, score=recap.score, recap_created_at=recap.created_at
+                    )
+                    for board, window in qualified
+                ],
+                ignore_conflicts=True,
+            )
+            for board, window in qualified:
+                Leaderboards._trim(board, window)
+
+    @staticmethod
+    def rebuild() -> int:
+        """Recompute every board from ``Recap`` scores and return the number of entries."""
+
+        now = timezone.now()
+        depth = board_depth()
+        with transaction.atomic():
+            entries = []
+            for board in (LeaderboardEntry.ALL, *TitleCategory.values):
+                recaps = Recap.objects.all()
+                if board != LeaderboardEntry.ALL:
+                    recaps = recaps.filter(title__category=board)
+                for window, span in WINDOWS.items():
+                    ranked = recaps if span is None else recaps.filter(created_at__gte=now - span)
+                    top = ranked.order_by("-score", "-created_at", "-id").values_list("pk", "score", "created_at")
+                    entries += [
+                        LeaderboardEntry(board=board, window=window, recap_id=pk, score=score, recap_created_at=created_at)
+                        for pk, score, created_at in top[:depth]
+                    ]
+            LeaderboardEntry.objects.all().delete()
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=REBUILD_BATCH_SIZE)
+        return len(entries)
+
+    @staticmethod
+    def _boards_for(recap: Recap) -> set[tuple[str, str]]:
+        windows = [window for window in WINDOWS if _cutoff(window) is None or recap.created_at >= _cutoff(window)]
+        return {(board, window) for board in (LeaderboardEntry.ALL, recap.title.category) for window in windows}
+
+    @staticmethod
+    def _qualified(recap: Recap, boards: set[tuple[str, str]]) -> list[tuple[str, str]]:
+        """Return the ``boards`` on which fewer than ``board_depth()`` entries outrank ``recap``."""
+
+        if not boards:
+            return []
+        # Boards are trimmed to their depth, so each count reads a bounded index range.
+        outranking = (
+            Q(score__gt=recap.score)
+            | Q(score=recap.score, recap_created_at__gt=recap.created_at)
+            | Q(score=recap.score, recap_created_at=recap.created_at, recap_id__gt=recap.pk)
+        )
+        on_boards = Q()
+        for board, window in boards:
+            on_boards |= Q(board=board, window=window)
+        counts = (
+            LeaderboardEntry.objects.filter(on_boards, outranking)
+            .order_by()
+            .values("board", "window")
+            .annotate(ahead=Count("id"))
+            .values_list("board", "window", "ahead")
+        )
+        ahead = {(board, window): count for board, window, count in counts}
+        return sorted(key for key in boards if ahead.get(key, 0) < board_depth())
+
+    @staticmethod
+    def _trim(board: str, window: str) -> None:
+        surplus = list(
+            LeaderboardEntry.objects.filter(board=board, window=window)
+            .order_by(*RANKING)
+            .values_list("pk", flat=True)[board_depth() :]
+        )
+        if surplus:
+            LeaderboardEntry.objects.filter(pk__in=surplus).delete()
+
+
+def _cutoff(window: str) -> datetime | None:
+    span = WINDOWS[window]
+    return None if span is None else timezone.now() - span
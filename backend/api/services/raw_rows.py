@@ -0,0 +1,21 @@
+"""Helpers for values read straight off a database cursor."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def as_datetime(value: Any) -> datetime | None:
+    """Normalise raw cursor datetimes (strings on SQLite) to aware datetimes."""
+
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, UTC)
+    return value
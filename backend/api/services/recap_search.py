@@ -0,0 +1,221 @@
+"""Ranked full-text search over recap text with highlighted snippets."""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import BooleanField, QuerySet
+from django.db.models.expressions import RawSQL
+
+from ..models import Recap, Title
+from .raw_rows import as_datetime
+
+DEFAULT_LIMIT = 10
+SEARCH_TABLE = "api_recap_search"
+# Score boosts text relevance by up to this fraction and penalises by as much;
+# a score of ``SCORE_SATURATION`` gets half of it. Relevance stays primary.
+SCORE_WEIGHT = 0.5
+SCORE_SATURATION = 10
+# Words around the matches in a snippet (FTS5 allows at most 64).
+SNIPPET_WORDS = 24
+# Private-use characters delimit matches in the database; they become <mark>
+# tags only after the snippet is HTML-escaped.
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+ELLIPSIS = "…"
+
+# Both statements rank inside a subquery and build snippets in the outer query,
+# so only the returned page is highlighted and full texts never leave the database.
+SQLITE_SEARCH_SQL = """
+WITH ranked AS (
+    SELECT s.rowid AS id,
+           -bm25({search}) * (1.0 + %s * r.score / (ABS(r.score) + %s)) AS relevance
+    FROM {search} s JOIN {recap} r ON r.id = s.rowid
+    WHERE {search} MATCH %s
+    ORDER BY relevance DESC, s.rowid DESC
+    LIMIT %s
+)
+SELECT r.id, r.score, r.upvotes, r.downvotes, r.created_at, r.updated_at,
+       t.id, t.name, t.category, t.author, t.created_at, r.user_id, u.username,
+       ranked.relevance, snippet({search}, 0, %s, %s, %s, %s)
+FROM ranked
+JOIN {search} s ON s.rowid = ranked.id
+JOIN {recap} r ON r.id = ranked.id
+JOIN {title} t ON t.id = r.title_id
+LEFT JOIN {user} u ON u.{user_pk} = r.user_id
+WHERE {search} MATCH %s
+ORDER BY ranked.relevance DESC, ranked.id DESC
+"""
+POSTGRES_SEARCH_SQL = """
+WITH query AS (SELECT websearch_to_tsquery('english', %s) AS q),
+ranked AS (
+    SELECT r.id, ts_rank_cd(r.search_vector, query.q) * (1.0 + %s * r.score / (ABS(r.score) + %s)) AS relevance
+    FROM {recap} r CROSS JOIN query
+    WHERE r.search_vector @@ query.q
+    ORDER BY relevance DESC, r.id DESC
+    LIMIT %s
+)
+SELECT r.id, r.score, r.upvotes, r.downvotes, r.created_at, r.updated_at,
+       t.id, t.name, t.category, t.author, t.created_at, r.user_id, u.username,
+       ranked.relevance, ts_headline('english', r.text, query.q, %s)
+FROM ranked
+CROSS JOIN query
+JOIN {recap} r ON r.id = ranked.id
+JOIN {title} t ON t.id = r.title_id
+LEFT JOIN {user} u ON u.{user_pk} = r.user_id
+ORDER BY ranked.relevance DESC, ranked.id DESC
+"""
+# ``ts_headline`` options matching the FTS5 snippet.
+POSTGRES_HEADLINE_OPTIONS = (
+    f'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, '
+    f'MaxFragments=1, FragmentDelimiter="{ELLIPSIS}"'
+)
+
+
+class RecapSearch:
+    """Find recaps whose text matches a query, best first.
+
+    Words are matched after stemming (``porter`` on SQLite, the ``english``
+    configuration on Postgres) and all must occur; ``"quoted text"`` matches a
+    phrase. Text relevance (BM25 on SQLite, cover density on Postgres) is scaled
+    by a bounded boost from the recap's score. Results carry ``relevance`` and
+    an HTML-escaped ``snippet`` with matches in ``<mark>`` tags; ``text`` is
+    left empty because full texts are never fetched.
+    """
+
+    @staticmethod
+    def search(query: str, limit: int = DEFAULT_LIMIT) -> list[Recap]:
+        """Return up to ``limit`` recaps matching ``query``, in one statement.
+
+        Databases without a search index get unranked substring matches, best
+        score first, with a ``relevance`` of 0.
+        """
+
+        if connection.vendor not in {"sqlite", "postgresql"}:
+            return RecapSearch._substring(query, limit)
+        statement = RecapSearch._statement(query, limit)
+        if statement is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(*statement)
+            return [_recap(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def filter(queryset: QuerySet[Recap], query: str) -> QuerySet[Recap]:
+        """Narrow ``queryset`` to recaps whose text matches ``query``, through the index."""
+
+        if connection.vendor == "sqlite":
+            expression = _match_expression(query)
+            if expression is None:
+                return queryset.none()
+            search = connection.ops.quote_name(SEARCH_TABLE)
+            return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {search} WHERE {search} MATCH %s", [expression]))
+        if connection.vendor == "postgresql":
+            table = connection.ops.quote_name(Recap._meta.db_table)
+            condition = f"{table}.search_vector @@ websearch_to_tsquery('english', %s)"
+            return queryset.filter(RawSQL(condition, [query], output_field=BooleanField()))
+        return queryset.filter(text__icontains=query)
+
+    @staticmethod
+    def _statement(query: str, limit: int) -> tuple[str, list[Any]] | None:
+        quote = connection.ops.quote_name
+        user_model = get_user_model()
+        tables = {
+            "search": quote(SEARCH_TABLE),
+            "recap": quote(Recap._meta.db_table),
+            "title": quote(Title._meta.db_table),
+            "user": quote(user_model._meta.db_table),
+            "user_pk": quote(user_model._meta.pk.column),
+        }
+        if connection.vendor == "sqlite":
+            expression = _match_expression(query)
+            if expression is None:
+                return None
+            params = [SCORE_WEIGHT, SCORE_SATURATION, expression, limit]
+            params += [MATCH_START, MATCH_END, ELLIPSIS, SNIPPET_WORDS, expression]
+            return SQLITE_SEARCH_SQL.format(**tables), params
+        if connection.vendor == "postgresql":
+            if not query.strip():
+                return None
+            params = [query, SCORE_WEIGHT, SCORE_SATURATION, limit, POSTGRES_HEADLINE_OPTIONS]
+            return POSTGRES_SEARCH_SQL.format(**tables), params
+        return None
+
+    @staticmethod
+    def _substring(query: str, limit: int) -> list[Recap]:
+        query = query.strip()
+        if not query:
+            return []
+        recaps = list(
+            RecapSearch.filter(Recap.objects.select_related("title", "user"), query).order_by("-score", "-id")[:limit]
+        )
+        for recap in recaps:
+            recap.relevance = 0.0
+            recap.snippet = _highlight(_mark_substring(recap.text, query))
+            recap.text = ""
+        return recaps
+
+
+def _match_expression(query: str) -> str | None:
+    """Translate ``query`` into an FTS5 expression: every word and quoted phrase, all required."""
+
+    terms = []
+    for phrase, bare in re.findall(r'"([^"]*)"|(\S+)', query):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"{}"'.format(" ".join(words)))
+        else:
+            terms.extend(f'"{word}"' for word in re.findall(r"\w+", bare))
+    return " ".join(terms) or None
+
+
+def _mark_substring(text: str, query: str) -> str:
+    """Cut ``text`` to about ``SNIPPET_WORDS`` words around the first match of ``query``, marked."""
+
+    start = text.lower().find(query.lower())
+    if start < 0:
+        return text
+    end = start + len(query)
+    keep = SNIPPET_WORDS // 2
+    before = [match.start() for match in re.finditer(r"\S+", text[:start])]
+    after = [end + match.end() for match in re.finditer(r"\S+", text[end:])]
+    low = before[-keep] if len(before) > keep else 0
+    high = after[keep - 1] if len(after) > keep else len(text)
+    return "".join(
+        [
+            ELLIPSIS if low else "",
+            text[low:start],
+            MATCH_START,
+            text[start:end],
+            MATCH_END,
+            text[end:high],
+            ELLIPSIS if high < len(text) else "",
+        ]
+    )
+
+
+def _highlight(snippet: str | None) -> str:
+    escaped = html.escape(snippet or "", quote=False)
+    return escaped.replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+def _recap(row: tuple) -> Recap:
+    title = Title(id=row[6], name=row[7], category=row[8], author=row[9], created_at=as_datetime(row[10]))
+    recap = Recap(
+        id=row[0],
+        title=title,
+        user=get_user_model()(pk=row[11], username=row[12] or ""),
+        score=row[1],
+        upvotes=row[2],
+        downvotes=row[3],
+        created_at=as_datetime(row[4]),
+        updated_at=as_datetime(row[5]),
+    )
+    recap.relevance = row[13]
+    recap.snippet = _highlight(row[14])
+    return recap
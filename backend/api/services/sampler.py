@@ -0,0 +1,227 @@
+"""Constant-time random title sampling backed by the ``TitleSlot`` index."""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Collection, Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+
+from ..models import Checkpoint, Title, TitleSlot
+
+# Number of draw rounds before giving up on the index and asking the database.
+MAX_ROUNDS = 4
+# Batch size used when (re)building the index.
+REBUILD_BATCH_SIZE = 5000
+# Counts index rebuilds; decks opened before the latest one are stale.
+EPOCH_CHECKPOINT = "title_slots.epoch"
+
+
+class TitleSampler:
+    """Pick random titles in O(1) and keep the slot index in step with the catalog."""
+
+    @staticmethod
+    def bucket_for(category: str | None, with_recaps: bool = False) -> str:
+        bucket = category or TitleSlot.ALL
+        return TitleSlot.RECAPPED + bucket if with_recaps else bucket
+
+    @staticmethod
+    def buckets_for(category: str, has_recaps: bool) -> list[str]:
+        """Return every bucket a title of ``category`` belongs in."""
+
+        buckets = [TitleSlot.ALL, category]
+        return buckets + [TitleSlot.RECAPPED + bucket for bucket in buckets] if has_recaps else buckets
+
+    @staticmethod
+    def bucket_size(bucket: str) -> int:
+        """Return the slot count for ``bucket``, tombstones included (an indexed MAX lookup, not a COUNT)."""
+
+        top = TitleSlot.objects.filter(bucket=bucket).aggregate(top=Max("position"))["top"]
+        return 0 if top is None else top + 1
+
+    @staticmethod
+    def sample(
+        category: str | None = None, exclude: Collection[int] = (), k: int = 1, with_recaps: bool = False
+    ) -> list[int]:
+        """Return up to ``k`` distinct random title IDs, skipping any in ``exclude``.
+
+        Positions are drawn uniformly and resolved through the unique
+        ``(bucket, position)`` index, so the cost does not depend on catalog size;
+        tombstones are skipped. When ``exclude`` covers most of the bucket the
+        index stops being useful and the remaining titles are picked by the
+        database instead. ``with_recaps`` draws from the buckets of titles that
+        have at least one recap.
+        """
+
+        bucket = TitleSampler.bucket_for(category, with_recaps)
+        size = TitleSampler.bucket_size(bucket)
+        if size == 0 or k <= 0:
+            return []
+
+        excluded = set(exclude)
+        if len(excluded) * 2 >= size:
+            return TitleSampler._sample_from_database(category, excluded, k, with_recaps)
+
+        picked: list[int] = []
+        tried: set[int] = set()
+        for _ in range(MAX_ROUNDS):
+            remaining = [pos for pos in range(size) if pos not in tried] if len(tried) * 2 >= size else None
+            want = min(2 * (k - len(picked)) + len(excluded), size - len(tried))
+            if want <= 0:
+                break
+            if remaining is not None:
+                positions = random.sample(remaining, min(want, len(remaining)))
+            else:
+                positions = TitleSampler._draw_positions(size, want, tried)
+            tried.update(positions)
+            slots = TitleSlot.objects.filter(bucket=bucket, position__in=positions)
+            if with_recaps:
+                # Bulk recap deletes leave slots behind until the next rebuild.
+                slots = slots.filter(title__recap_count__gt=0)
+            found = dict(slots.values_list("position", "title_id"))
+            for position in positions:
+                title_id = found.get(position)
+                if title_id is None or title_id in excluded or title_id in picked:
+                    continue
+                picked.append(title_id)
+                if len(picked) == k:
+                    return picked
+        if len(picked) < k:
+            picked += TitleSampler._sample_from_database(category, excluded | set(picked), k - len(picked), with_recaps)
+        return picked
+
+    @staticmethod
+    def _draw_positions(size: int, count: int, tried: set[int]) -> list[int]:
+        positions: list[int] = []
+        seen = set(tried)
+        while len(positions) < count:
+            position = random.randrange(size)
+            if position not in seen:
+                seen.add(position)
+                positions.append(position)
+        return positions
+
+    @staticmethod
+    def _sample_from_database(category: str | None, exclude: Iterable[int], k: int, with_recaps: bool) -> list[int]:
+        queryset = Title.objects.all()
+        if category:
+            queryset = queryset.filter(category=category)
+        if with_recaps:
+            queryset = queryset.filter(recap_count__gt=0)
+        exclude_ids = list(exclude)
+        if exclude_ids:
+            queryset = queryset.exclude(pk__in=exclude_ids)
+        return list(queryset.order_by("?").values_list("pk", flat=True)[:k])
+
+    @staticmethod
+    def add(title: Title) -> None:
+        """Append ``title`` to the tail of its category bucket and the ``ALL`` bucket."""
+
+        with transaction.atomic():
+            for bucket in (TitleSlot.ALL, title.category):
+                TitleSampler._append(bucket, title.pk)
+
+    @staticmethod
+    def remove(title: Title) -> None:
+        """Turn every slot of ``title`` into a tombstone."""
+
+        with transaction.atomic():
+            for slot in TitleSlot.objects.select_for_update().filter(title_id=title.pk):
+                TitleSampler._release(slot)
+
+    @staticmethod
+    def move(title: Title) -> None:
+        """Re-file ``title`` if its category no longer matches its slots."""
+
+        with transaction.atomic():
+            current = TitleSampler.buckets_for(title.category, has_recaps=True)
+            stale = list(TitleSlot.objects.select_for_update().filter(title_id=title.pk).exclude(bucket__in=current))
+            if not stale and TitleSlot.objects.filter(title_id=title.pk, bucket=title.category).exists():
+                return
+            for slot in stale:
+                TitleSampler._release(slot)
+            has_recaps = Title.objects.filter(pk=title.pk, recap_count__gt=0).exists()
+            filed = set(TitleSlot.objects.filter(title_id=title.pk).values_list("bucket", flat=True))
+            for bucket in TitleSampler.buckets_for(title.category, has_recaps):
+                if bucket not in filed:
+                    TitleSampler._append(bucket, title.pk)
+
+    @staticmethod
+    def recaps_changed(title_id: int) -> None:
+        """File a title in, or drop it from, the recapped buckets to match its current ``recap_count``.
+
+        Membership is compared with the slots rather than inferred from the
+        count, so two first recaps racing each other, or a recap moved between
+        titles, still leave the title filed exactly when it has recaps.
+        """
+
+        row = Title.objects.filter(pk=title_id).values_list("category", "recap_count").first()
+        if row is None:
+            return
+        category, recap_count = row
+        recapped = [TitleSampler.bucket_for(bucket, with_recaps=True) for bucket in (TitleSlot.ALL, category)]
+        with transaction.atomic():
+            if recap_count > 0:
+                filed = set(TitleSlot.objects.filter(title_id=title_id, bucket__in=recapped).values_list("bucket", flat=True))
+                for bucket in recapped:
+                    if bucket not in filed:
+                        TitleSampler._append(bucket, title_id)
+            else:
+                for slot in TitleSlot.objects.select_for_update().filter(title_id=title_id, bucket__in=recapped):
+                    TitleSampler._release(slot)
+
+    @staticmethod
+    def epoch() -> int:
+        """Return how many times the index has been rebuilt; positions are only stable within an epoch."""
+
+        return Checkpoint.objects.filter(name=EPOCH_CHECKPOINT).values_list("position", flat=True).first() or 0
+
+    @staticmethod
+    def rebuild() -> int:
+        """Recreate the whole index from the ``Title`` table, without tombstones, and return the slot count.
+
+        Positions are renumbered, so the epoch is bumped and decks opened before
+        the rebuild are rejected.
+        """
+
+        created = 0
+        with transaction.atomic():
+            if not Checkpoint.objects.filter(name=EPOCH_CHECKPOINT).update(position=F("position") + 1):
+                Checkpoint.objects.create(name=EPOCH_CHECKPOINT, position=1)
+            TitleSlot.objects.all().delete()
+            positions: dict[str, int] = {TitleSlot.ALL: 0}
+            batch: list[TitleSlot] = []
+            titles = Title.objects.order_by("pk").values_list("pk", "category", "recap_count")
+            for title_id, category, recap_count in titles.iterator():
+                for bucket in TitleSampler.buckets_for(category, recap_count > 0):
+                    position = positions.get(bucket, 0)
+                    positions[bucket] = position + 1
+                    batch.append(TitleSlot(bucket=bucket, position=position, title_id=title_id))
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    TitleSlot.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            TitleSlot.objects.bulk_create(batch)
+            created += len(batch)
+        return created
+
+    @staticmethod
+    def _append(bucket: str, title_id: int) -> None:
+        # Concurrent appends can race for the same tail position; retry on conflict.
+        for _ in range(5):
+            try:
+                with transaction.atomic():
+                    position = TitleSampler.bucket_size(bucket)
+                    TitleSlot.objects.create(bucket=bucket, position=position, title_id=title_id)
+                return
+            except IntegrityError:
+                if TitleSlot.objects.filter(bucket=bucket, title_id=title_id).exists():
+                    return
+        raise IntegrityError(f"Could not allocate a slot in bucket {bucket!r} for title {title_id}.")
+
+    @staticmethod
+    def _release(slot: TitleSlot) -> None:
+        # The position stays taken, so the bucket's tail (and new titles) never move below it.
+        slot.title = None
+        slot.save(update_fields=["title"])
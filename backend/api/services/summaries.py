@@ -0,0 +1,179 @@
+"""Single-statement construction of user-neutral title summary bundles."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from ..models import Recap, Title
+from ..row_serializers import TITLE_ROWS, TITLE_SUMMARY_ROWS
+from .raw_rows import as_datetime
+from .summary_cache import SummaryCache
+from .vote_buffer import VoteCounterBuffer
+from .votes import VoteService
+
+# Number of random non-top recaps included in each bundle.
+OTHER_RECAPS = 3
+
+# Titles, the top recap of each and a random sample of the others in one round
+# trip. The top recap is the title's maintained ``top_recap_id``; the shuffle
+# puts it first, so ``pick_rank`` is 0 for the top recap and 1.. for a random
+# order of the rest, and keeping ranks up to ``OTHER_RECAPS`` yields the bundle.
+# Titles without recaps (``recap_count = 0``) skip the recap scan altogether.
+# Window functions need SQLite >= 3.25; RANDOM() exists on SQLite and Postgres.
+SUMMARY_SQL = """
+SELECT
+    t.id, t.name, t.category, t.author, t.created_at,
+    r.id, r.user_id, u.username, r.text, r.score, r.upvotes, r.downvotes,
+    r.created_at, r.updated_at, r.pick_rank
+FROM {title_table} t
+LEFT JOIN (
+    SELECT rr.id, rr.title_id, rr.user_id, rr.text, rr.score, rr.upvotes, rr.downvotes,
+           rr.created_at, rr.updated_at,
+           ROW_NUMBER() OVER (
+               PARTITION BY rr.title_id ORDER BY CASE WHEN rr.id = tt.top_recap_id THEN 0 ELSE 1 END, RANDOM()
+           ) - 1 AS pick_rank
+    FROM {title_table} tt
+    JOIN {recap_table} rr ON rr.title_id = tt.id
+    WHERE tt.id IN ({title_ids}) AND tt.recap_count > 0
+) r ON r.title_id = t.id AND r.pick_rank <= {pick_limit}
+LEFT JOIN {user_table} u ON u.{user_pk} = r.user_id
+WHERE t.id IN ({title_ids})
+"""
+
+
+class SummaryService:
+    """Build ``TitleSummarySerializer`` bundles for any number of titles in one query.
+
+    Rows are serialized by ``TITLE_SUMMARY_ROWS`` rather than through DRF
+    field by field; the output is identical.
+    """
+
+    @staticmethod
+    def build(
+        title_ids: Iterable[int], request: Any = None, overlay_votes: bool = True, recaps: bool = True
+    ) -> list[dict[str, Any]]:
+        """Return one bundle per existing title, in the order of ``title_ids``.
+
+        Bundles are user-neutral, so they are shared by every caller through the
+        summary cache. For authenticated callers the caller's votes are overlaid
+        afterwards with one indexed lookup, unless ``overlay_votes`` is false.
+        The random recap sample is frozen for the lifetime of a cache entry.
+        Without ``recaps`` the caller only needs titles: uncached bundles are
+        read from the title table alone, left empty of recaps and not cached.
+        """
+
+        title_ids = list(dict.fromkeys(title_ids))
+        if not title_ids:
+            return []
+        cached, keys = SummaryCache.get_many(title_ids)
+        if keys and not recaps:
+            cached.update(SummaryService._titles_only(list(keys)))
+        elif keys:
+            built = SummaryService._build(list(keys))
+            fresh = {bundle["title"]["id"]: bundle for bundle in built}
+            SummaryCache.set_many({keys[pk]: bundle for pk, bundle in fresh.items()})
+            cached.update(fresh)
+        bundles = [SummaryService._merge_pending_votes(cached[pk]) for pk in title_ids if pk in cached]
+
+        user = getattr(request, "user", None)
+        if overlay_votes and user and user.is_authenticated:
+            bundles = SummaryService.overlay_votes(bundles, user)
+        return bundles
+
+    @staticmethod
+    def _merge_pending_votes(bundle: dict[str, Any]) -> dict[str, Any]:
+        """Apply this worker's buffered counter deltas so voters see their own votes."""
+
+        if not VoteCounterBuffer.pending(recap["id"] for recap in _bundle_recaps(bundle)):
+            return bundle
+        top, *others = VoteCounterBuffer.merge_into([bundle["top_recap"], *bundle["other_recaps"]])
+        return {**bundle, "top_recap": top, "other_recaps": others}
+
+    @staticmethod
+    def overlay_votes(bundles: list[dict[str, Any]], user: Any) -> list[dict[str, Any]]:
+        """Return copies of ``bundles`` with ``current_user_vote`` filled in for ``user``."""
+
+        recap_ids = [recap["id"] for bundle in bundles for recap in _bundle_recaps(bundle)]
+        votes = VoteService.votes_for(user, recap_ids)
+        if not votes:
+            return bundles
+
+        def with_vote(recap):
+            if recap is None or recap["id"] not in votes:
+                return recap
+            return {**recap, "current_user_vote": votes[recap["id"]]}
+
+        return [
+            {
+                **bundle,
+                "top_recap": with_vote(bundle["top_recap"]),
+                "other_recaps": [with_vote(recap) for recap in bundle["other_recaps"]],
+            }
+            for bundle in bundles
+        ]
+
+    @staticmethod
+    def _build(title_ids: list[int]) -> list[dict[str, Any]]:
+        titles: dict[int, dict[str, Any]] = {}
+        recaps: dict[int, list[tuple[int, dict[str, Any]]]] = {}
+        with connection.cursor() as cursor:
+            cursor.execute(*SummaryService._statement(title_ids))
+            for row in cursor.fetchall():
+                title = titles.get(row[0])
+                if title is None:
+                    title = titles[row[0]] = {
+                        "id": row[0], "name": row[1], "category": row[2], "author": row[3], "created_at": as_datetime(row[4])
+                    }
+                    recaps[row[0]] = []
+                if row[5] is None:
+                    continue
+                recap = {
+                    "id": row[5],
+                    **{f"title__{key}": value for key, value in title.items()},
+                    "user__email": row[6],
+                    "user__username": row[7] or "",
+                    "text": row[8],
+                    "score": row[9],
+                    "upvotes": row[10],
+                    "downvotes": row[11],
+                    "created_at": as_datetime(row[12]),
+                    "updated_at": as_datetime(row[13]),
+                }
+                recaps[row[0]].append((row[14], recap))
+
+        bundles = []
+        for pk in title_ids:
+            if pk not in titles:
+                continue
+            ranked = [recap for _, recap in sorted(recaps[pk], key=lambda item: item[0])]
+            top = ranked[0] if ranked else None
+            bundles.append({"title": titles[pk], "top_recap": top, "other_recaps": ranked[1 : OTHER_RECAPS + 1]})
+        return TITLE_SUMMARY_ROWS.many(bundles)
+
+    @staticmethod
+    def _titles_only(title_ids: list[int]) -> dict[int, dict[str, Any]]:
+        rows = Title.objects.filter(pk__in=title_ids).values(*TITLE_ROWS.fields)
+        return {row["id"]: {"title": TITLE_ROWS(row), "top_recap": None, "other_recaps": []} for row in rows}
+
+    @staticmethod
+    def _statement(title_ids: list[int]) -> tuple[str, list[Any]]:
+        quote = connection.ops.quote_name
+        user_model = get_user_model()
+        sql = SUMMARY_SQL.format(
+            title_table=quote(Title._meta.db_table),
+            recap_table=quote(Recap._meta.db_table),
+            user_table=quote(user_model._meta.db_table),
+            user_pk=quote(user_model._meta.pk.column),
+            title_ids=", ".join(["%s"] * len(title_ids)),
+            pick_limit=OTHER_RECAPS,
+        )
+        return sql, [*title_ids, *title_ids]
+
+
+def _bundle_recaps(bundle: dict[str, Any]) -> list[dict[str, Any]]:
+    top = bundle["top_recap"]
+    return ([top] if top else []) + list(bundle["other_recaps"])
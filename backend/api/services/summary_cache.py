@@ -0,0 +1,117 @@
+"""Versioned cache of user-neutral title summary bundles."""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Iterable
+from typing import Any
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .. import metrics
+
+CACHE_ALIAS = "summaries"
+# Generation counters live apart from the bundles so bundle churn never culls them.
+GENERATION_CACHE_ALIAS = "summary_generations"
+# Bump when the bundle shape changes so old entries are never served.
+PAYLOAD_VERSION = 1
+GLOBAL_GENERATION_KEY = "summary:generation"
+
+metrics.register("summary_cache.hits", "summary_cache.misses", "summary_cache.invalidations")
+
+
+class SummaryCache:
+    """Cache bundles under generation-stamped keys.
+
+    Each title has a generation counter and there is one global generation. A
+    bundle is stored under a key that embeds both, read *before* the bundle is
+    built. Invalidation bumps the counter instead of deleting the entry, so a
+    request that raced a write stores its stale bundle under a key nobody will
+    ask for again; superseded entries age out through the backend's LRU culling
+    and TTL.
+
+    Counters are kept in their own cache, which should not evict. If one is
+    lost anyway (a restart, or a backend that evicts regardless), it restarts
+    from a random value rather than 0, so keys stamped with earlier
+    generations are never handed out again and the bundle is rebuilt.
+    """
+
+    @staticmethod
+    def cache():
+        return caches[CACHE_ALIAS]
+
+    @staticmethod
+    def generations():
+        return caches[GENERATION_CACHE_ALIAS]
+
+    @staticmethod
+    def get_many(title_ids: Iterable[int]) -> tuple[dict[int, Any], dict[int, str]]:
+        """Return ``(cached bundles, keys to store misses under)`` for ``title_ids``."""
+
+        title_ids = list(title_ids)
+        generation_keys = {pk: SummaryCache._generation_key(pk) for pk in title_ids}
+        generations = SummaryCache._read_generations([GLOBAL_GENERATION_KEY, *generation_keys.values()])
+        global_generation = generations[GLOBAL_GENERATION_KEY]
+        keys = {
+            pk: f"summary:{pk}:{global_generation}:{generations[generation_key]}"
+            for pk, generation_key in generation_keys.items()
+        }
+        found = SummaryCache.cache().get_many(list(keys.values()), version=PAYLOAD_VERSION)
+        hits = {pk: found[key] for pk, key in keys.items() if key in found}
+        if hits:
+            metrics.incr("summary_cache.hits", len(hits))
+        if len(hits) < len(keys):
+            metrics.incr("summary_cache.misses", len(keys) - len(hits))
+        return hits, {pk: key for pk, key in keys.items() if pk not in hits}
+
+    @staticmethod
+    def set_many(bundles: dict[str, Any]) -> None:
+        """Store bundles keyed by the keys handed out by ``get_many``."""
+
+        if bundles:
+            SummaryCache.cache().set_many(bundles, version=PAYLOAD_VERSION)
+
+    @staticmethod
+    def invalidate(title_ids: Iterable[int]) -> None:
+        """Retire cached bundles for ``title_ids`` once the current transaction commits."""
+
+        title_ids = {pk for pk in title_ids if pk is not None}
+        if title_ids:
+            transaction.on_commit(lambda: SummaryCache._bump([SummaryCache._generation_key(pk) for pk in title_ids]))
+
+    @staticmethod
+    def invalidate_all() -> None:
+        transaction.on_commit(lambda: SummaryCache._bump([GLOBAL_GENERATION_KEY]))
+
+    @staticmethod
+    def _read_generations(keys: list[str]) -> dict[str, int]:
+        cache = SummaryCache.generations()
+        generations = cache.get_many(keys, version=PAYLOAD_VERSION)
+        missing = [key for key in keys if key not in generations]
+        if missing:
+            # add() keeps a value another worker seeded first; read back whichever won.
+            for key in missing:
+                cache.add(key, _fresh_generation(), timeout=None, version=PAYLOAD_VERSION)
+            generations.update(cache.get_many(missing, version=PAYLOAD_VERSION))
+        return generations
+
+    @staticmethod
+    def _bump(keys: list[str]) -> None:
+        cache = SummaryCache.generations()
+        for key in keys:
+            try:
+                cache.incr(key, version=PAYLOAD_VERSION)
+            except ValueError:
+                # Never read, or lost: any fresh value retires the keys built on the old one.
+                cache.add(key, _fresh_generation(), timeout=None, version=PAYLOAD_VERSION)
+        metrics.incr("summary_cache.invalidations", len(keys))
+
+    @staticmethod
+    def _generation_key(title_id: int) -> str:
+        return f"summary:generation:{title_id}"
+
+
+def _fresh_generation() -> int:
+    # Far below 2**64 so backends with unsigned 64-bit counters can keep incrementing.
+    return random.getrandbits(48)
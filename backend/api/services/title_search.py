@@ -0,0 +1,180 @@
+"""Prefix, substring and fuzzy title search backed by trigram indexes."""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+
+from django.db import connection
+from django.db.models import BooleanField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from ..models import Title
+
+DEFAULT_LIMIT = 8
+# Trigram indexes cannot answer anything shorter; such queries match name prefixes only.
+MIN_SUBSTRING_LENGTH = 3
+# Fuzzy lookups split the query in two so one typo leaves a half intact; each half needs a trigram.
+MIN_FUZZY_LENGTH = 6
+# Rows taken from the substring and fuzzy lookups for re-ranking.
+CANDIDATES = 50
+# Minimum trigram similarity of a fuzzy match (pg_trgm's default threshold).
+FUZZY_THRESHOLD = 0.3
+# Upper bound of the name-prefix range: no character sorts after it in code point order.
+PREFIX_END = "\U0010ffff"
+SEARCH_TABLE = "api_title_search"
+
+# Raw rather than ORM: compiling the queryset cost more than running it.
+PREFIX_SQL = """
+SELECT * FROM {title}
+WHERE LOWER(name) >= %s AND LOWER(name) < %s AND LOWER(name) LIKE %s ESCAPE '\\'
+ORDER BY LOWER(name), id
+LIMIT %s
+"""
+# Postgres compares in the database collation unless told otherwise; the range
+# needs code point order, which "C" gives and title_name_lower_idx is built in.
+POSTGRES_PREFIX_SQL = """
+SELECT * FROM {title}
+WHERE LOWER(name) COLLATE "C" >= %s AND LOWER(name) COLLATE "C" < %s AND LOWER(name) LIKE %s ESCAPE '\\'
+ORDER BY LOWER(name) COLLATE "C", id
+LIMIT %s
+"""
+SQLITE_MATCH_SQL = """
+SELECT t.* FROM {search} s JOIN {title} t ON t.id = s.rowid
+WHERE {search} MATCH %s
+LIMIT %s
+"""
+POSTGRES_SUBSTRING_SQL = "SELECT * FROM {title} WHERE name ILIKE %s OR author ILIKE %s LIMIT %s"
+POSTGRES_FUZZY_SQL = """
+SELECT * FROM {title}
+WHERE %s <%% name OR %s <%% author
+ORDER BY GREATEST(word_similarity(%s, name), word_similarity(%s, author)) DESC
+LIMIT %s
+"""
+
+
+class TitleSearch:
+    """Find titles by name or author for autocomplete and duplicate checks.
+
+    Matches come in tiers: name prefixes (an expression index on ``lower(name)``),
+    then substrings of the name or author and, when neither finds anything,
+    fuzzy matches that tolerate a typo. The last two use the FTS5 trigram table
+    on SQLite and ``pg_trgm`` GIN indexes on Postgres. Substrings are only
+    looked up while the page is not full, so most keystrokes cost one index range.
+    """
+
+    @staticmethod
+    def search(query: str, limit: int = DEFAULT_LIMIT) -> list[Title]:
+        """Return up to ``limit`` titles matching ``query``, best tier first, then by similarity."""
+
+        query = " ".join(query.split())
+        if not query:
+            return []
+        tiers: dict[int, tuple[int, Title]] = {}
+
+        def collect(tier: int, titles: Iterable[Title]) -> None:
+            for title in titles:
+                tiers.setdefault(title.pk, (tier, title))
+
+        collect(0, TitleSearch._prefix(query, limit))
+        if len(tiers) < limit and len(query) >= MIN_SUBSTRING_LENGTH:
+            collect(1, TitleSearch._substring(query))
+        grams = trigrams(query)
+        if not tiers and len(query) >= MIN_FUZZY_LENGTH:
+            collect(2, (title for title in TitleSearch._fuzzy(query) if _title_similarity(grams, title) >= FUZZY_THRESHOLD))
+        ranked = sorted(
+            tiers.values(),
+            key=lambda item: (item[0], -_title_similarity(grams, item[1]), item[1].name.lower(), item[1].pk),
+        )
+        return [title for _, title in ranked[:limit]]
+
+    @staticmethod
+    def filter(queryset: QuerySet[Title], query: str) -> QuerySet[Title]:
+        """Narrow ``queryset`` to every title whose name or author contains ``query``, through the index."""
+
+        if len(query) < MIN_SUBSTRING_LENGTH or connection.vendor not in {"sqlite", "postgresql"}:
+            return queryset.filter(Q(name__icontains=query) | Q(author__icontains=query))
+        if connection.vendor == "sqlite":
+            search = connection.ops.quote_name(SEARCH_TABLE)
+            return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {search} WHERE {search} MATCH %s", [_phrase(query)]))
+        table = connection.ops.quote_name(Title._meta.db_table)
+        pattern = f"%{_escape_like(query)}%"
+        condition = f"{table}.name ILIKE %s OR {table}.author ILIKE %s"
+        return queryset.filter(RawSQL(condition, [pattern, pattern], output_field=BooleanField()))
+
+    @staticmethod
+    def optimize() -> None:
+        """Merge the search index into as few segments as possible, e.g. after a bulk import.
+
+        FTS5 merges incrementally as titles are written, but a large load leaves
+        many segments behind and every lookup visits each of them. Postgres GIN
+        indexes need no such step.
+        """
+
+        if connection.vendor == "sqlite":
+            search = connection.ops.quote_name(SEARCH_TABLE)
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {search} ({search}) VALUES ('optimize')")
+
+    @staticmethod
+    def _prefix(query: str, limit: int) -> list[Title]:
+        prefix = query.lower()
+        template = POSTGRES_PREFIX_SQL if connection.vendor == "postgresql" else PREFIX_SQL
+        return TitleSearch._raw(template, [prefix, prefix + PREFIX_END, f"{_escape_like(prefix)}%", limit])
+
+    @staticmethod
+    def _substring(query: str) -> list[Title]:
+        if connection.vendor == "sqlite":
+            return TitleSearch._raw(SQLITE_MATCH_SQL, [_phrase(query), CANDIDATES])
+        if connection.vendor == "postgresql":
+            pattern = f"%{_escape_like(query)}%"
+            return TitleSearch._raw(POSTGRES_SUBSTRING_SQL, [pattern, pattern, CANDIDATES])
+        return list(TitleSearch.filter(Title.objects.order_by(), query)[:CANDIDATES])
+
+    @staticmethod
+    def _fuzzy(query: str) -> list[Title]:
+        if connection.vendor == "sqlite":
+            half = len(query) // 2
+            return TitleSearch._raw(SQLITE_MATCH_SQL, [f"{_phrase(query[:half])} OR {_phrase(query[half:])}", CANDIDATES])
+        if connection.vendor == "postgresql":
+            return TitleSearch._raw(POSTGRES_FUZZY_SQL, [query, query, query, query, CANDIDATES])
+        return []
+
+    @staticmethod
+    def _raw(template: str, params: list) -> list[Title]:
+        quote = connection.ops.quote_name
+        sql = template.format(title=quote(Title._meta.db_table), search=quote(SEARCH_TABLE))
+        return list(Title.objects.raw(sql, params))
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the trigrams of ``text`` the way ``pg_trgm`` builds them: per word, lowercased and space-padded."""
+
+    grams: set[str] = set()
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def similarity(left: str | set[str], right: str | set[str]) -> float:
+    """Share of trigrams the two strings (or trigram sets) have in common (``pg_trgm``'s ``similarity``)."""
+
+    left_grams = trigrams(left) if isinstance(left, str) else left
+    right_grams = trigrams(right) if isinstance(right, str) else right
+    if not left_grams or not right_grams:
+        return 0.0
+    return len(left_grams & right_grams) / len(left_grams | right_grams)
+
+
+def _title_similarity(grams: set[str], title: Title) -> float:
+    return max(similarity(grams, title.name), similarity(grams, title.author))
+
+
+def _phrase(text: str) -> str:
+    # An FTS5 string: trigram tokens match it as a substring, quotes are doubled.
+    return '"{}"'.format(text.replace('"', '""'))
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -0,0 +1,80 @@
+"""Verification and repair of the recap statistics maintained on ``Title``."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+
+from ..models import Recap, Title
+
+# Titles checked per transaction.
+BATCH_SIZE = 1000
+
+# Stored statistics next to the ones implied by ``Recap`` rows, for a range of titles.
+# The count and the top recap both read ``recap_title_rank_idx``.
+VERIFY_SQL = """
+SELECT t.id, t.recap_count, t.top_recap_id,
+       (SELECT COUNT(*) FROM {recap} r WHERE r.title_id = t.id),
+       (SELECT r.id FROM {recap} r WHERE r.title_id = t.id
+        ORDER BY r.score DESC, r.created_at DESC, r.id DESC LIMIT 1)
+FROM {title} t
+WHERE t.id > %s
+ORDER BY t.id
+LIMIT %s
+"""
+
+
+@dataclass(frozen=True)
+class Drift:
+    title_id: int
+    stored: tuple[int, int | None]
+    actual: tuple[int, int | None]
+
+
+@dataclass
+class RepairReport:
+    checked: int = 0
+    drifted: list[Drift] = field(default_factory=list)
+
+
+class TitleStats:
+    """Check ``Title.recap_count`` and ``Title.top_recap`` against the recaps themselves.
+
+    Triggers on ``api_recap`` keep both current, so drift needs a write made
+    with the triggers disabled or, on Postgres, concurrent score changes on one
+    title that each ranked the recaps without seeing the other's.
+    """
+
+    @staticmethod
+    def repair(batch_size: int = BATCH_SIZE, dry_run: bool = False) -> RepairReport:
+        """Walk every title in ID order and fix (or, with ``dry_run``, only report) drift."""
+
+        report = RepairReport()
+        after = 0
+        while True:
+            with transaction.atomic():
+                rows = TitleStats._verify(after, batch_size)
+                drifted = [
+                    Drift(title_id=pk, stored=(count, top), actual=(actual_count, actual_top))
+                    for pk, count, top, actual_count, actual_top in rows
+                    if (count, top) != (actual_count, actual_top)
+                ]
+                if not dry_run:
+                    for drift in drifted:
+                        Title.objects.filter(pk=drift.title_id).update(
+                            recap_count=drift.actual[0], top_recap_id=drift.actual[1]
+                        )
+            report.checked += len(rows)
+            report.drifted += drifted
+            if len(rows) < batch_size:
+                return report
+            after = rows[-1][0]
+
+    @staticmethod
+    def _verify(after: int, limit: int) -> list[tuple]:
+        quote = connection.ops.quote_name
+        sql = VERIFY_SQL.format(title=quote(Title._meta.db_table), recap=quote(Recap._meta.db_table))
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [after, limit])
+            return cursor.fetchall()
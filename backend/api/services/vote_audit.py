@@ -0,0 +1,131 @@
+"""Incremental audit of recap vote counters against ``Vote`` rows."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .. import metrics
+from ..models import Checkpoint, Recap, RecapCounterShard, Vote, VoteChange
+from .vote_metrics import VoteMetricsRefresher
+
+CHECKPOINT_NAME = "vote_audit"
+# Journal rows consumed per transaction.
+BATCH_SIZE = 1000
+# Changes younger than this are left for the next run: buffered counter deltas
+# may not be flushed yet.
+SETTLE_SECONDS = 60
+
+# Stored counters (columns plus unrolled slots) next to the totals implied by votes.
+AUDIT_SQL = """
+SELECT r.id,
+       r.score + COALESCE(s.score, 0), r.upvotes + COALESCE(s.upvotes, 0), r.downvotes + COALESCE(s.downvotes, 0),
+       COALESCE(v.score, 0), COALESCE(v.upvotes, 0), COALESCE(v.downvotes, 0)
+FROM {recap} r
+LEFT JOIN (
+    SELECT recap_id, SUM(value) AS score,
+           COUNT(CASE WHEN value = 1 THEN 1 END) AS upvotes,
+           COUNT(CASE WHEN value = -1 THEN 1 END) AS downvotes
+    FROM {vote} WHERE recap_id IN ({recap_ids}) GROUP BY recap_id
+) v ON v.recap_id = r.id
+LEFT JOIN (
+    SELECT recap_id, SUM(score) AS score, SUM(upvotes) AS upvotes, SUM(downvotes) AS downvotes
+    FROM {shard} WHERE recap_id IN ({recap_ids}) GROUP BY recap_id
+) s ON s.recap_id = r.id
+WHERE r.id IN ({recap_ids})
+"""
+
+metrics.register("vote_audit.checked", "vote_audit.drifted")
+
+
+@dataclass(frozen=True)
+class Drift:
+    recap_id: int
+    stored: tuple[int, int, int]
+    actual: tuple[int, int, int]
+
+
+@dataclass
+class AuditReport:
+    checked: int = 0
+    drifted: list[Drift] = field(default_factory=list)
+    watermark: int = 0
+
+
+class VoteCounterAuditor:
+    """Re-verify only the recaps that changed since the last run.
+
+    Vote writes append the recap to the ``VoteChange`` journal, which works as
+    a queue: each run reads every settled row still in it, compares those
+    recaps' counters with their votes, repairs any drift and deletes exactly
+    the rows it consumed, one batch per transaction. A row whose transaction
+    commits after rows with higher primary keys is simply read by a later run.
+    The ``Checkpoint`` records the highest change consumed, for reporting.
+    """
+
+    @staticmethod
+    def run(batch_size: int = BATCH_SIZE, settle: float = SETTLE_SECONDS, repair: bool = True) -> AuditReport:
+        """Audit journalled changes older than ``settle`` seconds and return what was found.
+
+        With ``repair=False`` drift is only reported, and the journal and the
+        watermark are left untouched so a later run sees the same changes.
+        """
+
+        checkpoint, _ = Checkpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        report = AuditReport(watermark=checkpoint.position)
+        cutoff = timezone.now() - timedelta(seconds=settle)
+        # Pages through this run's rows; the next run starts from the front of the journal again.
+        after = 0
+        while True:
+            with transaction.atomic():
+                settled = list(
+                    VoteChange.objects.filter(pk__gt=after, changed_at__lte=cutoff)
+                    .order_by("pk")
+                    .values_list("pk", "recap_id")[:batch_size]
+                )
+                if not settled:
+                    break
+                drifted = VoteCounterAuditor.verify(sorted({recap_id for _, recap_id in settled}))
+                after = settled[-1][0]
+                watermark = max(report.watermark, after)
+                if repair:
+                    if drifted:
+                        VoteMetricsRefresher.refresh_chunk([drift.recap_id for drift in drifted])
+                    VoteChange.objects.filter(pk__in=[pk for pk, _ in settled]).delete()
+                    Checkpoint.objects.filter(pk=checkpoint.pk).update(position=watermark, updated_at=timezone.now())
+            report.checked += len({recap_id for _, recap_id in settled})
+            report.drifted += drifted
+            report.watermark = watermark
+            if len(settled) < batch_size:
+                break
+
+        metrics.incr("vote_audit.checked", report.checked)
+        if report.drifted:
+            metrics.incr("vote_audit.drifted", len(report.drifted))
+        return report
+
+    @staticmethod
+    def verify(recap_ids: list[int]) -> list[Drift]:
+        """Return the recaps among ``recap_ids`` whose stored counters disagree with their votes."""
+
+        if not recap_ids:
+            return []
+        quote = connection.ops.quote_name
+        sql = AUDIT_SQL.format(
+            recap=quote(Recap._meta.db_table),
+            vote=quote(Vote._meta.db_table),
+            shard=quote(RecapCounterShard._meta.db_table),
+            recap_ids=", ".join(["%s"] * len(recap_ids)),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, recap_ids * 3)
+            rows = cursor.fetchall()
+        return [
+            Drift(recap_id=row[0], stored=tuple(row[1:4]), actual=tuple(row[4:7]))
+            for row in rows
+            if tuple(row[1:4]) != tuple(row[4:7])
+        ]
+
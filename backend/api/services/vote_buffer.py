@@ -0,0 +1,198 @@
+"""Write-behind buffer for recap vote counters."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .. import metrics
+from ..models import Recap
+from .summary_cache import SummaryCache
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("score", "upvotes", "downvotes")
+
+# Coalesced deltas for many recaps in one statement. The derived table is a
+# UNION ALL of typed SELECTs because SQLite cannot alias VALUES columns.
+FLUSH_SQL = """
+UPDATE {recap} SET
+    score = {recap}.score + d.score,
+    upvotes = {recap}.upvotes + d.upvotes,
+    downvotes = {recap}.downvotes + d.downvotes
+FROM ({rows}) d
+WHERE {recap}.id = d.recap_id
+"""
+# Recaps per statement; four parameters each keeps well under SQLite's limit.
+FLUSH_CHUNK_SIZE = 200
+FLUSH_ROW_SQL = (
+    "SELECT CAST(%s AS BIGINT) AS recap_id, CAST(%s AS INTEGER) AS score,"
+    " CAST(%s AS INTEGER) AS upvotes, CAST(%s AS INTEGER) AS downvotes"
+)
+
+metrics.register("vote_buffer.flushes", "vote_buffer.flushed_recaps", "vote_buffer.buffered_votes")
+
+
+class VoteCounterBuffer:
+    """Per-process buffer of counter deltas, flushed to ``Recap`` on a short interval.
+
+    ``Vote`` rows are still written synchronously; only the contended counter
+    ``UPDATE`` on hot recaps is deferred and coalesced, so many votes on one recap
+    become a single row update per flush. Pending deltas are visible only to the
+    worker holding them, which merges them into its own reads. Deltas lost in a
+    crash are recoverable from ``Vote`` rows with ``refresh_vote_metrics``.
+    """
+
+    _lock = threading.Lock()
+    # Serialises flushes so a caller of ``flush()`` returns only after earlier deltas are written.
+    _flush_lock = threading.Lock()
+    _pending: dict[int, list[int]] = {}
+    _titles: dict[int, int] = {}
+    _flusher: threading.Thread | None = None
+
+    @classmethod
+    def add(cls, recap_id: int, title_id: int, deltas: dict[str, int]) -> None:
+        with cls._lock:
+            pending = cls._pending.setdefault(recap_id, [0, 0, 0])
+            for index, field in enumerate(COUNTER_FIELDS):
+                pending[index] += deltas.get(field, 0)
+            cls._titles[recap_id] = title_id
+        metrics.incr("vote_buffer.buffered_votes")
+        cls._ensure_flusher()
+
+    @classmethod
+    def pending(cls, recap_ids: Iterable[int]) -> dict[int, tuple[int, int, int]]:
+        with cls._lock:
+            return {pk: tuple(cls._pending[pk]) for pk in recap_ids if pk in cls._pending}
+
+    @classmethod
+    def merge_counters(cls, recap_id: int, counters: Iterable[int]) -> tuple[int, int, int]:
+        """Return ``counters`` (score, upvotes, downvotes) plus any pending deltas."""
+
+        pending = cls.pending([recap_id]).get(recap_id, (0, 0, 0))
+        return tuple(value + delta for value, delta in zip(counters, pending))
+
+    @classmethod
+    def current_counters(cls, recap_id: int) -> tuple[int, int, int]:
+        """Return the stored counters of ``recap_id`` plus this worker's pending deltas.
+
+        Both are read under the flush lock, so a concurrent flush cannot move
+        deltas into the row between the two reads and have them counted twice
+        or not at all. Call it outside a transaction: a flush waiting on the
+        caller's row locks would otherwise stall it.
+        """
+
+        with cls._flush_lock:
+            stored = Recap.objects.filter(pk=recap_id).values_list(*COUNTER_FIELDS).get()
+            return cls.merge_counters(recap_id, stored)
+
+    @classmethod
+    def discard(cls, recap_ids: Iterable[int]) -> None:
+        """Drop the pending deltas of ``recap_ids``, e.g. after their counters were recomputed from votes."""
+
+        with cls._lock:
+            for pk in recap_ids:
+                cls._pending.pop(pk, None)
+                cls._titles.pop(pk, None)
+
+    @classmethod
+    def merge_into(cls, recaps: list[dict[str, Any] | None]) -> list[dict[str, Any] | None]:
+        """Return serialized recaps with pending deltas applied (copies only where changed)."""
+
+        if not cls._pending:
+            return recaps
+        pending = cls.pending(recap["id"] for recap in recaps if recap)
+        if not pending:
+            return recaps
+        merged = []
+        for recap in recaps:
+            if recap and recap["id"] in pending:
+                deltas = zip(COUNTER_FIELDS, pending[recap["id"]])
+                recap = {**recap, **{field: recap[field] + delta for field, delta in deltas}}
+            merged.append(recap)
+        return merged
+
+    @classmethod
+    def flush(cls) -> int:
+        """Write all pending deltas in one transaction and return the number of recaps updated."""
+
+        with cls._flush_lock:
+            return cls._flush()
+
+    @classmethod
+    def _flush(cls) -> int:
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+            titles, cls._titles = cls._titles, {}
+        batch = {pk: deltas for pk, deltas in pending.items() if any(deltas)}
+        if not batch:
+            return 0
+        try:
+            with transaction.atomic():
+                write_counter_deltas(batch)
+                SummaryCache.invalidate(titles[pk] for pk in batch)
+        except Exception:
+            # Put the deltas back so the next flush retries them.
+            with cls._lock:
+                for pk, deltas in batch.items():
+                    current = cls._pending.setdefault(pk, [0, 0, 0])
+                    for index, delta in enumerate(deltas):
+                        current[index] += delta
+                    cls._titles[pk] = titles[pk]
+            raise
+        metrics.incr("vote_buffer.flushes")
+        metrics.incr("vote_buffer.flushed_recaps", len(batch))
+        return len(batch)
+
+    @classmethod
+    def _ensure_flusher(cls) -> None:
+        interval = getattr(settings, "VOTE_BUFFER_FLUSH_INTERVAL", 1.0)
+        if interval <= 0 or (cls._flusher and cls._flusher.is_alive()):
+            return
+        with cls._lock:
+            if cls._flusher and cls._flusher.is_alive():
+                return
+            cls._flusher = threading.Thread(
+                target=cls._flush_forever, args=(interval,), name="vote-counter-flusher", daemon=True
+            )
+            cls._flusher.start()
+
+    @classmethod
+    def _flush_forever(cls, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                cls.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered vote counters; will retry.")
+
+
+def write_counter_deltas(deltas: dict[int, Sequence[int]]) -> None:
+    """Add ``{recap_id: (score, upvotes, downvotes)}`` deltas to ``Recap`` rows, a chunk per statement."""
+
+    # Sorted so concurrent writers lock recap rows in the same order.
+    recap_ids = sorted(deltas)
+    with connection.cursor() as cursor:
+        for start in range(0, len(recap_ids), FLUSH_CHUNK_SIZE):
+            chunk = recap_ids[start : start + FLUSH_CHUNK_SIZE]
+            sql = FLUSH_SQL.format(
+                recap=connection.ops.quote_name(Recap._meta.db_table),
+                rows=" UNION ALL ".join([FLUSH_ROW_SQL] * len(chunk)),
+            )
+            cursor.execute(sql, [value for pk in chunk for value in (pk, *deltas[pk])])
+
+
+@atexit.register
+def _flush_at_exit() -> None:  # pragma: no cover - process shutdown
+    try:
+        VoteCounterBuffer.flush()
+    except Exception:
+        logger.exception("Failed to flush buffered vote counters at exit.")
@@ -0,0 +1,227 @@
+"""Set-based, chunked and resumable recomputation of recap vote counters."""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q, QuerySet
+from django.utils import timezone
+
+from ..models import Checkpoint, Recap, Vote, VoteChange
+from .counter_shards import ShardedVoteCounters
+from .summary_cache import SummaryCache
+from .vote_buffer import VoteCounterBuffer
+
+# Recompute a chunk of recaps from their votes in one statement, touching only
+# rows whose counters drifted. UPDATE ... FROM needs SQLite >= 3.33.
+REFRESH_SQL = """
+UPDATE {recap} SET score = d.score, upvotes = d.upvotes, downvotes = d.downvotes
+FROM (
+    SELECT r.id AS recap_id,
+           COALESCE(SUM(v.value), 0) AS score,
+           COUNT(CASE WHEN v.value = 1 THEN 1 END) AS upvotes,
+           COUNT(CASE WHEN v.value = -1 THEN 1 END) AS downvotes
+    FROM {recap} r LEFT JOIN {vote} v ON v.recap_id = r.id
+    WHERE r.id IN ({recap_ids})
+    GROUP BY r.id
+) d
+WHERE {recap}.id = d.recap_id
+  AND ({recap}.score <> d.score OR {recap}.upvotes <> d.upvotes OR {recap}.downvotes <> d.downvotes)
+"""
+# Recaps per statement and per transaction.
+CHUNK_SIZE = 1000
+# Checkpoints are named ``<prefix>:<run>:<first id>:<last id>``, one per unfinished
+# key range, and carry the run's filter in ``params``.
+CHECKPOINT_PREFIX = "refresh_vote_metrics"
+
+
+@dataclass
+class RefreshTotals:
+    processed: int = 0
+    corrected: int = 0
+
+
+ProgressCallback = Callable[[RefreshTotals], None]
+
+
+class VoteMetricsRefresher:
+    """Rebuild ``Recap`` score/upvote/downvote columns from ``Vote`` rows.
+
+    Recaps are walked in primary-key order, a chunk per transaction, so memory
+    and lock time stay bounded however many recaps there are. Whole-table or
+    queryset runs split the key space into ranges, one per worker thread, and
+    record progress per range in ``Checkpoint`` rows keyed by run; a run that
+    stopped midway can continue with ``resume=True`` and the same filter
+    instead of starting over, and concurrent runs never touch each other's
+    ranges.
+    """
+
+    @staticmethod
+    def refresh(
+        recaps: QuerySet[Recap] | Iterable[int] | None = None,
+        *,
+        since: datetime | None = None,
+        chunk_size: int = CHUNK_SIZE,
+        workers: int = 1,
+        resume: bool = False,
+        progress: ProgressCallback | None = None,
+    ) -> RefreshTotals:
+        """Recompute counters for ``recaps`` (all recaps when ``None``) and return the totals.
+
+        ``since`` limits the run to ``changed_since(since)`` instead. ``progress``
+        is called with the running totals after every chunk. An explicit list
+        of IDs is processed serially and without checkpoints.
+        """
+
+        if since is not None and recaps is not None:
+            raise ValueError("Pass either recaps or since, not both.")
+        # Deltas still buffered here would be written on top of the recomputed counters.
+        VoteCounterBuffer.flush()
+        totals = RefreshTotals()
+        lock = threading.Lock()
+
+        def report(processed: int, corrected: int) -> None:
+            with lock:
+                totals.processed += processed
+                totals.corrected += corrected
+                if progress:
+                    progress(totals)
+
+        if recaps is not None and not isinstance(recaps, QuerySet):
+            recap_ids = sorted(set(recaps))
+            for start in range(0, len(recap_ids), chunk_size):
+                chunk = recap_ids[start : start + chunk_size]
+                with transaction.atomic():
+                    report(len(chunk), VoteMetricsRefresher.refresh_chunk(chunk))
+        else:
+            if since is not None:
+                queryset = VoteMetricsRefresher.changed_since(since)
+                params = {"since": since.isoformat()}
+            elif recaps is not None:
+                queryset = recaps
+                params = {"query": str(recaps.query)}
+            else:
+                queryset = Recap.objects.all()
+                params = {}
+            started = timezone.now()
+            ranges = VoteMetricsRefresher._unfinished_ranges(params) if resume else []
+            if not ranges:
+                ranges = VoteMetricsRefresher._plan_ranges(queryset, max(1, workers), params)
+
+            def run(checkpoint: Checkpoint) -> None:
+                VoteMetricsRefresher._refresh_range(queryset, checkpoint, chunk_size, report)
+
+            if workers <= 1 or len(ranges) <= 1:
+                for checkpoint in ranges:
+                    run(checkpoint)
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh-votes") as pool:
+                    # list() re-raises the first failure from a worker.
+                    list(pool.map(lambda checkpoint: _in_own_connection(run, checkpoint), ranges))
+            # This run covered everything an older, abandoned run with the same
+            # filter still had to do. Runs that are still moving are left alone.
+            VoteMetricsRefresher._checkpoints(params).filter(updated_at__lt=started).delete()
+
+        if totals.corrected:
+            SummaryCache.invalidate_all()
+        return totals
+
+    @staticmethod
+    def changed_since(since: datetime) -> QuerySet[Recap]:
+        """Return the recaps created, or whose votes changed, at or after ``since``.
+
+        Vote inserts, flips and deletions are read from the ``VoteChange``
+        journal. The auditor prunes the journal once it has verified a change,
+        so a recap missing from it because of that needs no refresh.
+        """
+
+        changed = VoteChange.objects.filter(changed_at__gte=since).values("recap_id")
+        return Recap.objects.filter(Q(created_at__gte=since) | Q(pk__in=changed))
+
+    @staticmethod
+    def _plan_ranges(queryset: QuerySet[Recap], parts: int, params: dict[str, Any]) -> list[Checkpoint]:
+        """Split the key space of ``queryset`` into ``parts`` ranges under a new run key."""
+
+        bounds = queryset.aggregate(low=Min("pk"), high=Max("pk"))
+        if bounds["low"] is None:
+            return []
+        run = uuid.uuid4().hex[:12]
+        low, high = bounds["low"], bounds["high"]
+        step = -(-(high - low + 1) // parts)
+        return [
+            Checkpoint.objects.create(
+                name=f"{CHECKPOINT_PREFIX}:{run}:{start}:{min(start + step - 1, high)}",
+                position=start - 1,
+                params=params,
+            )
+            for start in range(low, high + 1, step)
+        ]
+
+    @staticmethod
+    def _unfinished_ranges(params: dict[str, Any]) -> list[Checkpoint]:
+        """Return the unfinished ranges of the most recently active run with the same filter."""
+
+        latest = VoteMetricsRefresher._checkpoints(params).order_by("-updated_at").first()
+        if latest is None:
+            return []
+        run = latest.name.split(":")[1]
+        return list(Checkpoint.objects.filter(name__startswith=f"{CHECKPOINT_PREFIX}:{run}:").order_by("position"))
+
+    @staticmethod
+    def _checkpoints(params: dict[str, Any]) -> QuerySet[Checkpoint]:
+        # Compared in Python: JSON equality in SQL differs between backends.
+        checkpoints = Checkpoint.objects.filter(name__startswith=f"{CHECKPOINT_PREFIX}:")
+        return checkpoints.filter(pk__in=[pk for pk, stored in checkpoints.values_list("pk", "params") if stored == params])
+
+    @staticmethod
+    def _refresh_range(
+        queryset: QuerySet[Recap], checkpoint: Checkpoint, chunk_size: int, report: Callable[[int, int], None]
+    ) -> None:
+        last = int(checkpoint.name.rsplit(":", 1)[1])
+        position = checkpoint.position
+        while True:
+            chunk = list(
+                queryset.filter(pk__gt=position, pk__lte=last)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk_size]
+            )
+            if not chunk:
+                break
+            with transaction.atomic():
+                corrected = VoteMetricsRefresher.refresh_chunk(chunk)
+                Checkpoint.objects.filter(pk=checkpoint.pk).update(position=chunk[-1], updated_at=timezone.now())
+            position = chunk[-1]
+            report(len(chunk), corrected)
+        checkpoint.delete()
+
+    @staticmethod
+    def refresh_chunk(recap_ids: list[int]) -> int:
+        """Recompute ``recap_ids`` in one statement and return how many of them had drifted."""
+
+        # Recomputed totals already include votes whose deltas still sit in counter slots
+        # or arrived in this worker's buffer since the refresh flushed it.
+        ShardedVoteCounters.discard(recap_ids)
+        VoteCounterBuffer.discard(recap_ids)
+        quote = connection.ops.quote_name
+        sql = REFRESH_SQL.format(
+            recap=quote(Recap._meta.db_table),
+            vote=quote(Vote._meta.db_table),
+            recap_ids=", ".join(["%s"] * len(recap_ids)),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, recap_ids)
+            return cursor.rowcount
+
+
+def _in_own_connection(func: Callable[[Checkpoint], None], checkpoint: Checkpoint) -> None:
+    try:
+        func(checkpoint)
+    finally:
+        connection.close()
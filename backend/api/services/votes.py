@@ -2,12 +2,94 @@
 
 from __future__ import annotations
 
-from typing import Any, Iterable
+from collections.abc import Iterable
+from typing import Any
 
-from django.db import transaction
-from django.db.models import F, Case, IntegerField, QuerySet, Sum, When
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
 
 from ..models import Recap, Vote
+from .counter_shards import ShardedVoteCounters
+from .leaderboards import Leaderboards
+from .summary_cache import SummaryCache
+from .vote_buffer import COUNTER_FIELDS, VoteCounterBuffer
+from .vote_metrics import RefreshTotals, VoteMetricsRefresher
+
+# Counter columns adjusted from a ``delta(old_value, new_value)`` relation, where
+# either side is NULL when there was (or will be) no vote.
+COUNTER_ASSIGNMENTS = """
+    score = score + COALESCE(d.new_value, 0) - COALESCE(d.old_value, 0),
+    upvotes = upvotes
+        + CASE WHEN d.new_value = 1 THEN 1 ELSE 0 END - CASE WHEN d.old_value = 1 THEN 1 ELSE 0 END,
+    downvotes = downvotes
+        + CASE WHEN d.new_value = -1 THEN 1 ELSE 0 END - CASE WHEN d.old_value = -1 THEN 1 ELSE 0 END
+"""
+
+# Postgres: upsert the vote and adjust the recap's counters in one statement.
+# ``xmax = 0`` tells a fresh insert from a row the ``ON CONFLICT`` branch updated,
+# even when that row was inserted by a concurrent statement after this one took
+# its snapshot; a separate read of the previous vote would not see it. Votes
+# are +1/-1 and the update only fires on a change, so an updated row held the
+# opposite value. No row comes back when the vote did not change.
+PG_UPSERT_SQL = """
+WITH written AS (
+    INSERT INTO {vote} (recap_id, user_id, value, created_at)
+    VALUES (%(recap)s, %(user)s, %(value)s, %(now)s)
+    ON CONFLICT (recap_id, user_id) DO UPDATE SET value = EXCLUDED.value
+    WHERE {vote}.value <> EXCLUDED.value
+    RETURNING value, (xmax = 0) AS inserted
+), delta AS (
+    SELECT CASE WHEN inserted THEN NULL ELSE -value END AS old_value, value AS new_value
+    FROM written
+)
+UPDATE {recap} SET {assignments}
+FROM delta d
+WHERE {recap}.id = %(recap)s
+RETURNING {recap}.score, {recap}.upvotes, {recap}.downvotes
+"""
+
+PG_DELETE_SQL = """
+WITH delta AS (
+    DELETE FROM {vote} WHERE recap_id = %(recap)s AND user_id = %(user)s
+    RETURNING value AS old_value, NULL::smallint AS new_value
+)
+UPDATE {recap} SET {assignments}
+FROM delta d
+WHERE {recap}.id = %(recap)s
+RETURNING {recap}.score, {recap}.upvotes, {recap}.downvotes
+"""
+
+# Portable RETURNING path (SQLite >= 3.35): one statement writes the vote, one
+# adjusts the counters. Votes are +1/-1, so an update that changed the value
+# implies the previous value was the opposite one.
+INSERT_VOTE_SQL = """
+INSERT INTO {vote} (recap_id, user_id, value, created_at) VALUES (%s, %s, %s, %s)
+ON CONFLICT (recap_id, user_id) DO NOTHING
+RETURNING value
+"""
+FLIP_VOTE_SQL = "UPDATE {vote} SET value = %s WHERE recap_id = %s AND user_id = %s AND value <> %s RETURNING value"
+DELETE_VOTE_SQL = "DELETE FROM {vote} WHERE recap_id = %s AND user_id = %s RETURNING value"
+COUNTER_UPDATE_SQL = """
+UPDATE {recap} SET {assignments}
+FROM (SELECT %s AS old_value, %s AS new_value) d
+WHERE {recap}.id = %s
+RETURNING score, upvotes, downvotes
+"""
+
+
+COUNTER_MODES = ("direct", "buffered", "sharded")
+
+
+def counter_mode() -> str:
+    """Return how vote counters reach ``Recap`` rows (the ``VOTE_COUNTER_MODE`` setting)."""
+
+    mode = getattr(settings, "VOTE_COUNTER_MODE", "direct")
+    if mode not in COUNTER_MODES:
+        raise ImproperlyConfigured(f"VOTE_COUNTER_MODE must be one of {', '.join(COUNTER_MODES)}.")
+    return mode
 
 
 class VoteService:
@@ -15,15 +97,107 @@ class VoteService:
 
     @staticmethod
     def apply_vote(recap: Recap, user: Any, value: int) -> Recap:
-        with transaction.atomic():
-            deltas = VoteService._apply_vote_deltas(recap, user, value)
-            if deltas:
-                updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
-                if updates:
-                    Recap.objects.filter(pk=recap.pk).update(**updates)
-        recap.refresh_from_db()
+        """Record ``user``'s vote (``0`` removes it) and return ``recap`` with fresh counters.
+
+        The returned recap carries ``current_user_vote`` and can be serialized
+        directly, without re-reading it. In ``buffered`` and ``sharded`` counter
+        modes the vote row is written now and the counter deltas are handed to
+        ``VoteCounterBuffer`` or ``ShardedVoteCounters`` respectively. A changed
+        score is passed on to the leaderboards once the vote commits.
+        """
+
+        mode = counter_mode()
+        # No savepoint: when nested, a failed vote should abort the caller's transaction anyway.
+        with transaction.atomic(savepoint=False):
+            if mode != "direct":
+                deltas = VoteService._write_vote(recap, user, value)
+                counters = None
+                if mode == "sharded":
+                    if deltas:
+                        ShardedVoteCounters.add(recap.pk, deltas)
+                    counters = ShardedVoteCounters.totals(recap.pk)
+                elif deltas:
+                    transaction.on_commit(lambda: VoteCounterBuffer.add(recap.pk, recap.title_id, deltas))
+            elif connection.vendor == "postgresql":
+                counters = VoteService._apply_vote_postgres(recap.pk, user.pk, value)
+            elif connection.features.can_return_columns_from_insert:
+                counters = VoteService._apply_vote_returning(recap.pk, user.pk, value)
+            else:
+                counters = VoteService._apply_vote_orm(recap, user, value)
+        if mode == "buffered":
+            if connection.in_atomic_block:
+                # Still inside the caller's transaction: this vote is not buffered yet, and
+                # waiting for a flush could stall on the caller's locks. The counters are
+                # then approximate: the recap as loaded plus the pending deltas, which a
+                # flush since the load may already have written into the row.
+                counters = (recap.score, recap.upvotes, recap.downvotes)
+                counters = tuple(value + deltas.get(field, 0) for value, field in zip(counters, COUNTER_FIELDS))
+                counters = VoteCounterBuffer.merge_counters(recap.pk, counters)
+            else:
+                counters = VoteCounterBuffer.current_counters(recap.pk)
+        elif mode == "direct" and counters is not None:
+            SummaryCache.invalidate([recap.title_id])
+        if counters is not None:
+            recap.score, recap.upvotes, recap.downvotes = counters
+        changed = counters is not None if mode == "direct" else bool(deltas)
+        if changed:
+            # Outside the vote's transaction: boards are derived data that a rebuild can restore.
+            transaction.on_commit(lambda: Leaderboards.record(recap), robust=True)
+        recap.current_user_vote = value or None
         return recap
 
+    @staticmethod
+    def _apply_vote_postgres(recap_id: int, user_pk: Any, value: int) -> tuple[int, int, int] | None:
+        template = PG_DELETE_SQL if value == 0 else PG_UPSERT_SQL
+        params = {"recap": recap_id, "user": user_pk, "value": value, "now": timezone.now()}
+        with connection.cursor() as cursor:
+            cursor.execute(_format_sql(template), params)
+            return cursor.fetchone()
+
+    @staticmethod
+    def _apply_vote_returning(recap_id: int, user_pk: Any, value: int) -> tuple[int, int, int] | None:
+        old_value, new_value = VoteService._write_vote_returning(recap_id, user_pk, value)
+        if old_value == new_value:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(_format_sql(COUNTER_UPDATE_SQL), [old_value, new_value, recap_id])
+            return cursor.fetchone()
+
+    @staticmethod
+    def _write_vote(recap: Recap, user: Any, value: int) -> dict[str, int]:
+        """Write only the ``Vote`` row and return the counter deltas it implies."""
+
+        if not connection.features.can_return_columns_from_insert:
+            return VoteService._apply_vote_deltas(recap, user, value)
+        old_value, new_value = VoteService._write_vote_returning(recap.pk, user.pk, value)
+        if old_value == new_value:
+            return {}
+        return VoteService._delta_for_transition(old_value, new_value)
+
+    @staticmethod
+    def _write_vote_returning(recap_id: int, user_pk: Any, value: int) -> tuple[int | None, int | None]:
+        """Write the ``Vote`` row with RETURNING statements and return ``(old, new)`` values."""
+
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        with connection.cursor() as cursor:
+            if value == 0:
+                cursor.execute(_format_sql(DELETE_VOTE_SQL), [recap_id, user_pk])
+                row = cursor.fetchone()
+                return (row[0] if row else None), None
+            cursor.execute(_format_sql(INSERT_VOTE_SQL), [recap_id, user_pk, value, now])
+            if cursor.fetchone():
+                return None, value
+            cursor.execute(_format_sql(FLIP_VOTE_SQL), [value, recap_id, user_pk, value])
+            return (-value, value) if cursor.fetchone() else (value, value)
+
+    @staticmethod
+    def _apply_vote_orm(recap: Recap, user: Any, value: int) -> tuple[int, int, int] | None:
+        deltas = VoteService._apply_vote_deltas(recap, user, value)
+        if not deltas:
+            return None
+        Recap.objects.filter(pk=recap.pk).update(**{field: F(field) + delta for field, delta in deltas.items()})
+        return Recap.objects.filter(pk=recap.pk).values_list("score", "upvotes", "downvotes").get()
+
     @staticmethod
     def _apply_vote_deltas(recap: Recap, user: Any, value: int) -> dict[str, int]:
         vote = Vote.objects.select_for_update().filter(recap=recap, user=user).first()
@@ -47,39 +221,23 @@ class VoteService:
         return VoteService._delta_for_transition(None, value)
 
     @staticmethod
-    def refresh_vote_metrics(recaps: QuerySet[Recap] | Iterable[int] | None = None) -> None:
-        """Recalculate score/upvote/downvote totals for the provided recaps."""
-
-        if recaps is None:
-            queryset = Recap.objects.all()
-            recap_ids = list(queryset.values_list("pk", flat=True))
-        elif isinstance(recaps, QuerySet):
-            queryset = recaps
-            recap_ids = list(queryset.values_list("pk", flat=True))
-        else:
-            recap_ids = list(recaps)
+    def votes_for(user: Any, recap_ids: Iterable[int]) -> dict[int, int]:
+        """Return ``{recap_id: value}`` for the recaps in ``recap_ids`` that ``user`` voted on."""
 
+        recap_ids = list(recap_ids)
         if not recap_ids:
-            return
-
-        aggregates = (
-            Vote.objects.filter(recap_id__in=recap_ids)
-            .values("recap_id")
-            .annotate(
-                score_total=Sum("value"),
-                up_total=Sum(Case(When(value=Vote.UPVOTE, then=1), default=0, output_field=IntegerField())),
-                down_total=Sum(Case(When(value=Vote.DOWNVOTE, then=1), default=0, output_field=IntegerField())),
-            )
-        )
-
-        metrics = {entry["recap_id"]: entry for entry in aggregates}
-        for recap_id in recap_ids:
-            data = metrics.get(recap_id, {})
-            Recap.objects.filter(pk=recap_id).update(
-                score=data.get("score_total", 0) or 0,
-                upvotes=data.get("up_total", 0) or 0,
-                downvotes=data.get("down_total", 0) or 0,
-            )
+            return {}
+        return dict(Vote.objects.filter(user_id=user.pk, recap_id__in=recap_ids).values_list("recap_id", "value"))
+
+    @staticmethod
+    def refresh_vote_metrics(recaps: QuerySet[Recap] | Iterable[int] | None = None, **options: Any) -> RefreshTotals:
+        """Recalculate score/upvote/downvote totals for the provided recaps (all when ``None``).
+
+        ``options`` are passed to ``VoteMetricsRefresher.refresh`` (``since``
+        filter, chunk size, worker threads, resume and progress reporting).
+        """
+
+        return VoteMetricsRefresher.refresh(recaps, **options)
 
     @staticmethod
     def _delta_for_transition(old_value: int | None, new_value: int | None) -> dict[str, int]:
@@ -102,3 +260,12 @@ class VoteService:
             down_delta += 1
 
         return {k: v for k, v in {"score": score_delta, "upvotes": up_delta, "downvotes": down_delta}.items() if v}
+
+
+def _format_sql(template: str) -> str:
+    quote = connection.ops.quote_name
+    return template.format(
+        vote=quote(Vote._meta.db_table),
+        recap=quote(Recap._meta.db_table),
+        assignments=COUNTER_ASSIGNMENTS,
+    )
@@ -0,0 +1,89 @@
+"""Model signal handlers that keep derived API indexes in step with the catalog."""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Recap, Title, VoteChange
+from .services.sampler import TitleSampler
+from .services.summary_cache import SummaryCache
+
+
+@receiver(post_save, sender=Title, dispatch_uid="api.title_slot_save")
+def index_title(sender, instance: Title, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    if created:
+        TitleSampler.add(instance)
+    else:
+        TitleSampler.move(instance)
+
+
+@receiver(pre_delete, sender=Title, dispatch_uid="api.title_slot_delete")
+def unindex_title(sender, instance: Title, **kwargs) -> None:
+    TitleSampler.remove(instance)
+
+
+@receiver(post_save, sender=Title, dispatch_uid="api.title_summary_save")
+@receiver(post_delete, sender=Title, dispatch_uid="api.title_summary_delete")
+def invalidate_title_summary(sender, instance: Title, raw: bool = False, **kwargs) -> None:
+    if not raw:
+        SummaryCache.invalidate([instance.pk])
+
+
+# Columns of a saved recap whose previous values the post_save receivers compare against.
+TRACKED_RECAP_FIELDS = ("title", "score", "upvotes", "downvotes")
+
+
+@receiver(pre_save, sender=Recap, dispatch_uid="api.recap_previous_state")
+def remember_recap_state(sender, instance: Recap, update_fields=None, raw: bool = False, **kwargs) -> None:
+    # A recap moved to another title also changes the recap count of the title it left,
+    # and only a real change of its counters needs re-verifying by the vote auditor.
+    if raw or instance._state.adding or (update_fields is not None and not set(TRACKED_RECAP_FIELDS) & set(update_fields)):
+        return
+    instance._previous_state = (
+        Recap.objects.filter(pk=instance.pk).values("title_id", "score", "upvotes", "downvotes").first()
+    )
+
+
+@receiver(post_save, sender=Recap, dispatch_uid="api.recap_slot_save")
+def index_recapped_title(sender, instance: Recap, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    previous = (instance.__dict__.get("_previous_state") or {}).get("title_id")
+    if created:
+        TitleSampler.recaps_changed(instance.title_id)
+    elif previous is not None and previous != instance.title_id:
+        TitleSampler.recaps_changed(previous)
+        TitleSampler.recaps_changed(instance.title_id)
+
+
+@receiver(post_delete, sender=Recap, dispatch_uid="api.recap_slot_delete")
+def unindex_recapped_title(sender, instance: Recap, **kwargs) -> None:
+    TitleSampler.recaps_changed(instance.title_id)
+
+
+@receiver(post_save, sender=Recap, dispatch_uid="api.recap_summary_save")
+@receiver(post_delete, sender=Recap, dispatch_uid="api.recap_summary_delete")
+def invalidate_recap_summary(sender, instance: Recap, raw: bool = False, **kwargs) -> None:
+    if not raw:
+        SummaryCache.invalidate([instance.title_id])
+
+
+@receiver(post_save, sender=Recap, dispatch_uid="api.recap_counter_journal")
+def journal_recap_counters(sender, instance: Recap, created: bool, raw: bool = False, **kwargs) -> None:
+    # Counters edited by hand (e.g. in the admin) are re-verified by the vote auditor;
+    # text edits and other saves that leave them alone are not journalled.
+    previous = instance.__dict__.pop("_previous_state", None)
+    if raw or created or previous is None:
+        return
+    if any(previous[field] != getattr(instance, field) for field in ("score", "upvotes", "downvotes")):
+        VoteChange.objects.create(recap_id=instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid="api.user_summary_save")
+def invalidate_user_summaries(sender, instance, created: bool, update_fields=None, raw: bool = False, **kwargs) -> None:
+    # Bundles embed recap authors' usernames; logins only touch last_login.
+    if raw or created or (update_fields is not None and "username" not in update_fields):
+        return
+    SummaryCache.invalidate(Recap.objects.filter(user=instance).values_list("title_id", flat=True))
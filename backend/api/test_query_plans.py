@@ -0,0 +1,172 @@
+"""Query-plan regression tests: the API's hot paths must stay on indexes.
+
+Every statement an endpoint runs against a seeded catalog is ``EXPLAIN``ed, and
+the test fails on a full table scan or on a sort an index should have served.
+Sorting by ``RANDOM()`` is inherent to shuffling rows that an index lookup has
+already narrowed down, so a statement may sort once per ``RANDOM()`` it contains;
+ordering full-text matches by ``relevance`` is the same kind of sort. Any other
+scan an endpoint needs is listed by name, with its reason, in ``EXPECTED_SCANS``.
+"""
+
+import json
+import re
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.benchmarks.utils import seed_catalog
+from api.models import Recap, Title, TitleCategory, TitleCategoryCount
+from api.services.leaderboards import Leaderboards
+from api.services.sampler import TitleSampler
+from api.services.votes import VoteService
+
+pytestmark = pytest.mark.django_db
+
+SEED_TITLES = 2000
+SEED_RECAPS_PER_TITLE = 5
+EXPLAINED = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# The category counters hold one row per category, so reading them all is a scan
+# by design (SQLite and Postgres spellings).
+CATEGORY_COUNTS_SCANS = {
+    f"SCAN {TitleCategoryCount._meta.db_table}",
+    f"Seq Scan on {TitleCategoryCount._meta.db_table}",
+}
+# Plan steps an endpoint is allowed, matched exactly against the reported scan.
+EXPECTED_SCANS = {
+    "count": CATEGORY_COUNTS_SCANS,
+    # Unfiltered name pages walk the name index in order until LIMIT stops them.
+    "titles (name, page 2)": {"SCAN api_title USING INDEX title_name_idx", *CATEGORY_COUNTS_SCANS},
+    "titles (new, page 2)": CATEGORY_COUNTS_SCANS,
+}
+
+ENDPOINTS = {
+    "summary": lambda client, data: client.get(reverse("titles-summary", args=[data["titles"][0]])),
+    "summaries": lambda client, data: client.get(
+        reverse("titles-summaries"), {"ids": ",".join(map(str, data["titles"]))}
+    ),
+    "random": lambda client, data: client.get(
+        reverse("titles-random"), {"category": TitleCategory.BOOK, "count": 3}
+    ),
+    "random (with recaps)": lambda client, data: client.get(
+        reverse("titles-random"), {"category": TitleCategory.BOOK, "count": 3, "with_recaps": "true"}
+    ),
+    "deck": lambda client, data: client.post(reverse("titles-deck"), {"category": TitleCategory.BOOK}),
+    "count": lambda client, data: client.get(reverse("titles-count"), {"category": TitleCategory.BOOK}),
+    "recap": lambda client, data: client.get(reverse("recaps-detail", args=[data["recaps"][0]])),
+    "my-votes": lambda client, data: client.get(
+        reverse("recaps-my-votes"), {"ids": ",".join(map(str, data["recaps"]))}
+    ),
+    "recaps (top, page 2)": lambda client, data: next_page(
+        client, reverse("titles-recaps", args=[data["titles"][0]]), {"page_size": 2}
+    ),
+    "recaps (new, page 2)": lambda client, data: next_page(
+        client, reverse("titles-recaps", args=[data["titles"][0]]), {"page_size": 2, "ordering": "new"}
+    ),
+    "titles (name, page 2)": lambda client, data: next_page(client, reverse("titles-list"), {"page_size": 5}),
+    "titles (new, page 2)": lambda client, data: next_page(
+        client, reverse("titles-list"), {"page_size": 5, "ordering": "new", "category": TitleCategory.BOOK}
+    ),
+    "search (prefix)": lambda client, data: client.get(reverse("titles-search"), {"q": "bench title 19"}),
+    "search (substring, typo)": lambda client, data: client.get(reverse("titles-search"), {"q": "titel 1999"}),
+    "recap search": lambda client, data: client.get(reverse("recaps-search"), {"q": "recap of title"}),
+    "leaderboard": lambda client, data: client.get(
+        reverse("recaps-leaderboard"), {"category": TitleCategory.BOOK, "window": "week"}
+    ),
+    "vote": lambda client, data: client.post(reverse("recaps-vote", args=[data["recaps"][1]]), {"value": -1}),
+}
+
+
+def next_page(client, url, params):
+    return client.get(client.get(url, params).data["next"])
+
+
+@pytest.fixture(scope="module")
+def seeded_catalog(django_db_setup, django_db_blocker):
+    """Seed once per module and roll everything back afterwards."""
+
+    with django_db_blocker.unblock(), transaction.atomic():
+        users = seed_catalog(SEED_TITLES, SEED_RECAPS_PER_TITLE, voters=5)
+        TitleSampler.rebuild()
+        VoteService.refresh_vote_metrics()
+        Leaderboards.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        titles = list(Title.objects.order_by("pk").values_list("pk", flat=True)[:10])
+        recaps = list(Recap.objects.filter(title_id__in=titles).order_by("pk").values_list("pk", flat=True))
+        yield {"user": users[0], "titles": titles, "recaps": recaps}
+        transaction.set_rollback(True)
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_endpoint_queries_use_indexes(seeded_catalog, endpoint):
+    client = APIClient()
+    client.force_authenticate(user=seeded_catalog["user"])
+    with CaptureQueriesContext(connection) as captured:
+        response = ENDPOINTS[endpoint](client, seeded_catalog)
+    assert response.status_code < 300, response.content
+
+    problems = []
+    for query in captured.captured_queries:
+        sql = query["sql"]
+        if not sql.lstrip().upper().startswith(EXPLAINED):
+            continue
+        plan_problems = plan_problems_for(sql, allowed=EXPECTED_SCANS.get(endpoint, set()))
+        if plan_problems:
+            problems.append(f"{' '.join(sql.split())[:200]}\n    " + "\n    ".join(plan_problems))
+    assert not problems, "\n".join(problems)
+
+
+def plan_problems_for(sql: str, allowed: set[str]) -> list[str]:
+    """Return the full scans and unexpected sorts in the plan of ``sql``, except the ``allowed`` scans."""
+
+    if connection.vendor == "postgresql":
+        problems, sorts = _postgres_plan(sql)
+    else:
+        problems, sorts = _sqlite_plan(sql)
+    expected_sorts = len(re.findall(r"RANDOM\(\)|ORDER BY [\w.]*relevance\b", sql, flags=re.IGNORECASE))
+    problems = [problem for problem in problems if problem not in allowed]
+    if len(sorts) > expected_sorts:
+        problems += sorts
+    return problems
+
+
+def _sqlite_plan(sql: str) -> tuple[list[str], list[str]]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+    # Subqueries and CTEs are materialised under their alias; scanning those is fine.
+    derived = {match.group(1) for detail in details if (match := re.match(r"(?:MATERIALIZE|CO-ROUTINE) (\S+)", detail))}
+    scans = [
+        detail
+        for detail in details
+        if (match := re.match(r"SCAN (\S+)", detail))
+        and not match.group(1).startswith("(")
+        and match.group(1) not in derived
+        and match.group(1) != "CONSTANT"
+        # Full-text tables report MATCH lookups as a scan with an ``M`` in the index plan.
+        and not re.search(r"VIRTUAL TABLE INDEX \d+:\S*M", detail)
+    ]
+    sorts = [detail for detail in details if detail.startswith("USE TEMP B-TREE")]
+    return scans, sorts
+
+
+def _postgres_plan(sql: str) -> tuple[list[str], list[str]]:
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans, sorts = [], []
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if node["Node Type"] == "Seq Scan":
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+        elif node["Node Type"] in {"Sort", "Incremental Sort"}:
+            sorts.append(f"{node['Node Type']} by {', '.join(node.get('Sort Key', []))}")
+    return scans, sorts
@@ -1,12 +1,67 @@
+import gzip
+import importlib
+import json
+import math
 import os
+import uuid
+from collections import Counter
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from urllib.parse import parse_qs, urlsplit
 
 import pytest
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework_simplejwt.tokens import AccessToken
 
+from accounts.authentication import ClaimsUser
 from accounts.models import User
-from api.models import Recap, Title, TitleCategory
+from api import admin as admin_module
+from api import metrics
+from api.models import (
+    Checkpoint,
+    LeaderboardEntry,
+    Recap,
+    RecapCounterShard,
+    Title,
+    TitleCategory,
+    TitleCategoryCount,
+    TitleSlot,
+    Vote,
+    VoteChange,
+)
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.row_serializers import RECAP_ROWS, TITLE_ROWS
+from api.serializers import RecapSerializer, TitleSerializer, TitleSummarySerializer
+from api.services.catalog import CategoryCounts, estimated_count
+from api.services.counter_shards import ShardedVoteCounters
+from api.services.engagement import EMPTY_WEIGHT, EngagementSampler, build_alias, weight
+from api.services.leaderboards import Leaderboards
+from api.services.recap_search import RecapSearch
+from api.services.sampler import TitleSampler
+from api.services.summaries import SummaryService
+from api.services.summary_cache import (
+    GENERATION_CACHE_ALIAS,
+    PAYLOAD_VERSION,
+    SummaryCache,
+)
+from api.services.title_search import TitleSearch
+from api.services.vote_audit import Drift, VoteCounterAuditor
+from api.services.vote_buffer import VoteCounterBuffer
+from api.services.votes import VoteService
+from api.views import with_current_user_vote
 
 pytestmark = pytest.mark.django_db
 
@@ -15,6 +70,12 @@ pytestmark = pytest.mark.django_db
 #
 assert os.getenv("DJANGO_SETTINGS_MODULE") == "notsolong.settings.dev", "Tests must use dev settings with test database. Be sure to Reload the vscode window."  # noqa: E501
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
 @pytest.fixture()
 def api_client() -> APIClient:
     return APIClient()
@@ -80,6 +141,49 @@ def test_count_endpoint_respects_category_filter(api_client, title_with_recap, u
     response = api_client.get(reverse("titles-count"), {"category": TitleCategory.MOVIE})
     assert response.status_code == status.HTTP_200_OK
     assert response.data["count"] == 2
+    assert response.data["total"] == 3
+    assert response.data["categories"][TitleCategory.BOOK] == 1
+    assert api_client.get(reverse("titles-count"), {"category": "opera"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_title_counters_are_kept_by_triggers_and_reconciled(
+    api_client, title_with_recap, django_assert_num_queries
+):
+    title, author = title_with_recap
+    # Bulk writes skip signals but not the triggers.
+    Title.objects.bulk_create(Title(name=f"Book {idx}", category=TitleCategory.BOOK) for idx in range(3))
+    Title.objects.filter(name="Book 0").update(category=TitleCategory.PODCAST)
+    Title.objects.filter(name="Book 1").delete()
+    with django_assert_num_queries(1):
+        response = api_client.get(reverse("titles-count"))
+    assert response.data["total"] == 3
+    assert {category: count for category, count in response.data["categories"].items() if count} == {
+        TitleCategory.MOVIE: 1,
+        TitleCategory.BOOK: 1,
+        TitleCategory.PODCAST: 1,
+    }
+
+    TitleCategoryCount.objects.filter(category=TitleCategory.BOOK).update(count=7)
+    out = StringIO()
+    call_command("reconcile_title_counts", "--dry-run", stdout=out)
+    assert "book: stored 7 != titles 1" in out.getvalue()
+    assert CategoryCounts.facets()[TitleCategory.BOOK] == 7
+    call_command("reconcile_title_counts", stdout=StringIO())
+    assert CategoryCounts.reconcile() == {}
+    assert CategoryCounts.facets()[TitleCategory.BOOK] == 1
+
+
+def test_admin_paginator_uses_planner_estimates_for_large_unfiltered_tables(title_with_recap, monkeypatch):
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    assert estimated_count(Title) == 1
+    monkeypatch.setattr(admin_module, "ESTIMATED_COUNT_MIN_ROWS", 1)
+    Title.objects.bulk_create(Title(name=f"Book {idx}", category=TitleCategory.BOOK) for idx in range(3))
+    # Unfiltered lists trust the (stale) statistics; filtered ones are counted.
+    assert admin_module.EstimatedCountPaginator(Title.objects.all(), 10).count == 1
+    assert admin_module.EstimatedCountPaginator(Title.objects.filter(category=TitleCategory.BOOK), 10).count == 3
+    monkeypatch.setattr(admin_module, "ESTIMATED_COUNT_MIN_ROWS", 100)
+    assert admin_module.EstimatedCountPaginator(Title.objects.all(), 10).count == 4
 
 
 @pytest.fixture()
@@ -146,3 +250,1092 @@ def test_me_endpoint_returns_user(api_client, user_factory):
     response = api_client.get(reverse("auth_me"))
     assert response.status_code == status.HTTP_200_OK
     assert response.data["email"] == "authuser@example.com"
+
+
+def test_title_slots_leave_tombstones_until_rebuilt(title_with_recap):
+    _, author = title_with_recap
+    extra = [
+        Title.objects.create(name=f"Movie {idx}", category=TitleCategory.MOVIE, created_by=author) for idx in range(3)
+    ]
+    deleted = extra[0].pk
+    extra[0].delete()
+    for bucket in (TitleSlot.ALL, TitleCategory.MOVIE):
+        slots = TitleSlot.objects.filter(bucket=bucket).order_by("position")
+        assert list(slots.values_list("position", flat=True)) == list(range(4))
+        assert [slot.title_id for slot in slots].count(None) == 1
+    assert not TitleSlot.objects.filter(title_id=deleted).exists()
+
+    TitleSampler.rebuild()
+    for bucket in (TitleSlot.ALL, TitleCategory.MOVIE):
+        positions = sorted(TitleSlot.objects.filter(bucket=bucket).values_list("position", flat=True))
+        assert positions == list(range(3))
+
+
+def test_random_endpoint_honours_category_and_exclude(api_client, title_with_recap):
+    matrix, author = title_with_recap
+    book = Title.objects.create(name="Emma", category=TitleCategory.BOOK, created_by=author)
+    response = api_client.get(reverse("titles-random"), {"category": TitleCategory.BOOK})
+    assert response.data["title"]["id"] == book.pk
+
+    response = api_client.get(reverse("titles-random"), {"exclude": f"{book.pk}"})
+    assert response.data["title"]["id"] == matrix.pk
+
+    response = api_client.get(reverse("titles-random"), {"exclude": f"{book.pk},{matrix.pk}"})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_deck_deals_every_title_once(api_client, title_with_recap):
+    _, author = title_with_recap
+    for idx in range(6):
+        Title.objects.create(name=f"Book {idx}", category=TitleCategory.BOOK, created_by=author)
+    opened = api_client.post(reverse("titles-deck"), {"category": TitleCategory.BOOK}, format="json")
+    assert opened.status_code == status.HTTP_201_CREATED
+    assert opened.data["remaining"] == 6
+
+    seen = []
+    cursor = opened.data["cursor"]
+    while cursor:
+        page = api_client.get(reverse("titles-deck-next"), {"cursor": cursor, "count": 4})
+        assert page.status_code == status.HTTP_200_OK
+        seen += [bundle["title"]["id"] for bundle in page.data["results"]]
+        cursor = page.data["cursor"]
+    expected = Title.objects.filter(category=TitleCategory.BOOK).values_list("pk", flat=True)
+    assert sorted(seen) == sorted(expected)
+
+
+def test_deck_deals_each_title_once_while_titles_are_removed(api_client, title_with_recap):
+    _, author = title_with_recap
+    books = [Title.objects.create(name=f"Book {idx}", category=TitleCategory.BOOK, created_by=author) for idx in range(8)]
+    cursor = api_client.post(reverse("titles-deck"), {"category": TitleCategory.BOOK}, format="json").data["cursor"]
+    page = api_client.get(reverse("titles-deck-next"), {"cursor": cursor, "count": 3}).data
+    dealt = [bundle["title"]["id"] for bundle in page["results"]]
+    undealt = [book.pk for book in books if book.pk not in dealt]
+
+    # Removals used to move the bucket's tail title into the hole, dealing it twice or never.
+    Title.objects.get(pk=dealt[0]).delete()
+    Title.objects.get(pk=undealt[0]).delete()
+    moved = Title.objects.get(pk=dealt[1])
+    for category in (TitleCategory.MOVIE, TitleCategory.BOOK):
+        moved.category = category
+        moved.save()
+    Title.objects.create(name="Late book", category=TitleCategory.BOOK, created_by=author)
+
+    cursor = page["cursor"]
+    while cursor:
+        page = api_client.get(reverse("titles-deck-next"), {"cursor": cursor, "count": 2}).data
+        dealt += [bundle["title"]["id"] for bundle in page["results"]]
+        cursor = page["cursor"]
+    assert sorted(dealt) == sorted(pk for pk in (book.pk for book in books) if pk != undealt[0])
+
+    # Tombstones keep positions stable until a rebuild compacts them, which ends open decks.
+    cursor = api_client.post(reverse("titles-deck"), {"category": TitleCategory.BOOK}, format="json").data["cursor"]
+    assert TitleSlot.objects.filter(bucket=TitleCategory.BOOK, title__isnull=True).count() == 3
+    TitleSampler.rebuild()
+    assert not TitleSlot.objects.filter(title__isnull=True).exists()
+    response = api_client.get(reverse("titles-deck-next"), {"cursor": cursor})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_deck_rejects_tampered_cursor(api_client, title_with_recap):
+    opened = api_client.post(reverse("titles-deck"), format="json")
+    response = api_client.get(reverse("titles-deck-next"), {"cursor": opened.data["cursor"] + "x"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "cursor" in response.data
+
+
+@pytest.fixture()
+def catalog_with_recaps(user_factory):
+    users = [user_factory() for _ in range(5)]
+    titles = []
+    for idx in range(6):
+        title = Title.objects.create(name=f"Podcast {idx}", category=TitleCategory.PODCAST, created_by=users[0])
+        for user in users[: idx % 5 + 1]:
+            Recap.objects.create(title=title, user=user, text=f"{user.username} on {title.name}")
+        titles.append(title)
+    return titles, users
+
+
+def test_refresh_vote_metrics_fixes_drift_in_chunks(catalog_with_recaps):
+    titles, users = catalog_with_recaps
+    recaps = list(Recap.objects.order_by("pk"))
+    for user in users[:3]:
+        Vote.objects.create(recap=recaps[0], user=user, value=Vote.UPVOTE)
+    Vote.objects.create(recap=recaps[1], user=users[0], value=Vote.DOWNVOTE)
+    Recap.objects.filter(pk=recaps[-1].pk).update(score=7, upvotes=7)
+
+    seen = []
+    totals = VoteService.refresh_vote_metrics(chunk_size=5, progress=lambda totals: seen.append(totals.processed))
+    assert (totals.processed, totals.corrected) == (len(recaps), 3)
+    assert seen == [5, 10, 15, len(recaps)]
+    counters = dict((pk, rest) for pk, *rest in Recap.objects.values_list("pk", "score", "upvotes", "downvotes"))
+    assert counters[recaps[0].pk] == [3, 3, 0]
+    assert counters[recaps[1].pk] == [-1, 0, 1]
+    assert counters[recaps[-1].pk] == [0, 0, 0]
+    assert not Checkpoint.objects.exists()
+
+
+def test_refresh_vote_metrics_resumes_from_checkpoint(catalog_with_recaps):
+    recap_ids = list(Recap.objects.order_by("pk").values_list("pk", flat=True))
+    Recap.objects.update(score=9)
+    Checkpoint.objects.create(name=f"refresh_vote_metrics:run:{recap_ids[0]}:{recap_ids[-1]}", position=recap_ids[7])
+
+    totals = VoteService.refresh_vote_metrics(resume=True, chunk_size=4)
+    assert totals.processed == len(recap_ids) - 8
+    scores = list(Recap.objects.order_by("pk").values_list("score", flat=True))
+    assert scores == [9] * 8 + [0] * (len(recap_ids) - 8)
+    assert not Checkpoint.objects.exists()
+
+
+def test_refresh_vote_metrics_runs_keep_their_own_checkpoints(catalog_with_recaps):
+    recap_ids = list(Recap.objects.order_by("pk").values_list("pk", flat=True))
+    since = timezone.now() - timedelta(days=1)
+    Checkpoint.objects.create(
+        name=f"refresh_vote_metrics:partial:{recap_ids[0]}:{recap_ids[-1]}",
+        position=recap_ids[3],
+        params={"since": since.isoformat()},
+    )
+
+    # A whole-table run neither resumes nor discards the filtered run's progress.
+    totals = VoteService.refresh_vote_metrics(resume=True)
+    assert totals.processed == len(recap_ids)
+    assert Checkpoint.objects.filter(name__startswith="refresh_vote_metrics:partial:").exists()
+
+    totals = VoteService.refresh_vote_metrics(since=since, resume=True)
+    assert totals.processed == len(recap_ids) - 4
+    assert not Checkpoint.objects.exists()
+
+
+def test_refresh_vote_metrics_command_limits_to_ids_or_recent_activity(catalog_with_recaps):
+    recaps = list(Recap.objects.order_by("pk"))
+    Recap.objects.update(score=9)
+    out = StringIO()
+    call_command("refresh_vote_metrics", "--ids", str(recaps[0].pk), str(recaps[1].pk), stdout=out)
+    assert "Checked 2 recaps and corrected 2" in out.getvalue()
+
+    month_ago = timezone.now() - timedelta(days=30)
+    Vote.objects.create(recap=recaps[3], user=recaps[1].user, value=Vote.UPVOTE)
+    Vote.objects.create(recap=recaps[4], user=recaps[1].user, value=Vote.UPVOTE)
+    Vote.objects.update(created_at=month_ago)
+    VoteChange.objects.update(changed_at=month_ago)
+    Recap.objects.exclude(pk=recaps[2].pk).update(created_at=month_ago)
+    Recap.objects.filter(pk__in=[recaps[0].pk, recaps[1].pk, recaps[3].pk, recaps[4].pk]).update(score=9)
+    # A new vote, a flip and a deletion all count as activity, though no vote was created for the last two.
+    Vote.objects.create(recap=recaps[0], user=recaps[1].user, value=Vote.UPVOTE)
+    Vote.objects.filter(recap=recaps[3]).update(value=Vote.DOWNVOTE)
+    Vote.objects.filter(recap=recaps[4]).delete()
+    call_command("refresh_vote_metrics", "--since", (timezone.now() - timedelta(days=1)).date().isoformat(), stdout=out)
+    assert list(Recap.objects.order_by("pk").values_list("score", flat=True)[:5]) == [1, 9, 0, -1, 0]
+
+    with pytest.raises(CommandError):
+        call_command("refresh_vote_metrics", "--ids", str(recaps[0].pk), "--resume", stdout=out)
+
+
+def test_vote_auditor_checks_only_recaps_changed_since_its_watermark(catalog_with_recaps):
+    titles, users = catalog_with_recaps
+    untouched, stale, healthy, edited = list(Recap.objects.order_by("pk"))[:4]
+    Recap.objects.filter(pk=untouched.pk).update(score=5)
+    Vote.objects.create(recap=stale, user=users[1], value=Vote.UPVOTE)
+    VoteService.apply_vote(healthy, users[1], Vote.DOWNVOTE)
+
+    assert VoteCounterAuditor.run(settle=3600).checked == 0
+    dry_run = VoteCounterAuditor.run(settle=0, repair=False)
+    assert dry_run.drifted == [Drift(recap_id=stale.pk, stored=(0, 0, 0), actual=(1, 1, 0))]
+    assert VoteChange.objects.exists()
+
+    report = VoteCounterAuditor.run(settle=0)
+    assert (report.checked, [drift.recap_id for drift in report.drifted]) == (2, [stale.pk])
+    assert Recap.objects.values_list("score", flat=True).get(pk=stale.pk) == 1
+    assert Recap.objects.values_list("score", flat=True).get(pk=untouched.pk) == 5
+    assert not VoteChange.objects.exists()
+    assert Checkpoint.objects.get(name="vote_audit").position == report.watermark
+    assert VoteCounterAuditor.run(settle=0).checked == 0
+
+    # Saves that leave the counters alone are not journalled.
+    edited.text = "Edited text."
+    edited.save()
+    assert not VoteChange.objects.exists()
+    edited.score = 42
+    edited.save()
+    report = VoteCounterAuditor.run(settle=0)
+    assert [drift.recap_id for drift in report.drifted] == [edited.pk]
+    assert Recap.objects.values_list("score", flat=True).get(pk=edited.pk) == 0
+
+    # A change that commits after higher-numbered ones were consumed is still audited.
+    Recap.objects.filter(pk=untouched.pk).update(score=7)
+    VoteChange.objects.create(pk=report.watermark - 1, recap_id=untouched.pk)
+    report = VoteCounterAuditor.run(settle=0)
+    assert [drift.recap_id for drift in report.drifted] == [untouched.pk]
+    assert not VoteChange.objects.exists()
+
+
+@pytest.fixture()
+def title_with_many_recaps(user_factory):
+    users = [user_factory() for _ in range(7)]
+    title = Title.objects.create(name="Long Read", category=TitleCategory.BOOK, created_by=users[0])
+    recaps = [Recap.objects.create(title=title, user=user, text=f"Take {idx}") for idx, user in enumerate(users)]
+    for recap, score in zip(recaps, (3, 3, 3, 1, 1, 0, 5)):
+        Recap.objects.filter(pk=recap.pk).update(score=score)
+    # Same score and timestamp: only the id tie-breaker orders these two.
+    Recap.objects.filter(pk__in=[recaps[1].pk, recaps[2].pk]).update(created_at=recaps[0].created_at)
+    return title, users, recaps
+
+
+@pytest.mark.parametrize(
+    "ordering, expected_order", [("top", ("-score", "-created_at", "-id")), ("new", ("-created_at", "-id"))]
+)
+def test_title_recaps_keyset_pages_cover_every_recap_once(
+    api_client, title_with_many_recaps, django_assert_max_num_queries, ordering, expected_order
+):
+    title, users, recaps = title_with_many_recaps
+    Vote.objects.create(recap=recaps[3], user=users[0], value=Vote.DOWNVOTE)
+    api_client.force_authenticate(user=users[0])
+    url = reverse("titles-recaps", args=[title.pk])
+    params = {"page_size": 3, "ordering": ordering}
+    seen, votes = [], {}
+    while url:
+        # The title lookup, then one query for the page and the caller's votes.
+        with django_assert_max_num_queries(2):
+            response = api_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        seen += [recap["id"] for recap in response.data["results"]]
+        votes.update({recap["id"]: recap["current_user_vote"] for recap in response.data["results"]})
+        url, params = response.data["next"], None
+    assert seen == list(Recap.objects.filter(title=title).order_by(*expected_order).values_list("pk", flat=True))
+    assert votes[recaps[3].pk] == Vote.DOWNVOTE
+    assert sum(value is not None for value in votes.values()) == 1
+
+
+def test_title_recaps_rejects_bad_cursors_and_orderings(api_client, title_with_many_recaps):
+    title, _, _ = title_with_many_recaps
+    url = reverse("titles-recaps", args=[title.pk])
+    first = api_client.get(url, {"page_size": 2, "ordering": "new"})
+    cursor = parse_qs(urlsplit(first.data["next"]).query)["cursor"][0]
+    assert api_client.get(url, {"cursor": cursor, "ordering": "new"}).status_code == status.HTTP_200_OK
+    # A cursor only continues the ordering it was issued for.
+    assert api_client.get(url, {"cursor": cursor}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(url, {"cursor": "bogus"}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(url, {"ordering": "old"}).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(reverse("titles-recaps", args=[title.pk + 99])).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize("ordering, expected_order", [("name", ("name", "id")), ("new", ("-created_at", "-id"))])
+def test_title_catalog_pages_with_category_facets(
+    api_client, user_factory, django_assert_max_num_queries, ordering, expected_order
+):
+    author = user_factory()
+    for idx, (name, category) in enumerate(
+        [("Dune", TitleCategory.BOOK), ("Alien", TitleCategory.MOVIE), ("Dune", TitleCategory.MOVIE),
+         ("Brazil", TitleCategory.MOVIE), ("Emma", TitleCategory.BOOK)]
+    ):
+        Title.objects.create(name=name, category=category, created_by=author)
+    url, params = reverse("titles-list"), {"page_size": 2, "ordering": ordering}
+    seen = []
+    while url:
+        # One query for the page and one for the facet counters.
+        with django_assert_max_num_queries(2):
+            response = api_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["facets"][TitleCategory.MOVIE] == 3
+        assert response.data["facets"][TitleCategory.BOOK] == 2
+        seen += [title["id"] for title in response.data["results"]]
+        url, params = response.data["next"], None
+    assert seen == list(Title.objects.order_by(*expected_order).values_list("pk", flat=True))
+
+    books = api_client.get(reverse("titles-list"), {"category": TitleCategory.BOOK})
+    assert [title["name"] for title in books.data["results"]] == ["Dune", "Emma"]
+    assert api_client.get(reverse("titles-list"), {"category": "opera"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_category_facets_follow_title_writes(api_client, title_with_recap):
+    title, author = title_with_recap
+
+    def facets():
+        return api_client.get(reverse("titles-list")).data["facets"]
+
+    assert facets()[TitleCategory.MOVIE] == 1
+
+    title.category = TitleCategory.BOOK
+    title.save()
+    title.save()  # A second save with nothing moved must not count again.
+    assert (facets()[TitleCategory.MOVIE], facets()[TitleCategory.BOOK]) == (0, 1)
+
+    title.delete()
+    Title.objects.create(name="Heat", category=TitleCategory.MOVIE, created_by=author)
+    assert (facets()[TitleCategory.MOVIE], facets()[TitleCategory.BOOK]) == (1, 0)
+
+
+def test_summaries_query_count_is_independent_of_batch_size(
+    api_client, catalog_with_recaps, django_assert_max_num_queries
+):
+    titles, users = catalog_with_recaps
+    api_client.force_authenticate(user=users[0])
+    # One statement for the bundles plus one for the caller's vote overlay.
+    with django_assert_max_num_queries(2):
+        small = api_client.get(reverse("titles-summaries"), {"ids": f"{titles[0].pk},{titles[1].pk}"})
+    ids = ",".join(str(title.pk) for title in reversed(titles))
+    with django_assert_max_num_queries(2):
+        large = api_client.get(reverse("titles-summaries"), {"ids": ids})
+    assert len(small.data["results"]) == 2
+    assert [bundle["title"]["id"] for bundle in large.data["results"]] == [title.pk for title in reversed(titles)]
+    for bundle in large.data["results"]:
+        assert bundle["top_recap"] is not None
+        assert len(bundle["other_recaps"]) <= 3
+        assert bundle["top_recap"]["id"] not in {recap["id"] for recap in bundle["other_recaps"]}
+    assert max(len(bundle["other_recaps"]) for bundle in large.data["results"]) == 3
+
+
+def test_random_endpoint_returns_batch_with_count(api_client, catalog_with_recaps):
+    response = api_client.get(reverse("titles-random"), {"count": 4})
+    assert response.status_code == status.HTTP_200_OK
+    ids = [bundle["title"]["id"] for bundle in response.data["results"]]
+    assert len(ids) == len(set(ids)) == 4
+
+
+def test_summary_overlays_caller_vote_on_shared_bundle(api_client, catalog_with_recaps, django_assert_num_queries):
+    titles, users = catalog_with_recaps
+    title = titles[4]
+    best = title.recaps.get(user=users[2])
+    Recap.objects.filter(pk=best.pk).update(score=5)
+    Vote.objects.create(recap=best, user=users[0], value=Vote.UPVOTE)
+    api_client.force_authenticate(user=users[0])
+    url = reverse("titles-summary", args=[title.pk])
+    with django_assert_num_queries(2):
+        response = api_client.get(url)
+    assert response.data["title"]["name"] == title.name
+    assert response.data["top_recap"]["id"] == best.pk
+    assert response.data["top_recap"]["current_user_vote"] == Vote.UPVOTE
+    assert response.data["top_recap"]["user"]["username"] == users[2].username
+    assert len(response.data["other_recaps"]) == 3
+    assert "public" not in response.get("Cache-Control", "")
+
+    with django_assert_num_queries(0):
+        neutral = api_client.get(url, {"votes": "0"})
+    assert neutral.data["top_recap"]["current_user_vote"] is None
+    assert "public" in neutral["Cache-Control"] and "Authorization" not in neutral.get("Vary", "")
+
+
+def test_my_votes_returns_callers_votes_only(api_client, recap_for_voting, user_factory):
+    recap, voter = recap_for_voting
+    Vote.objects.create(recap=recap, user=voter, value=Vote.DOWNVOTE)
+    Vote.objects.create(recap=recap, user=user_factory(), value=Vote.UPVOTE)
+    url = reverse("recaps-my-votes")
+    assert api_client.get(url, {"ids": recap.pk}).status_code == status.HTTP_401_UNAUTHORIZED
+    api_client.force_authenticate(user=voter)
+    response = api_client.get(url, {"ids": f"{recap.pk},{recap.pk + 100}"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {"votes": {recap.pk: Vote.DOWNVOTE}}
+
+
+def test_summary_of_title_without_recaps(api_client, recap_creation_context):
+    _, title = recap_creation_context
+    response = api_client.get(reverse("titles-summary", args=[title.pk]))
+    assert response.data["top_recap"] is None
+    assert response.data["other_recaps"] == []
+    assert api_client.get(reverse("titles-summary", args=[title.pk + 100])).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_anonymous_summary_is_cached_until_a_vote_changes_it(
+    api_client, recap_for_voting, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    recap, voter = recap_for_voting
+    url = reverse("titles-summary", args=[recap.title_id])
+    response = api_client.get(url)
+    assert response.data["top_recap"]["score"] == 0
+    # Shared caches must not serve this vote-less copy to signed-in callers.
+    assert "public" in response["Cache-Control"] and "Authorization" in response["Vary"]
+    with django_assert_num_queries(0):
+        assert api_client.get(url).data["top_recap"]["score"] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        VoteService.apply_vote(recap, voter, Vote.UPVOTE)
+    assert api_client.get(url).data["top_recap"]["score"] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Recap.objects.get(pk=recap.pk).save()
+    with django_assert_num_queries(1):
+        api_client.get(url)
+
+
+def test_lost_summary_generation_never_resurrects_an_older_bundle(
+    api_client, title_with_recap, django_capture_on_commit_callbacks
+):
+    title, _ = title_with_recap
+    url = reverse("titles-summary", args=[title.pk])
+    assert api_client.get(url).data["title"]["name"] == "The Matrix"
+    with django_capture_on_commit_callbacks(execute=True):
+        Title.objects.filter(pk=title.pk).update(name="The Matrix Reloaded")
+        SummaryCache.invalidate([title.pk])
+    assert api_client.get(url).data["title"]["name"] == "The Matrix Reloaded"
+
+    # A culled counter comes back as a fresh value, not as the generation the first bundle was stored under.
+    generations = caches[GENERATION_CACHE_ALIAS]
+    generations.delete(SummaryCache._generation_key(title.pk), version=PAYLOAD_VERSION)
+    assert api_client.get(url).data["title"]["name"] == "The Matrix Reloaded"
+    assert generations.get(SummaryCache._generation_key(title.pk), version=PAYLOAD_VERSION) is not None
+
+    # A bump on a lost counter seeds it too, retiring whatever was cached.
+    generations.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        Title.objects.filter(pk=title.pk).update(name="The Matrix Revolutions")
+        SummaryCache.invalidate([title.pk])
+    assert api_client.get(url).data["title"]["name"] == "The Matrix Revolutions"
+
+
+def test_metrics_endpoint_reports_summary_cache_counters(api_client, title_with_recap, user_factory):
+    title, _ = title_with_recap
+    metrics.reset()
+    url = reverse("titles-summary", args=[title.pk])
+    api_client.get(url)
+    api_client.get(url)
+    assert api_client.get(reverse("metrics")).status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+    api_client.force_authenticate(user=user_factory(is_staff=True))
+    response = api_client.get(reverse("metrics"))
+    assert response.data["summary_cache.hits"] == 1
+    assert response.data["summary_cache.misses"] == 1
+
+
+def test_vote_transitions_return_fresh_counters_without_rereading(
+    api_client, recap_for_voting, django_assert_max_num_queries
+):
+    recap, voter = recap_for_voting
+    api_client.force_authenticate(user=voter)
+    url = reverse("recaps-vote", args=[recap.pk])
+    expected = [
+        (1, (1, 1, 0)),
+        (1, (1, 1, 0)),
+        (-1, (-1, 0, 1)),
+        (0, (0, 0, 0)),
+        (0, (0, 0, 0)),
+    ]
+    for value, (score, upvotes, downvotes) in expected:
+        # get_object(), then at most two statements for the vote itself
+        with django_assert_max_num_queries(4):
+            response = api_client.post(url, {"value": value}, format="json")
+        assert (response.data["score"], response.data["upvotes"], response.data["downvotes"]) == (
+            score,
+            upvotes,
+            downvotes,
+        )
+        assert response.data["current_user_vote"] == (value or None)
+        recap.refresh_from_db()
+        assert (recap.score, recap.upvotes, recap.downvotes) == (score, upvotes, downvotes)
+    assert not Vote.objects.filter(recap=recap).exists()
+
+
+def test_vote_on_a_row_written_concurrently_is_applied_as_a_flip(recap_for_voting):
+    recap, voter = recap_for_voting
+    # Another request's vote landed, with its counters, after this request loaded the recap.
+    Vote.objects.create(recap=recap, user=voter, value=Vote.UPVOTE)
+    Recap.objects.filter(pk=recap.pk).update(score=1, upvotes=1)
+
+    # The insert conflicts with that row: no counter change for a repeat, a flip delta otherwise.
+    def stored():
+        return Recap.objects.values_list("score", "upvotes", "downvotes").get(pk=recap.pk)
+
+    VoteService.apply_vote(recap, voter, Vote.UPVOTE)
+    assert stored() == (1, 1, 0)
+    VoteService.apply_vote(recap, voter, Vote.DOWNVOTE)
+    assert (recap.score, recap.upvotes, recap.downvotes) == stored() == (-1, 0, 1)
+
+
+def test_buffered_votes_merge_into_reads_and_flush_in_one_batch(
+    api_client, recap_for_voting, user_factory, settings, django_capture_on_commit_callbacks
+):
+    settings.VOTE_COUNTER_MODE = "buffered"
+    settings.VOTE_BUFFER_FLUSH_INTERVAL = 0
+    recap, voter = recap_for_voting
+    voters = [voter, user_factory(), user_factory()]
+    url = reverse("recaps-vote", args=[recap.pk])
+    for value, user in zip((1, 1, -1), voters):
+        api_client.force_authenticate(user=user)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(url, {"value": value}, format="json")
+    assert (response.data["score"], response.data["upvotes"], response.data["downvotes"]) == (1, 2, 1)
+    assert Vote.objects.filter(recap=recap).count() == 3
+    recap.refresh_from_db()
+    assert recap.score == 0
+
+    summary = api_client.get(reverse("titles-summary", args=[recap.title_id]))
+    assert summary.data["top_recap"]["score"] == 1
+
+    assert VoteCounterBuffer.flush() == 1
+    recap.refresh_from_db()
+    assert (recap.score, recap.upvotes, recap.downvotes) == (1, 2, 1)
+    assert VoteCounterBuffer.flush() == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffered_vote_responses_and_refreshes_survive_a_flush_in_between(recap_for_voting, user_factory, settings):
+    settings.VOTE_COUNTER_MODE = "buffered"
+    settings.VOTE_BUFFER_FLUSH_INTERVAL = 0
+    recap, voter = recap_for_voting
+    loaded = Recap.objects.get(pk=recap.pk)
+
+    VoteService.apply_vote(recap, voter, Vote.UPVOTE)
+    assert VoteCounterBuffer.flush() == 1
+    # Loaded before the flush wrote the first vote into the row; counted once all the same.
+    VoteService.apply_vote(loaded, user_factory(), Vote.UPVOTE)
+    assert (loaded.score, loaded.upvotes, loaded.downvotes) == (2, 2, 0)
+
+    # A refresh writes pending deltas first, so the next flush has nothing to add on top.
+    Recap.objects.filter(pk=recap.pk).update(score=0, upvotes=0)
+    VoteService.apply_vote(recap, user_factory(), Vote.DOWNVOTE)
+    VoteService.refresh_vote_metrics([recap.pk])
+    assert VoteCounterBuffer.flush() == 0
+    assert Recap.objects.values_list("score", "upvotes", "downvotes").get(pk=recap.pk) == (1, 2, 1)
+
+
+def test_sharded_votes_report_live_totals_and_roll_up_into_recap(
+    api_client, recap_for_voting, user_factory, settings, django_capture_on_commit_callbacks
+):
+    settings.VOTE_COUNTER_MODE = "sharded"
+    settings.VOTE_COUNTER_SHARDS = 4
+    recap, voter = recap_for_voting
+    voters = [voter, user_factory(), user_factory()]
+    url = reverse("recaps-vote", args=[recap.pk])
+    for value, user in zip((1, 1, -1), voters):
+        api_client.force_authenticate(user=user)
+        response = api_client.post(url, {"value": value}, format="json")
+    api_client.force_authenticate(user=voters[1])
+    response = api_client.post(url, {"value": 0}, format="json")
+    assert (response.data["score"], response.data["upvotes"], response.data["downvotes"]) == (0, 1, 1)
+    recap.refresh_from_db()
+    assert (recap.score, recap.upvotes, recap.downvotes) == (0, 0, 0)
+    assert 1 <= RecapCounterShard.objects.filter(recap=recap).count() <= 4
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert ShardedVoteCounters.rollup() == 1
+    recap.refresh_from_db()
+    assert (recap.score, recap.upvotes, recap.downvotes) == (0, 1, 1)
+    assert not RecapCounterShard.objects.exists()
+    assert ShardedVoteCounters.rollup() == 0
+
+    ShardedVoteCounters.add(recap.pk, {"score": 5, "upvotes": 5})
+    VoteService.refresh_vote_metrics([recap.pk])
+    assert not RecapCounterShard.objects.exists()
+    assert ShardedVoteCounters.totals(recap.pk) == (0, 1, 1)
+
+
+def test_leaderboards_follow_votes_and_agree_with_a_rebuild(
+    api_client, catalog_with_recaps, settings, django_capture_on_commit_callbacks
+):
+    settings.LEADERBOARD_SIZE = 2
+    _, users = catalog_with_recaps
+    recaps = list(Recap.objects.order_by("pk"))
+    Recap.objects.filter(pk=recaps[0].pk).update(created_at=timezone.now() - timedelta(days=30))
+
+    def vote(index, user, value):
+        with django_capture_on_commit_callbacks(execute=True):
+            VoteService.apply_vote(Recap.objects.select_related("title").get(pk=recaps[index].pk), user, value)
+
+    for index, votes in {0: (1, 1, 1), 3: (1, 1), 5: (1, 1), 7: (1,), 9: (1, 1, -1), 11: (-1,)}.items():
+        for user, value in zip(users, votes):
+            vote(index, user, value)
+
+    def served(window, category=TitleCategory.PODCAST):
+        response = api_client.get(reverse("recaps-leaderboard"), {"window": window, "category": category})
+        assert response.status_code == status.HTTP_200_OK
+        return [recap["id"] for recap in response.data["results"]]
+
+    ranked = Recap.objects.order_by("-score", "-created_at", "-id")
+    assert served("all") == list(ranked.values_list("pk", flat=True)[:2])
+    assert served("week") == list(ranked.exclude(pk=recaps[0].pk).values_list("pk", flat=True)[:2])
+    assert served("all", category="") == served("all")
+    assert served("all", category=TitleCategory.BOOK) == []
+    # Each board keeps its served recaps plus an equal reserve.
+    assert LeaderboardEntry.objects.filter(board=LeaderboardEntry.ALL, window=LeaderboardEntry.ALL_TIME).count() == 4
+
+    # The leader drops off; the reserve fills the gap without a rebuild.
+    for user in users[:3]:
+        vote(0, user, -1)
+    before = {window: served(window) for window in ("all", "week")}
+    assert before["all"] == list(ranked.values_list("pk", flat=True)[:2])
+    assert recaps[0].pk not in before["all"]
+
+    # Four entries on each of the catalog-wide and podcast boards, for both windows.
+    assert Leaderboards.rebuild() == 16
+    assert {window: served(window) for window in ("all", "week")} == before
+
+    # A title that moves category leaves stale entries behind; the page stays full.
+    Title.objects.filter(pk=Recap.objects.get(pk=before["all"][0]).title_id).update(category=TitleCategory.BOOK)
+    assert len(served("all")) == 2
+    assert before["all"][0] not in served("all")
+
+
+def test_leaderboard_endpoint_is_one_query_and_validates_parameters(
+    api_client, title_with_recap, user_factory, django_assert_num_queries
+):
+    Leaderboards.rebuild()
+    with django_assert_num_queries(1):
+        response = api_client.get(reverse("recaps-leaderboard"))
+    assert response.data["window"] == "week"
+    assert [recap["text"] for recap in response.data["results"]] == ["There is no spoon."]
+    url = reverse("recaps-leaderboard")
+    for params in ({"category": "opera"}, {"window": "month"}, {"limit": 0}, {"limit": 51}):
+        assert api_client.get(url, params).status_code == status.HTTP_400_BAD_REQUEST
+    voter = user_factory()
+    Vote.objects.create(recap=Recap.objects.get(), user=voter, value=Vote.DOWNVOTE)
+    api_client.force_authenticate(user=voter)
+    assert api_client.get(url).data["results"][0]["current_user_vote"] == Vote.DOWNVOTE
+
+
+@pytest.fixture()
+def searchable_titles(user_factory):
+    author = user_factory()
+    rows = [
+        ("Matrix Reloaded", "Wachowski"),
+        ("The Matrix", "Wachowski"),
+        ("Animatrix", "Various"),
+        ("Mary Poppins", "P. L. Travers"),
+        ("Dune", "Frank Herbert"),
+    ]
+    return {
+        name: Title.objects.create(name=name, author=writer, category=TitleCategory.MOVIE, created_by=author)
+        for name, writer in rows
+    }
+
+
+def test_title_search_ranks_prefixes_then_substrings_then_typos(
+    api_client, searchable_titles, django_assert_num_queries
+):
+    def search(q, **params):
+        response = api_client.get(reverse("titles-search"), {"q": q, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return [title["name"] for title in response.data["results"]]
+
+    assert search("matrix") == ["Matrix Reloaded", "The Matrix", "Animatrix"]
+    assert search("  MA ") == ["Mary Poppins", "Matrix Reloaded"]
+    assert search("herbert") == ["Dune"]
+    assert search("wachowsky") == ["Matrix Reloaded", "The Matrix"]
+    assert search("qwertyuiop") == []
+    # A page filled by name prefixes needs no trigram lookup.
+    with django_assert_num_queries(1):
+        assert search("ma", limit=1) == ["Mary Poppins"]
+
+    dune = searchable_titles["Dune"]
+    dune.name = "Dune Messiah"
+    dune.save()
+    assert search("messiah") == ["Dune Messiah"]
+    dune.delete()
+    assert search("herbert") == []
+
+    assert TitleSearch.filter(Title.objects.all(), "atri").count() == 3
+    assert api_client.get(reverse("titles-search")).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(reverse("titles-search"), {"q": "ma", "limit": 21}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="Postgres collations")
+def test_title_prefix_search_compares_in_code_point_order_on_postgres(api_client, user_factory):
+    # Linguistic collations skip punctuation and place U+10FFFF anywhere, so the range must be "C".
+    author = user_factory()
+    for name in ("Ma-Ma", "Ma Vie", "Ma\u00f1ana", "Mazes"):
+        Title.objects.create(name=name, author="Anon", category=TitleCategory.BOOK, created_by=author)
+    response = api_client.get(reverse("titles-search"), {"q": "ma"})
+    assert sorted(title["name"] for title in response.data["results"]) == ["Ma Vie", "Ma-Ma", "Mazes", "Ma\u00f1ana"]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexdef FROM pg_indexes WHERE indexname = 'title_name_lower_idx'")
+        assert 'COLLATE "C"' in cursor.fetchone()[0]
+
+
+def test_recap_search_ranks_by_relevance_and_score_with_snippets(
+    api_client, searchable_titles, user_factory, django_assert_num_queries
+):
+    texts = {
+        "The Matrix": "A hacker learns reality is a simulation & fights the machines.",
+        "Matrix Reloaded": "More machines, more simulation: the hacker fights machines again.",
+        "Dune": "A duke's son survives the desert <and> rides the worms.",
+        "Animatrix": "Short films about the machines and their war with humans.",
+    }
+    recaps = {
+        name: Recap.objects.create(title=searchable_titles[name], user=user_factory(), text=text)
+        for name, text in texts.items()
+    }
+
+    def search(q):
+        response = api_client.get(reverse("recaps-search"), {"q": q})
+        assert response.status_code == status.HTTP_200_OK
+        return response.data["results"]
+
+    with django_assert_num_queries(1):
+        results = search("machine")
+    # Stemmed, and the text mentioning machines twice ranks first.
+    assert [result["title"]["name"] for result in results][0] == "Matrix Reloaded"
+    assert {result["title"]["name"] for result in results} == {"Matrix Reloaded", "The Matrix", "Animatrix"}
+    assert "text" not in results[0]
+    assert "<mark>machines</mark>" in results[0]["snippet"]
+    assert [result["title"]["name"] for result in search('"fights the machines"')] == ["The Matrix"]
+    assert search("hacker desert") == []
+    assert search('"&<>!"') == []
+    assert "&lt;and&gt; <mark>rides</mark>" in search("riding")[0]["snippet"]
+
+    # Equally relevant texts are ordered by score.
+    recaps["The Matrix"].text = "Short films about the machines and their war with humans."
+    recaps["The Matrix"].save()
+    Recap.objects.filter(pk=recaps["The Matrix"].pk).update(score=5)
+    assert [result["title"]["name"] for result in search("humans")] == ["The Matrix", "Animatrix"]
+    recaps["Animatrix"].delete()
+    assert [result["title"]["name"] for result in search("humans")] == ["The Matrix"]
+
+
+def test_recap_search_falls_back_to_substrings_without_an_index(
+    api_client, searchable_titles, user_factory, monkeypatch
+):
+    words = " ".join(f"w{idx}" for idx in range(30))
+    low, high = (
+        Recap.objects.create(title=searchable_titles[name], user=user_factory(), text=f"{words} <Machines> {words}")
+        for name in ("Dune", "The Matrix")
+    )
+    Recap.objects.filter(pk=high.pk).update(score=3)
+    monkeypatch.setattr(connection, "vendor", "unknown")
+
+    response = api_client.get(reverse("recaps-search"), {"q": "machine"})
+    assert response.status_code == status.HTTP_200_OK
+    results = response.data["results"]
+    assert [result["id"] for result in results] == [high.pk, low.pk]
+    assert results[0]["relevance"] == 0.0
+    assert results[0]["snippet"] == (
+        "…w19 w20 w21 w22 w23 w24 w25 w26 w27 w28 w29 &lt;<mark>Machine</mark>s&gt; w0 w1 w2 w3 w4 w5 w6 w7 w8 w9 w10…"
+    )
+    assert RecapSearch.search("  ") == []
+
+    assert RecapSearch.filter(Recap.objects.all(), "machines").count() == 2
+    assert api_client.get(reverse("recaps-search")).status_code == status.HTTP_400_BAD_REQUEST
+    assert api_client.get(reverse("recaps-search"), {"q": "x", "limit": 51}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_title_recap_stats_follow_recaps_votes_and_repairs(api_client, title_with_recap, user_factory):
+    title, author = title_with_recap
+    spoon = title.recaps.get()
+
+    def stats():
+        return Title.objects.values_list("recap_count", "top_recap_id").get(pk=title.pk)
+
+    def random_ids():
+        response = api_client.get(reverse("titles-random"), {"with_recaps": "true", "count": 5})
+        return {bundle["title"]["id"] for bundle in response.data["results"]}
+
+    assert stats() == (1, spoon.pk)
+    pill = Recap.objects.create(title=title, user=user_factory(), text="Red pill or blue pill.")
+    assert stats() == (2, pill.pk)  # Newest first among equal scores.
+    VoteService.apply_vote(spoon, user_factory(), Vote.UPVOTE)
+    assert stats() == (2, spoon.pk)
+    # Any counter write path moves the top, e.g. a buffered flush or a refresh.
+    Recap.objects.filter(pk=pill.pk).update(score=5)
+    assert stats() == (2, pill.pk)
+    # Saving a loaded title must not write back its stale copy of the statistics.
+    title.name = "The Matrix (1999)"
+    title.save()
+    assert stats() == (2, pill.pk)
+
+    Title.objects.create(name="Heat", category=TitleCategory.MOVIE, created_by=author)
+    assert random_ids() == {title.pk}
+    pill.delete()
+    assert stats() == (1, spoon.pk)
+    spoon.delete()
+    assert stats() == (0, None)
+    assert random_ids() == set()
+
+    Title.objects.filter(pk=title.pk).update(recap_count=9)
+    out = StringIO()
+    call_command("repair_title_stats", "--dry-run", stdout=out)
+    assert f"title {title.pk}: stored (9, None) != recaps (0, None)" in out.getvalue()
+    call_command("repair_title_stats", stdout=StringIO())
+    assert stats() == (0, None)
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite trigger definitions")
+def test_migrated_sqlite_schema_keeps_every_trigger_as_first_defined(db):
+    # Table rebuilds drop triggers, so later migrations re-create them from hand-copied SQL.
+    def normalized(sql):
+        return " ".join(sql.split())
+
+    expected = {}
+    for module, names in {
+        "0007_votechange": ["SQLITE_TRIGGERS"],
+        "0012_title_search": ["SQLITE_SEARCH"],
+        "0013_recap_search": ["SQLITE_SEARCH"],
+        "0014_title_count_triggers": ["SQLITE_TRIGGERS"],
+        "0015_title_recap_stats": ["SQLITE_TRIGGERS"],
+    }.items():
+        migration = importlib.import_module(f"api.migrations.{module}")
+        for name in names:
+            for statement in map(normalized, getattr(migration, name)):
+                if statement.startswith("CREATE TRIGGER"):
+                    expected[statement.split()[2]] = statement
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+        installed = {name: normalized(sql) for name, sql in cursor.fetchall()}
+    assert installed == expected
+
+
+def test_recapped_buckets_follow_concurrent_and_moved_recaps(title_with_recap, user_factory):
+    title, author = title_with_recap
+    heat = Title.objects.create(name="Heat", category=TitleCategory.MOVIE, created_by=author)
+
+    def recapped():
+        slots = TitleSlot.objects.filter(bucket__startswith=TitleSlot.RECAPPED, title__isnull=False)
+        return set(slots.values_list("bucket", "title_id"))
+
+    # Another transaction's first recap lands before this one's signal reads the count.
+    Recap.objects.bulk_create([Recap(title=heat, user=user_factory(), text="Bank job.")])
+    Recap.objects.create(title=heat, user=user_factory(), text="Diner scene.")
+    assert Title.objects.get(pk=heat.pk).recap_count == 2
+    assert recapped() == {(bucket, pk) for bucket in ("+", "+movie") for pk in (title.pk, heat.pk)}
+
+    spoon = title.recaps.get()
+    spoon.title = heat
+    spoon.save()
+    assert recapped() == {("+", heat.pk), ("+movie", heat.pk)}
+    spoon.title = title
+    spoon.save(update_fields=["title"])
+    assert recapped() == {(bucket, pk) for bucket in ("+", "+movie") for pk in (title.pk, heat.pk)}
+
+
+def test_engagement_weighted_random_draws_from_the_alias_table(api_client, title_with_recap, user_factory, settings, tmp_path):
+    title, author = title_with_recap
+    settings.ENGAGEMENT_TABLE_PATH = tmp_path / "engagement.table"
+    EngagementSampler.reset()
+    empty = Title.objects.create(name="Heat", category=TitleCategory.MOVIE, created_by=author)
+
+    def random_ids(**params):
+        response = api_client.get(reverse("titles-random"), {"weighting": "engagement", "count": 2, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return [bundle["title"]["id"] for bundle in response.data["results"]]
+
+    # Without a table the draw is uniform.
+    assert set(random_ids()) == {title.pk, empty.pk}
+
+    report = EngagementSampler.rebuild()
+    assert report.titles == 2
+    assert sorted(report.rebuilt) == ["", "+", "+movie", "movie"]
+    assert EngagementSampler.rebuild().rebuilt == []
+    prob, alias = build_alias([weight(1, 0), weight(0, None)])
+    assert (prob[0], alias[1]) == (1.0, 0)
+    assert prob[1] == pytest.approx(2 * EMPTY_WEIGHT / (1 + math.log(2) + EMPTY_WEIGHT))
+
+    draws = Counter(EngagementSampler.sample(k=1)[0] for _ in range(400))
+    assert draws[title.pk] > 4 * draws[empty.pk] > 0
+    assert random_ids(with_recaps="true") == [title.pk]
+    assert random_ids(exclude=title.pk) == [empty.pk]
+
+    # Only the buckets whose weights changed are rebuilt; deleted titles are never returned.
+    Recap.objects.filter(title=title).update(score=3)
+    assert sorted(EngagementSampler.rebuild().rebuilt) == ["", "+", "+movie", "movie"]
+    Title.objects.create(name="Dune", category=TitleCategory.BOOK, created_by=author)
+    assert sorted(EngagementSampler.rebuild().rebuilt) == ["", "book"]
+    empty.delete()
+    assert title.pk in random_ids(category=TitleCategory.MOVIE)
+    assert empty.pk not in random_ids(category=TitleCategory.MOVIE)
+
+    assert api_client.get(reverse("titles-random"), {"weighting": "loud"}).status_code == status.HTTP_400_BAD_REQUEST
+    out = StringIO()
+    call_command("rebuild_engagement_table", stdout=out)
+    assert "Weighted 2 titles; rebuilt 2 buckets, kept 3 unchanged." in out.getvalue()
+
+
+def test_periodic_commands_repeat_every_interval_until_stopped(db, monkeypatch):
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr("api.management.periodic.time.sleep", sleep)
+    out = StringIO()
+    with pytest.raises(KeyboardInterrupt):
+        call_command("rebuild_leaderboards", "--every", "30", stdout=out)
+    assert sleeps == [30, 30]
+    assert out.getvalue().count("Rebuilt leaderboards") == 2
+    call_command("rollup_vote_counters", stdout=out)
+    assert sleeps == [30, 30]
+
+
+def test_row_serializers_match_drf_serializers(catalog_with_recaps):
+    titles, users = catalog_with_recaps
+    Title.objects.create(name="Empty", category=TitleCategory.BOOK, created_by=users[0])
+    VoteService.apply_vote(Recap.objects.order_by("pk").first(), users[1], Vote.DOWNVOTE)
+    User.objects.filter(pk=users[2].pk).update(username="")
+
+    assert TITLE_ROWS.many(Title.objects.order_by("pk").values(*TITLE_ROWS.fields)) == TitleSerializer(
+        Title.objects.order_by("pk"), many=True
+    ).data
+    for voter in (None, users[1]):
+        recaps = with_current_user_vote(Recap.objects.select_related("title", "user").order_by("pk"), voter)
+        rows = recaps.values(*RECAP_ROWS.fields, *(["current_user_vote"] if voter else []))
+        assert RECAP_ROWS.many(rows) == RecapSerializer(recaps, many=True).data
+    with timezone.override("UTC"):
+        assert RECAP_ROWS(rows[0]) == RecapSerializer(recaps[0]).data
+        assert RECAP_ROWS(rows[0])["created_at"].endswith("Z")
+
+    title_ids = list(Title.objects.order_by("-pk").values_list("pk", flat=True))
+    bundles = SummaryService.build(title_ids)
+    recaps = Recap.objects.select_related("title", "user").in_bulk()
+    expected = [
+        {
+            "title": Title.objects.get(pk=bundle["title"]["id"]),
+            "top_recap": recaps[bundle["top_recap"]["id"]] if bundle["top_recap"] else None,
+            "other_recaps": [recaps[recap["id"]] for recap in bundle["other_recaps"]],
+        }
+        for bundle in bundles
+    ]
+    assert len(bundles) == len(titles) + 1 and bundles[0]["top_recap"] is None
+    assert bundles == TitleSummarySerializer(expected, many=True).data
+
+
+def test_fast_json_renderer_and_parser_match_drf(api_client, title_with_recap, settings):
+    title, author = title_with_recap
+    brisbane = timezone.get_fixed_timezone(600)
+    data = ReturnDict(
+        {
+            "utc": datetime(2024, 5, 1, 12, 30, tzinfo=UTC),
+            "local": datetime(2024, 5, 1, 12, 30, 0, 250, tzinfo=brisbane),
+            "naive": datetime(2024, 5, 1, 12, 30),
+            "day": date(2024, 5, 1),
+            "price": Decimal("1.50"),
+            "id": uuid.UUID(int=7),
+            "label": gettext_lazy("Book"),
+            "votes": {3: 1, 5: -1},
+            "text": "Ünïcode \u2028 separators \u2029",
+            "titles": Title.objects.values_list("name", flat=True),
+            "nested": ReturnList([{"none": None, "float": 0.1, "big": 2**53}], serializer=None),
+        },
+        serializer=None,
+    )
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert FastJSONRenderer().render(data, "application/json; indent=2") == JSONRenderer().render(
+        data, "application/json; indent=2"
+    )
+
+    # Floats decode to the same values, but orjson spells some differently.
+    floats = {"small": 1.2e-05, "large": 1e16, "relevance": 0.0607927}
+    fast, stock = FastJSONRenderer().render(floats), JSONRenderer().render(floats)
+    assert json.loads(fast) == json.loads(stock) == floats
+    assert fast == b'{"small":0.000012,"large":1e16,"relevance":0.0607927}'
+    # Non-finite floats are not JSON: the stock renderer refuses them, orjson writes null.
+    with pytest.raises(ValueError):
+        JSONRenderer().render({"score": math.nan})
+    assert FastJSONRenderer().render({"score": math.nan, "top": math.inf}) == b'{"score":null,"top":null}'
+
+    body = JSONRenderer().render(data)
+    assert FastJSONParser().parse(BytesIO(body)) == JSONParser().parse(BytesIO(body))
+    for invalid in (b'{"a": NaN}', b"{'a': 1}", b"\xff"):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(BytesIO(invalid))
+    settings.JSON_BACKEND = "stdlib"
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    # Requests round-trip through the configured renderer and parser.
+    settings.JSON_BACKEND = "auto"
+    api_client.force_authenticate(user=author)
+    response = api_client.patch(reverse("recaps-detail", args=[title.recaps.get().pk]), {"text": "Ünïcode"}, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["text"] == "Ünïcode"
+
+
+def test_sparse_fieldsets_skip_unrequested_fields_and_compact_bundles(
+    api_client, catalog_with_recaps, django_assert_num_queries
+):
+    titles, users = catalog_with_recaps
+    title = titles[2]
+    api_client.force_authenticate(user=users[0])
+    url = reverse("titles-summary", args=[title.pk])
+    full = api_client.get(url).data
+    assert full["top_recap"]["title"] == full["title"]
+
+    response = api_client.get(url, {"fields": "title.name,top_recap", "omit": "top_recap.title,top_recap.user.email"})
+    top = {key: value for key, value in full["top_recap"].items() if key != "title"}
+    assert response.data == {"title": {"name": title.name}, "top_recap": {**top, "user": {"username": top["user"]["username"]}}}
+    # Without votes in the output the cached bundle is served with no vote lookup.
+    with django_assert_num_queries(0):
+        api_client.get(url, {"omit": "top_recap.current_user_vote,other_recaps.current_user_vote"})
+    # Titles alone never touch the recap table.
+    with django_assert_num_queries(1) as captured:
+        response = api_client.get(reverse("titles-summary", args=[titles[3].pk]), {"fields": "title"})
+    assert response.data == {"title": TitleSerializer(titles[3]).data}
+    assert "api_recap" not in captured.captured_queries[0]["sql"]
+
+    compact = api_client.get(url, {"compact": "true"}).data
+    recaps = [compact["top_recap"], *compact["other_recaps"]]
+    assert {recap["title"] for recap in recaps} == {title.pk}
+    assert compact["users"] == {recap["user"]["email"]: recap["user"] for recap in [full["top_recap"], *full["other_recaps"]]}
+    assert set(compact["users"]) == {recap["user"] for recap in recaps}
+    assert len(JSONRenderer().render(compact)) < len(JSONRenderer().render(full))
+
+    with django_assert_num_queries(2) as captured:
+        response = api_client.get(reverse("titles-recaps", args=[title.pk]), {"fields": "id,score"})
+    assert [set(recap) for recap in response.data["results"]] == [{"id", "score"}] * 3
+    page_sql = captured.captured_queries[1]["sql"]
+    assert '"text"' not in page_sql and "accounts_user" not in page_sql and "api_vote" not in page_sql
+    response = api_client.get(reverse("titles-list"), {"fields": "name", "page_size": 2})
+    assert response.data["results"] == [{"name": "Podcast 0"}, {"name": "Podcast 1"}]
+
+    # Fieldsets shape responses but never what a write accepts.
+    response = api_client.post(f"{reverse('titles-list')}?fields=id", {"name": "Dune", "category": TitleCategory.BOOK})
+    assert response.status_code == status.HTTP_201_CREATED
+    assert Title.objects.get(pk=response.data["id"]).name == "Dune"
+    assert api_client.get(url, {"fields": "title..name"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_api_json_responses_are_compressed_above_the_threshold(api_client, catalog_with_recaps, settings):
+    titles, users = catalog_with_recaps
+    metrics.reset()
+    settings.API_COMPRESSION_MIN_SIZE = 500
+    url = reverse("titles-summaries")
+    params = {"ids": ",".join(str(title.pk) for title in titles)}
+    plain = api_client.get(url, params)
+    assert "Content-Encoding" not in plain and "Accept-Encoding" in plain["Vary"]
+
+    response = api_client.get(url, params, HTTP_ACCEPT_ENCODING="br;q=0.5, gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert int(response["Content-Length"]) == len(response.content) < len(plain.content)
+    assert gzip.decompress(response.content) == plain.content
+    # The shared response's compressed bytes are reused for the next caller.
+    assert api_client.get(url, params, HTTP_ACCEPT_ENCODING="gzip").content == response.content
+    counters = metrics.snapshot()
+    assert counters["compression.responses"] == 2 and counters["compression.cache_hits"] == 1
+    assert counters["compression.bytes_in"] == 2 * len(plain.content)
+    assert counters["compression.bytes_out"] == 2 * len(response.content)
+
+    # Per-user responses are compressed but not cached.
+    api_client.force_authenticate(user=users[0])
+    assert api_client.get(url, params, HTTP_ACCEPT_ENCODING="gzip")["Content-Encoding"] == "gzip"
+    assert metrics.snapshot()["compression.cache_hits"] == 1
+
+    for accept in ("identity", "gzip;q=0", "compress"):
+        assert "Content-Encoding" not in api_client.get(url, params, HTTP_ACCEPT_ENCODING=accept)
+    small = api_client.get(reverse("titles-count"), HTTP_ACCEPT_ENCODING="gzip")
+    assert "Content-Encoding" not in small
+    assert metrics.snapshot()["compression.below_threshold"] == 1
+
+
+def test_jwt_reads_use_token_claims_without_loading_the_user(
+    api_client, catalog_with_recaps, django_assert_num_queries
+):
+    titles, users = catalog_with_recaps
+    voter = users[0]
+    recap = titles[0].recaps.first()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(voter)}")
+    # Writes authenticate against the database as before.
+    vote_url = reverse("recaps-vote", args=[recap.pk])
+    assert api_client.post(vote_url, {"value": 1}, format="json").status_code == status.HTTP_200_OK
+
+    # The bundle and the caller's votes; no query for the user row.
+    with django_assert_num_queries(2):
+        response = api_client.get(reverse("titles-summary", args=[titles[0].pk]))
+    votes = {bundle["id"]: bundle["current_user_vote"] for bundle in [response.data["top_recap"], *response.data["other_recaps"]]}
+    assert votes[recap.pk] == Vote.UPVOTE
+    with django_assert_num_queries(1):
+        assert api_client.get(reverse("recaps-my-votes"), {"ids": recap.pk}).data == {"votes": {recap.pk: Vote.UPVOTE}}
+    # Reading the profile loads the row, which must still exist and be active.
+    with django_assert_num_queries(1):
+        assert api_client.get(reverse("auth_me")).data["email"] == voter.email
+
+    User.objects.filter(pk=voter.pk).update(is_active=False)
+    assert api_client.get(reverse("auth_me")).status_code == status.HTTP_401_UNAUTHORIZED
+    assert api_client.post(vote_url, {"value": 0}, format="json").status_code == status.HTTP_401_UNAUTHORIZED
+
+    user = ClaimsUser(voter.pk, lambda: User.objects.get(pk=voter.pk))
+    assert user and user.is_authenticated and user.email == user.pk == voter.pk and not user.is_loaded
+    assert isinstance(user, User) and user.is_loaded
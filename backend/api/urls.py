@@ -4,9 +4,14 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from accounts.views import GoogleLoginView, MeView, RegisterView, TurnstileTokenObtainPairView
+from accounts.views import (
+    GoogleLoginView,
+    MeView,
+    RegisterView,
+    TurnstileTokenObtainPairView,
+)
 
-from .views import RecapViewSet, TitleViewSet
+from .views import MetricsView, RecapViewSet, TitleViewSet
 
 router = DefaultRouter()
 router.register("titles", TitleViewSet, basename="titles")
@@ -18,5 +23,6 @@ urlpatterns = [
     path("auth/register/", RegisterView.as_view(), name="auth_register"),
     path("auth/me/", MeView.as_view(), name="auth_me"),
     path("auth/google/", GoogleLoginView.as_view(), name="auth_google"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("", include(router.urls)),
 ]
@@ -1,34 +1,127 @@
-from typing import Any, Dict
+from __future__ import annotations
+
+import logging
+from typing import Any
 
 from django.db import IntegrityError
 from django.db.models import OuterRef, QuerySet, Subquery
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .models import Recap, Title, TitleCategory, Vote
+from . import metrics
+from .fieldsets import Fieldset, compact_bundle, wants
+from .models import LeaderboardEntry, Recap, Title, TitleCategory, Vote
+from .pagination import RecapKeysetPagination, TitleKeysetPagination
 from .serializers import (
     RecapCreateSerializer,
-    RecapUpdateSerializer,
+    RecapSearchResultSerializer,
     RecapSerializer,
+    RecapUpdateSerializer,
     TitleSerializer,
-    TitleSummarySerializer,
     VoteSerializer,
 )
+from .services.catalog import CategoryCounts
+from .services.decks import Deck, DeckService, InvalidCursorError
+from .services.engagement import EngagementSampler
+from .services.leaderboards import WINDOWS, Leaderboards, board_size
+from .services.recap_search import DEFAULT_LIMIT as RECAP_SEARCH_LIMIT
+from .services.recap_search import RecapSearch
+from .services.sampler import TitleSampler
+from .services.summaries import SummaryService
+from .services.title_search import DEFAULT_LIMIT, TitleSearch
 from .services.votes import VoteService
 
-import logging
-
 logger = logging.getLogger(__name__)
 
+# Upper bound on bundles returned by a single batched or deck request.
+BUNDLE_MAX_COUNT = 10
+# Upper bound on recap IDs accepted by the vote overlay.
+MY_VOTES_MAX_IDS = 200
+# Seconds shared HTTP caches may reuse user-neutral summary responses.
+SUMMARY_HTTP_MAX_AGE = 30
+# Upper bound on titles returned by one search request.
+SEARCH_MAX_RESULTS = 20
+# Upper bound on recaps returned by one text search request.
+RECAP_SEARCH_MAX_RESULTS = 50
+# Accepted values of the random endpoint's ``weighting`` parameter.
+RANDOM_WEIGHTINGS = ("uniform", "engagement")
+
+
+def parse_id_list(params, name: str) -> list[int]:
+    """Parse repeated or comma-separated integer IDs, ignoring invalid values."""
+
+    values = params.getlist(name)
+    # If the list is a single comma-separated string, split it
+    if len(values) == 1 and "," in values[0]:
+        values = values[0].split(",")
+    # Convert to integers, ignore invalids
+    ids = []
+    for val in values:
+        try:
+            ids.append(int(val))
+        except (TypeError, ValueError):
+            continue
+    return list(dict.fromkeys(ids))
+
+
+def parse_count(value: str | None, default: int, maximum: int, name: str = "count") -> int:
+    """Parse an optional count query parameter bounded by ``1..maximum``."""
+
+    if value in (None, ""):
+        return default
+    try:
+        count = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValidationError({name: "Must be an integer."}) from exc
+    if not 1 <= count <= maximum:
+        raise ValidationError({name: f"Must be between 1 and {maximum}."})
+    return count
+
+
+def parse_flag(value: Any) -> bool:
+    """Parse an optional boolean parameter (``1``/``true``/``yes``, case-insensitive)."""
+
+    return str(value).lower() in {"1", "true", "yes"} if value is not None else False
+
+
+def output_context(request: Any) -> dict[str, Any]:
+    """Serializer context for responses: the request and its ``?fields=``/``?omit=`` selection."""
+
+    return {"request": request, "fieldset": Fieldset.from_params(request.query_params)}
+
+
+def with_current_user_vote(
+    queryset: QuerySet[Recap] | list[Recap], user: Any
+) -> QuerySet[Recap] | list[Recap]:
+    """Attach ``user``'s vote to each recap as ``current_user_vote`` (``None`` for anonymous users).
+
+    Querysets are annotated so the vote comes back in the same query; recaps
+    already loaded get it set from one lookup of the user's votes.
+    """
+
+    if not (user and user.is_authenticated):
+        return queryset
+    if isinstance(queryset, list):
+        votes = VoteService.votes_for(user, [recap.pk for recap in queryset])
+        for recap in queryset:
+            recap.current_user_vote = votes.get(recap.pk)
+    else:
+        vote_subquery = Vote.objects.filter(recap=OuterRef("pk"), user_id=user.pk).values("value")[:1]
+        queryset = queryset.annotate(current_user_vote=Subquery(vote_subquery))
+    return queryset
+
 
 class TitleViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     """Manage Titles and provide custom random/summary views."""
 
-    queryset = Title.objects.prefetch_related("recaps__user", "recaps__title")
+    queryset = Title.objects.all()
     serializer_class = TitleSerializer
+    pagination_class = TitleKeysetPagination
 
     def get_permissions(self):
         if self.action == "create":
@@ -38,72 +131,209 @@ class TitleViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), **output_context(self.request)}
+
+    def list(self, request):
+        """Page through the catalog by ``name`` or newest first (``ordering=name|new``).
+
+        Every page carries ``facets``, the title count per category, read from
+        maintained counters rather than counted.
+        """
+
+        category = request.query_params.get("category")
+        page = self.paginate_queryset(self._filter_by_category(self.get_queryset(), category))
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data["facets"] = CategoryCounts.facets()
+        return response
+
     @action(detail=False, methods=["get"], url_path="random", permission_classes=[AllowAny])
     def random(self, request):
-        """Return a random title bundle, optionally filtered by category and excluding given IDs."""
+        """Return a random title bundle, optionally filtered by category and excluding given IDs.
+
+        With ``count`` the response is ``{"results": [...]}`` holding up to that many
+        distinct bundles, so clients can prefetch several cards in one round trip.
+        ``with_recaps=true`` only picks titles that have at least one recap.
+        ``weighting=engagement`` favours titles with more and better-scored recaps
+        (see ``EngagementSampler``); it is uniform until the table has been built.
+        """
 
         category = request.query_params.get("category")
-        exclude = request.query_params.getlist("exclude")
-        # If exclude is a single comma-separated string, split it
-        if len(exclude) == 1 and "," in exclude[0]:
-            exclude = exclude[0].split(",")
-        # Convert to integers, ignore invalids
-        exclude_ids = []
-        for val in exclude:
-            try:
-                exclude_ids.append(int(val))
-            except (TypeError, ValueError):
-                continue
-        queryset = self._filter_by_category(self.get_queryset(), category)
-        if exclude_ids:
-            queryset = queryset.exclude(pk__in=exclude_ids)
-        title = queryset.order_by("?").first()
-        if not title:
+        exclude_ids = parse_id_list(request.query_params, "exclude")
+        self._validate_category(category)
+        count_param = request.query_params.get("count")
+        count = parse_count(count_param, default=1, maximum=BUNDLE_MAX_COUNT)
+        with_recaps = parse_flag(request.query_params.get("with_recaps"))
+        weighting = request.query_params.get("weighting") or "uniform"
+        if weighting not in RANDOM_WEIGHTINGS:
+            raise ValidationError({"weighting": f"Must be one of {', '.join(RANDOM_WEIGHTINGS)}."})
+        picked = None
+        if weighting == "engagement":
+            picked = EngagementSampler.sample(category, exclude=exclude_ids, k=count, with_recaps=with_recaps)
+        if picked is None:
+            picked = TitleSampler.sample(category, exclude=exclude_ids, k=count, with_recaps=with_recaps)
+        bundles = self._build_summaries(picked)
+        if count_param is not None:
+            return Response({"results": bundles})
+        if not bundles:
             raise NotFound("No titles available for the requested filter.")
-        return Response(self._build_summary(title))
+        return Response(bundles[0])
+
+    @action(detail=False, methods=["post"], url_path="deck", permission_classes=[AllowAny])
+    def deck(self, request):
+        """Open a shuffled deck of titles for the optional category and return its cursor.
+
+        ``with_recaps=true`` deals only titles that have at least one recap.
+        """
+
+        category = request.data.get("category") or request.query_params.get("category")
+        self._validate_category(category)
+        with_recaps = parse_flag(request.data.get("with_recaps", request.query_params.get("with_recaps")))
+        deck = DeckService.open(category, with_recaps=with_recaps)
+        return Response({"cursor": deck.encode(), "remaining": deck.remaining}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], url_path="deck/next", permission_classes=[AllowAny])
+    def deck_next(self, request):
+        """Deal the next ``count`` title bundles from the deck identified by ``cursor``."""
+
+        count = parse_count(request.query_params.get("count"), default=1, maximum=BUNDLE_MAX_COUNT)
+        try:
+            title_ids, deck = DeckService.deal(Deck.decode(request.query_params.get("cursor", "")), count)
+        except InvalidCursorError as exc:
+            raise ValidationError({"cursor": str(exc)}) from exc
+        return Response(
+            {
+                "results": self._build_summaries(title_ids),
+                "cursor": deck.encode() if deck.remaining else None,
+                "remaining": deck.remaining,
+            }
+        )
 
     @action(detail=True, methods=["get"], url_path="summary", permission_classes=[AllowAny])
     def summary(self, request, pk=None):
         """Return the summary payload for a specific title."""
 
+        try:
+            bundles = self._build_summaries([int(pk)])
+        except (TypeError, ValueError):
+            bundles = []
+        if not bundles:
+            raise NotFound("No Title matches the given query.")
+        return self._shared_response(bundles[0])
+
+    @action(detail=False, methods=["get"], url_path="summaries", permission_classes=[AllowAny])
+    def summaries(self, request):
+        """Return the summary payloads for the titles listed in ``ids``, in that order."""
+
+        ids = parse_id_list(request.query_params, "ids")
+        if not ids:
+            raise ValidationError({"ids": "Provide at least one title ID."})
+        if len(ids) > BUNDLE_MAX_COUNT:
+            raise ValidationError({"ids": f"At most {BUNDLE_MAX_COUNT} IDs per request."})
+        return self._shared_response({"results": self._build_summaries(ids)})
+
+    @action(detail=True, methods=["get"], url_path="recaps", permission_classes=[AllowAny])
+    def recaps(self, request, pk=None):
+        """Page through a title's recaps with a keyset cursor (``ordering=top|new``).
+
+        Each page is one query, including the caller's vote on every recap.
+        Fields left out with ``?fields=``/``?omit=`` are not read: no user
+        join, recap text or vote lookup unless they are returned.
+        """
+
         title = self.get_object()
-        return Response(self._build_summary(title))
+        context = output_context(request)
+        fieldset = context["fieldset"]
+        recaps = Recap.objects.filter(title=title)
+        if wants(fieldset, ("user",)):
+            recaps = recaps.select_related("user")
+        if not wants(fieldset, ("text",)):
+            recaps = recaps.defer("text")
+        if wants(fieldset, ("current_user_vote",)):
+            recaps = with_current_user_vote(recaps, request.user)
+        paginator = RecapKeysetPagination()
+        page = paginator.paginate_queryset(recaps, request, view=self)
+        for recap in page:
+            recap.title = title
+        return paginator.get_paginated_response(RecapSerializer(page, many=True, context=context).data)
 
     @action(detail=False, methods=["get"], url_path="count", permission_classes=[AllowAny])
     def count(self, request):
-        """Return the total number of titles for the optional category filter."""
+        """Return title counts from the maintained per-category counters, in one indexed read.
 
-        category = request.query_params.get("category")
-        queryset = self._filter_by_category(self.get_queryset(), category)
-        return Response({"count": queryset.count()})
+        ``count`` honours the optional category filter; ``total`` and
+        ``categories`` (every category's count) let clients switch categories
+        without asking again.
+        """
+
+        category = request.query_params.get("category") or None
+        self._validate_category(category)
+        categories = CategoryCounts.facets()
+        total = sum(categories.values())
+        return Response({"count": categories[category] if category else total, "total": total, "categories": categories})
+
+    @action(detail=False, methods=["get"], url_path="search", permission_classes=[AllowAny])
+    def search(self, request):
+        """Return titles whose name or author matches ``q``: prefixes, then substrings, then near misses."""
+
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This parameter is required."})
+        limit = parse_count(request.query_params.get("limit"), DEFAULT_LIMIT, SEARCH_MAX_RESULTS, name="limit")
+        titles = TitleSearch.search(query, limit)
+        return Response({"results": self.get_serializer(titles, many=True).data})
 
     def _filter_by_category(self, queryset: QuerySet[Title], category: str | None) -> QuerySet[Title]:
         if category:
-            if category not in TitleCategory.values:
-                raise ValidationError({"category": "Invalid category."})
+            self._validate_category(category)
             return queryset.filter(category=category)
         return queryset
 
-    def _build_summary(self, title: Title) -> dict[str, Any]:
-        recaps = self._annotate_with_vote(title.recaps.select_related("user", "title"))
-        top = recaps.order_by("-score", "-created_at").first()
-        others = recaps.exclude(pk=getattr(top, "pk", None)).order_by("?")[:3] if top else recaps.order_by("?")[:3]
-        serializer = TitleSummarySerializer(
-            {
-                "title": title,
-                "top_recap": top,
-                "other_recaps": list(others),
-            },
-            context={"request": self.request},
+    def _validate_category(self, category: str | None) -> None:
+        if category and category not in TitleCategory.values:
+            raise ValidationError({"category": "Invalid category."})
+
+    def _overlay_votes(self) -> bool:
+        if self.request.query_params.get("votes", "").lower() in {"0", "false", "no"}:
+            return False
+        fieldset = Fieldset.from_params(self.request.query_params)
+        return wants(fieldset, ("top_recap", "current_user_vote"), ("other_recaps", "current_user_vote"))
+
+    def _build_summaries(self, title_ids: list[int]) -> list[dict[str, Any]]:
+        """Build bundles, then apply ``?fields=``/``?omit=`` and ``?compact=true``.
+
+        Votes are only looked up, and recaps only read, when the fieldset
+        returns them. Compact bundles reference the title and users by key.
+        """
+
+        fieldset = Fieldset.from_params(self.request.query_params)
+        bundles = SummaryService.build(
+            title_ids,
+            request=self.request,
+            overlay_votes=self._overlay_votes(),
+            recaps=wants(fieldset, ("top_recap",), ("other_recaps",)),
         )
-        return serializer.data
+        if fieldset is not None:
+            bundles = [fieldset.prune(bundle) for bundle in bundles]
+        if parse_flag(self.request.query_params.get("compact")):
+            bundles = [compact_bundle(bundle) for bundle in bundles]
+        return bundles
 
-    def _annotate_with_vote(self, queryset: QuerySet[Recap]) -> QuerySet[Recap]:
-        user = getattr(self.request, "user", None)
-        if user and user.is_authenticated:
-            vote_subquery = Vote.objects.filter(recap=OuterRef("pk"), user=user).values("value")[:1]
-            return queryset.annotate(current_user_vote=Subquery(vote_subquery))
-        return queryset
+    def _shared_response(self, data: Any) -> Response:
+        """Mark user-neutral bundle responses as cacheable by shared HTTP caches.
+
+        Anonymous responses to URLs that would overlay votes vary on
+        ``Authorization``, so a shared cache never hands them to a signed-in
+        caller, who expects their votes.
+        """
+
+        response = Response(data)
+        overlay_votes = self._overlay_votes()
+        if not (overlay_votes and self.request.user.is_authenticated):
+            patch_cache_control(response, public=True, max_age=SUMMARY_HTTP_MAX_AGE)
+            if overlay_votes:
+                patch_vary_headers(response, ("Authorization",))
+        return response
 
 
 class RecapViewSet(
@@ -119,17 +349,18 @@ class RecapViewSet(
     serializer_class = RecapSerializer
 
     def get_permissions(self):
-        if self.action in {"create", "vote", "update", "partial_update", "destroy"}:
+        if self.action in {"create", "vote", "my_votes", "update", "partial_update", "destroy"}:
             return [IsAuthenticated()]
         return [AllowAny()]
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        user = getattr(self.request, "user", None)
-        if user and user.is_authenticated:
-            vote_subquery = Vote.objects.filter(recap=OuterRef("pk"), user=user).values("value")[:1]
-            queryset = queryset.annotate(current_user_vote=Subquery(vote_subquery))
-        return queryset
+        if not wants(Fieldset.from_params(self.request.query_params), ("current_user_vote",)):
+            return queryset
+        return with_current_user_vote(queryset, getattr(self.request, "user", None))
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), **output_context(self.request)}
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -149,7 +380,7 @@ class RecapViewSet(
             if "unique_title_user_nosolong" in message or "unique_title_user_recap" in message:
                 raise ValidationError({"title": "You already have a recap for this title."}) from exc
             raise ValidationError({"title": "Invalid or missing title."}) from exc
-        output = RecapSerializer(recap, context={"request": request})
+        output = RecapSerializer(recap, context=output_context(request))
         headers = self.get_success_headers(output.data)
         return Response(output.data, status=status.HTTP_201_CREATED, headers=headers)
 
@@ -163,12 +394,74 @@ class RecapViewSet(
             raise PermissionDenied("You can only delete your own recap.")
         instance.delete()
 
+    @action(detail=False, methods=["get"], url_path="my-votes", permission_classes=[IsAuthenticated])
+    def my_votes(self, request):
+        """Return the caller's votes on the recaps listed in ``ids`` as ``{recap_id: value}``.
+
+        Lets clients combine shared, user-neutral bundles with their own votes.
+        """
+
+        ids = parse_id_list(request.query_params, "ids")
+        if len(ids) > MY_VOTES_MAX_IDS:
+            raise ValidationError({"ids": f"At most {MY_VOTES_MAX_IDS} IDs per request."})
+        return Response({"votes": VoteService.votes_for(request.user, ids)})
+
+    @action(detail=False, methods=["get"], url_path="leaderboard", permission_classes=[AllowAny])
+    def leaderboard(self, request):
+        """Return the top recaps of a category (all when omitted) for ``window=week|all``.
+
+        Served from the precomputed boards, so the cost does not depend on the
+        number of recaps. ``limit`` defaults to and is capped by ``LEADERBOARD_SIZE``.
+        """
+
+        category = request.query_params.get("category") or None
+        if category and category not in TitleCategory.values:
+            raise ValidationError({"category": "Invalid category."})
+        window = request.query_params.get("window") or LeaderboardEntry.WEEK
+        if window not in WINDOWS:
+            raise ValidationError({"window": f"Must be one of {', '.join(WINDOWS)}."})
+        limit = parse_count(request.query_params.get("limit"), board_size(), board_size(), name="limit")
+        recaps = Leaderboards.top(category, window, limit)
+        context = output_context(request)
+        if wants(context["fieldset"], ("current_user_vote",)):
+            recaps = with_current_user_vote(recaps, request.user)
+        data = RecapSerializer(recaps, many=True, context=context).data
+        return Response({"category": category, "window": window, "results": data})
+
+    @action(detail=False, methods=["get"], url_path="search", permission_classes=[AllowAny])
+    def search(self, request):
+        """Return recaps whose text matches ``q``, ranked by relevance and score, with snippets.
+
+        Words must all occur (after stemming) and ``"quoted text"`` matches a
+        phrase. Results carry a ``snippet`` with matches in ``<mark>`` tags
+        instead of the full text.
+        """
+
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This parameter is required."})
+        limit = parse_count(request.query_params.get("limit"), RECAP_SEARCH_LIMIT, RECAP_SEARCH_MAX_RESULTS, name="limit")
+        recaps = RecapSearch.search(query, limit)
+        context = output_context(request)
+        if wants(context["fieldset"], ("current_user_vote",)):
+            recaps = with_current_user_vote(recaps, request.user)
+        data = RecapSearchResultSerializer(recaps, many=True, context=context).data
+        return Response({"results": data})
+
     @action(detail=True, methods=["post"], url_path="vote", permission_classes=[IsAuthenticated])
     def vote(self, request, pk=None):
         recap = self.get_object()
         serializer = VoteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         value = serializer.validated_data["value"]
-        VoteService.apply_vote(recap, request.user, value)
-        updated = self.get_queryset().get(pk=recap.pk)
-        return Response(RecapSerializer(updated, context={"request": request}).data, status=status.HTTP_200_OK)
+        recap = VoteService.apply_vote(recap, request.user, value)
+        return Response(RecapSerializer(recap, context=output_context(request)).data, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """Expose operational counters (cache hits and misses, etc.) to staff users."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
@@ -65,6 +65,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.CompressionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -133,9 +134,81 @@ WHITENOISE_MAX_AGE = 60 * 60 * 24 * 30
 WHITENOISE_ROOT = BASE_DIR / "public"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+#
+# Caches are configured by URL (e.g. "filecache:///var/tmp/notsolong") so that
+# multi-worker deployments can share entries. Local memory is per process.
+# The summaries cache holds user-neutral title bundles; it culls least-recently
+# used entries beyond MAX_ENTRIES and expires them after TIMEOUT seconds. Their
+# per-title generation counters live in summary_generations, which never
+# expires entries and should not evict them (one small integer per title). The
+# compressed cache holds gzip/Brotli bodies of shared API responses.
+#
+CACHES = {
+    "default": env.cache_url("DJANGO_CACHE_URL", default="locmemcache://default"),
+    "summaries": {
+        **env.cache_url("SUMMARY_CACHE_URL", default="locmemcache://summaries"),
+        "TIMEOUT": env.int("SUMMARY_CACHE_TIMEOUT", default=300),
+        "OPTIONS": {"MAX_ENTRIES": env.int("SUMMARY_CACHE_MAX_ENTRIES", default=5000)},
+    },
+    "summary_generations": {
+        **env.cache_url("SUMMARY_GENERATION_CACHE_URL", default="locmemcache://summary-generations"),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": env.int("SUMMARY_GENERATION_CACHE_MAX_ENTRIES", default=10_000_000)},
+    },
+    "compressed": {
+        **env.cache_url("COMPRESSED_CACHE_URL", default="locmemcache://compressed"),
+        "TIMEOUT": env.int("COMPRESSED_CACHE_TIMEOUT", default=300),
+        "OPTIONS": {"MAX_ENTRIES": env.int("COMPRESSED_CACHE_MAX_ENTRIES", default=1000)},
+    },
+}
+
+#
+# /api/ JSON responses of at least this many bytes are gzip-compressed (Brotli
+# when installed) for clients that accept it. Compressed bodies of shared
+# (Cache-Control: public) responses are kept in the "compressed" cache.
+#
+API_COMPRESSION_MIN_SIZE = env.int("API_COMPRESSION_MIN_SIZE", default=1024)
+
+#
+# How vote counters reach Recap rows: "direct" updates them inside the vote
+# transaction; "buffered" writes Vote rows immediately but coalesces counter
+# deltas per worker and flushes them every VOTE_BUFFER_FLUSH_INTERVAL seconds
+# (0 disables the background flusher); "sharded" adds deltas to one of
+# VOTE_COUNTER_SHARDS slot rows per recap, folded into Recap by
+# `manage.py rollup_vote_counters`.
+#
+VOTE_COUNTER_MODE = env("VOTE_COUNTER_MODE", default="direct")
+VOTE_BUFFER_FLUSH_INTERVAL = env.float("VOTE_BUFFER_FLUSH_INTERVAL", default=1.0)
+VOTE_COUNTER_SHARDS = env.int("VOTE_COUNTER_SHARDS", default=16)
+
+#
+# Recaps served per leaderboard (category x week/all time). Boards keep as many
+# again in reserve; `manage.py rebuild_leaderboards` recomputes them exactly.
+#
+LEADERBOARD_SIZE = env.int("LEADERBOARD_SIZE", default=50)
+
+#
+# Alias table behind `/titles/random/?weighting=engagement`, shared by every
+# worker through a memory-mapped file. `manage.py rebuild_engagement_table
+# --every N` keeps it current; without it engagement draws fall back to uniform.
+#
+ENGAGEMENT_TABLE_PATH = Path(env("ENGAGEMENT_TABLE_PATH", default=BASE_DIR / "engagement.table"))
+
+#
+# JSON encoding and decoding for the API: "auto" uses orjson (a dependency)
+# when it can be imported and DRF's stdlib-based renderer and parser
+# otherwise; "orjson" requires it and "stdlib" never uses it.
+#
+JSON_BACKEND = env("JSON_BACKEND", default="auto")
+
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("accounts.authentication.ClaimsJWTAuthentication",),
+    "DEFAULT_RENDERER_CLASSES": ("api.renderers.FastJSONRenderer",),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -22,10 +22,12 @@ import { attentionPulse, slideBackward, slideForward } from "./theme/animations"
 import "./App.css";
 import {
   deleteRecap,
-  fetchTitleCount,
-  fetchRandomTitle,
+  fetchTitleCounts,
+  fetchTitleDeckPage,
   fetchTitleSummary,
   NoTitlesAvailableError,
+  openTitleDeck,
+  type TitleDeckPage,
   voteRecap,
 } from "./api/endpoints";
 import AddRecapDialog from "./components/AddRecapDialog";
@@ -102,6 +104,8 @@ function App() {
   const swipeNavLockRef = useRef(false);
   const handleNextRef = useRef<(() => Promise<void>) | null>(null);
   const handleBackRef = useRef<(() => Promise<void>) | null>(null);
+  // Server-side shuffled deck for the current category; a null cursor means it is used up
+  const deckRef = useRef<{ cursor: string | null } | null>(null);
   const [isAboutOpen, setAboutOpen] = useState(false);
   const [isMobileMenuOpen, setMobileMenuOpen] = useState(false);
   const [transitionDirection, setTransitionDirection] = useState<"forward" | "backward">("forward");
@@ -259,14 +263,35 @@ function App() {
       setLoading(true);
       try {
         setTransitionDirection("forward");
-        const recentHistory = useHistoryStore.getState().items.slice(-20);
-        const data = await fetchRandomTitle({
-          category: category || undefined,
-          exclude: recentHistory.length ? recentHistory : undefined,
-        });
+        const openDeck = async () => {
+          const opened = await openTitleDeck(category || undefined);
+          if (!opened.remaining) {
+            throw new NoTitlesAvailableError();
+          }
+          deckRef.current = { cursor: opened.cursor };
+          return opened.cursor;
+        };
+        let cursor = shouldReset || !deckRef.current ? await openDeck() : deckRef.current.cursor;
+        if (!cursor) {
+          setForwardExhausted(true);
+          return; // every title in the category has been dealt
+        }
+        let page: TitleDeckPage;
+        try {
+          page = await fetchTitleDeckPage(cursor);
+        } catch (err) {
+          // Expired decks, or decks from before a server-side reindex, are rejected; start a new one
+          if (!isAxiosError(err) || err.response?.status !== 400) {
+            throw err;
+          }
+          cursor = await openDeck();
+          page = await fetchTitleDeckPage(cursor);
+        }
+        deckRef.current = { cursor: page.cursor };
+        const data = page.results[0];
         if (!data) {
           setForwardExhausted(true);
-          return; // exhausted deque, no-op per requirements
+          return;
         }
         const normalized = normalizeBundle(data);
         setBundle(normalized);
@@ -347,10 +372,10 @@ function App() {
 
     const loadCount = async () => {
       try {
-        const count = await fetchTitleCount(category || undefined);
+        const counts = await fetchTitleCounts();
         if (!isCancelled) {
-          setTitleCounts((prev) => ({ ...prev, [categoryKey]: count }));
-          setTotalTitleCount(count);
+          setTitleCounts(counts);
+          setTotalTitleCount(counts[categoryKey] ?? 0);
         }
       } catch (err) {
         if (!isCancelled) {
@@ -9,7 +9,8 @@ import type {
   User,
 } from "../types/api";
 
-// Fetch a random title, optionally filtered by category and excluding certain IDs
+// Fetch a random title, optionally filtered by category and excluding certain IDs;
+// "engagement" weighting favours titles with more and better-scored recaps.
 // If all titles are excluded, API returns 404 and we return null
 export class NoTitlesAvailableError extends Error {
   constructor(message = "No titles available") {
@@ -21,11 +22,15 @@ export class NoTitlesAvailableError extends Error {
 export const fetchRandomTitle = async (options?: {
   category?: TitleCategory;
   exclude?: number[];
+  weighting?: "uniform" | "engagement";
 }): Promise<TitleBundle | null> => {
   const params: Record<string, string> = {};
   if (options?.category) {
     params.category = options.category;
   }
+  if (options?.weighting) {
+    params.weighting = options.weighting;
+  }
   if (options?.exclude && options.exclude.length) {
     params.exclude = options.exclude.join(",");
   }
@@ -46,17 +51,113 @@ export const fetchRandomTitle = async (options?: {
   }
 };
 
+export type TitleDeckPage = {
+  results: TitleBundle[];
+  cursor: string | null;
+  remaining: number;
+};
+
+// Open a server-side shuffled deck; the returned cursor replaces exclude lists
+export const openTitleDeck = async (category?: TitleCategory) => {
+  const { data } = await apiClient.post<{ cursor: string; remaining: number }>(
+    "/titles/deck/",
+    category ? { category } : {}
+  );
+  return data;
+};
+
+export const fetchTitleDeckPage = async (cursor: string, count = 1) => {
+  const { data } = await apiClient.get<TitleDeckPage>("/titles/deck/next/", {
+    params: { cursor, count },
+  });
+  return data;
+};
+
 export const fetchTitleSummary = async (id: number) => {
   const { data } = await apiClient.get<TitleBundle>(`/titles/${id}/summary/`);
   return data;
 };
 
-export const fetchTitleCount = async (category?: TitleCategory) => {
-  const params = category ? { category } : undefined;
-  const { data } = await apiClient.get<{ count: number }>("/titles/count/", {
-    params,
+export type RecapPage = {
+  results: Recap[];
+  next: string | null;
+};
+
+// Page through a title's recaps; pass the previous page's `next` URL to continue
+export const fetchTitleRecaps = async (
+  id: number,
+  options?: { ordering?: "top" | "new"; pageSize?: number; next?: string | null },
+) => {
+  if (options?.next) {
+    const { data } = await apiClient.get<RecapPage>(options.next);
+    return data;
+  }
+  const { data } = await apiClient.get<RecapPage>(`/titles/${id}/recaps/`, {
+    params: { ordering: options?.ordering, page_size: options?.pageSize },
   });
-  return data.count;
+  return data;
+};
+
+export type TitlePage = {
+  results: Title[];
+  next: string | null;
+  facets: Record<TitleCategory, number>;
+};
+
+// Browse the catalog by name or newest first; pass the previous page's `next` URL to continue
+export const fetchTitles = async (options?: {
+  category?: TitleCategory;
+  ordering?: "name" | "new";
+  pageSize?: number;
+  next?: string | null;
+}) => {
+  if (options?.next) {
+    const { data } = await apiClient.get<TitlePage>(options.next);
+    return data;
+  }
+  const { data } = await apiClient.get<TitlePage>("/titles/", {
+    params: { category: options?.category, ordering: options?.ordering, page_size: options?.pageSize },
+  });
+  return data;
+};
+
+export const fetchLeaderboard = async (options?: {
+  category?: TitleCategory;
+  window?: "week" | "all";
+  limit?: number;
+}) => {
+  const { data } = await apiClient.get<{ results: Recap[] }>("/recaps/leaderboard/", {
+    params: options,
+  });
+  return data.results;
+};
+
+export const searchTitles = async (query: string, limit?: number) => {
+  const { data } = await apiClient.get<{ results: Title[] }>("/titles/search/", {
+    params: { q: query, limit },
+  });
+  return data.results;
+};
+
+export type RecapSearchResult = Omit<Recap, "text"> & {
+  snippet: string;
+  relevance: number;
+};
+
+export const searchRecaps = async (query: string, limit?: number) => {
+  const { data } = await apiClient.get<{ results: RecapSearchResult[] }>("/recaps/search/", {
+    params: { q: query, limit },
+  });
+  return data.results;
+};
+
+// Every category's title count in one request, plus the catalog total under "all"
+export const fetchTitleCounts = async () => {
+  const { data } = await apiClient.get<{
+    total: number;
+    categories: Record<TitleCategory, number>;
+  }>("/titles/count/");
+  return { ...data.categories, all: data.total } as Record<TitleCategory | "all", number>;
 };
 
 export const createTitle = async (
@@ -71,6 +172,15 @@ export const createRecap = async (payload: { title: number; text: string }) => {
   return data;
 };
 
+// The caller's votes for the given recaps, keyed by recap ID
+export const fetchMyVotes = async (ids: number[]) => {
+  const { data } = await apiClient.get<{ votes: Record<string, -1 | 1> }>(
+    "/recaps/my-votes/",
+    { params: { ids: ids.join(",") } }
+  );
+  return data.votes;
+};
+
 export const voteRecap = async (id: number, value: -1 | 0 | 1) => {
   const { data } = await apiClient.post<Recap>(`/recaps/${id}/vote/`, {
     value,
@@ -1,4 +1,4 @@
-import { useState, type FormEvent } from "react";
+import { useEffect, useState, type FormEvent } from "react";
 import {
   Alert,
   Box,
@@ -7,6 +7,9 @@ import {
   DialogActions,
   DialogContent,
   DialogTitle,
+  List,
+  ListItemButton,
+  ListItemText,
   MenuItem,
   Stack,
   TextField,
@@ -16,7 +19,7 @@ import {
 } from "@mui/material";
 import SwipeableDrawer from "@mui/material/SwipeableDrawer";
 
-import { createTitle, fetchTitleSummary } from "../api/endpoints";
+import { createTitle, fetchTitleSummary, searchTitles } from "../api/endpoints";
 import type { Title, TitleBundle, TitleCategory } from "../types/api";
 import { getErrorMessage } from "../utils/errors";
 
@@ -28,6 +31,11 @@ const categories: { label: string; value: TitleCategory }[] = [
   { label: "Other", value: "other" },
 ];
 
+// Wait for a pause in typing before looking for existing titles with a similar name
+const SEARCH_DEBOUNCE_MS = 250;
+const SEARCH_MIN_LENGTH = 2;
+const SEARCH_LIMIT = 5;
+
 interface NewTitleDialogProps {
   open: boolean;
   onClose: () => void;
@@ -40,11 +48,54 @@ const NewTitleDialog = ({ open, onClose, onCreated }: NewTitleDialogProps) => {
   const [author, setAuthor] = useState("");
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
+  const [matches, setMatches] = useState<Title[]>([]);
   const theme = useTheme();
   const isMobile = useMediaQuery(theme.breakpoints.down("sm"));
   const titleText = "Add a new Title";
   const handleDrawerOpen = () => {};
 
+  // Suggest existing titles while typing so duplicates are opened instead of created
+  useEffect(() => {
+    const query = name.trim();
+    if (!open || query.length < SEARCH_MIN_LENGTH) {
+      setMatches([]);
+      return;
+    }
+    let isCancelled = false;
+    const timer = window.setTimeout(async () => {
+      try {
+        const results = await searchTitles(query, SEARCH_LIMIT);
+        if (!isCancelled) {
+          setMatches(results);
+        }
+      } catch (err) {
+        if (!isCancelled) {
+          console.error("Failed to search titles", err);
+        }
+      }
+    }, SEARCH_DEBOUNCE_MS);
+    return () => {
+      isCancelled = true;
+      window.clearTimeout(timer);
+    };
+  }, [name, open]);
+
+  const handleOpenExisting = async (title: Title) => {
+    setLoading(true);
+    setError(null);
+    try {
+      const bundle = await fetchTitleSummary(title.id);
+      onCreated(bundle);
+      setName("");
+      setAuthor("");
+      onClose();
+    } catch (err) {
+      setError(getErrorMessage(err));
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleSubmit = async (event: FormEvent) => {
     event.preventDefault();
     setLoading(true);
@@ -77,6 +128,23 @@ const NewTitleDialog = ({ open, onClose, onCreated }: NewTitleDialogProps) => {
         required
         autoFocus={!isMobile}
       />
+      {matches.length > 0 && (
+        <Box>
+          <Typography variant="body2" color="text.secondary">
+            Already added? Open it instead:
+          </Typography>
+          <List dense disablePadding>
+            {matches.map((match) => (
+              <ListItemButton key={match.id} onClick={() => handleOpenExisting(match)} disabled={loading}>
+                <ListItemText
+                  primary={match.name}
+                  secondary={[match.author, match.category].filter(Boolean).join(" · ")}
+                />
+              </ListItemButton>
+            ))}
+          </List>
+        </Box>
+      )}
       <TextField
         label="Category"
         select